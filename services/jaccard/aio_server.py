@@ -0,0 +1,147 @@
+import asyncio
+import os
+from concurrent import futures
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+from server import PassServicer, stream_ack, stream_cut_short
+
+# Threads running the (CPU-bound, synchronous) PassServicer methods
+AIO_WORKERS = int(os.getenv("JACCARD_AIO_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+# Calls of one RPC method served at once; further calls wait for a free slot
+AIO_MAX_CONCURRENCY = int(os.getenv("JACCARD_AIO_MAX_CONCURRENCY", 256))
+# Messages a stream generates per executor hop. Generation only resumes once gRPC has
+# accepted the previous messages, so a stream never buffers more than this.
+AIO_STREAM_CHUNK = int(os.getenv("JACCARD_AIO_STREAM_CHUNK", 16))
+
+class _Abort(Exception):
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+        self.details = details
+
+class _ThreadContext:
+    """Stands in for the aio context inside executor threads, where abort() cannot be awaited."""
+
+    def __init__(self, context):
+        self._context = context
+
+    def abort(self, code, details):
+        raise _Abort(code, details)
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+def _next_chunk(messages, size):
+    chunk = []
+    for message in messages:
+        chunk.append(message)
+        if len(chunk) == size:
+            break
+    return chunk
+
+def _close_after(pending, messages):
+    """Close a stream generator once no executor thread is inside it (releases its pinned version)."""
+    if pending is None:
+        messages.close()
+    else:
+        pending.add_done_callback(lambda _: messages.close())
+
+class AsyncPassServicer(methods_pb2_grpc.PassServicer):
+    """grpc.aio front end for PassServicer.
+
+    Every RPC runs the synchronous PassServicer method on a thread pool, so a slow
+    consumer only holds an event-loop task, not a worker thread. Streams are generated
+    AIO_STREAM_CHUNK messages at a time and pause while the client is not reading.
+    Client streams (AddProteinStream, QueryNeighbours) are read on the event loop and
+    only the work on what they carry runs on the pool, so a slow or idle sender holds
+    no thread either. Each RPC method
+    admits at most AIO_MAX_CONCURRENCY calls at once.
+    """
+
+    def __init__(self, servicer=None, workers=AIO_WORKERS, max_concurrency=AIO_MAX_CONCURRENCY):
+        self.servicer = servicer or PassServicer()
+        self.executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self.max_concurrency = max_concurrency
+        self._limits = {}
+
+    def _limit(self, name):
+        limit = self._limits.get(name)
+        if limit is None:
+            limit = self._limits[name] = asyncio.Semaphore(self.max_concurrency)
+        return limit
+
+    async def _unary(self, name, request, context):
+        async with self._limit(name):
+            pending = self.executor.submit(getattr(self.servicer, name), request, _ThreadContext(context))
+            try:
+                return await asyncio.wrap_future(pending)
+            except _Abort as e:
+                await context.abort(e.code, e.details)
+
+    async def _stream(self, name, request, context):
+        async with self._limit(name):
+            messages = getattr(self.servicer, name)(request, _ThreadContext(context))
+            pending = None
+            try:
+                while True:
+                    pending = self.executor.submit(_next_chunk, messages, AIO_STREAM_CHUNK)
+                    try:
+                        chunk = await asyncio.wrap_future(pending)
+                    except _Abort as e:
+                        await context.abort(e.code, e.details)
+                    if not chunk:
+                        return
+                    for message in chunk:
+                        yield message
+            finally:
+                _close_after(pending, messages)
+
+    async def AddProteinStream(self, request_iterator, context):
+        async with self._limit("AddProteinStream"):
+            loop = asyncio.get_running_loop()
+            batches = [batch async for batch in request_iterator]
+            # Applied whole or not at all (see ProteinAnalyzer.add_stream): the worker
+            # thread finishes even if the call is cancelled meanwhile
+            received = await loop.run_in_executor(self.executor, self.servicer.analyzer.add_stream, batches)
+            if received is None:
+                return stream_cut_short()
+            return stream_ack(*received)
+
+    async def QueryNeighbours(self, request_iterator, context):
+        async with self._limit("QueryNeighbours"):
+            loop = asyncio.get_running_loop()
+            async for query in request_iterator:
+                yield await loop.run_in_executor(self.executor, self.servicer.answer_neighbours, query)
+
+def _unary_handler(name):
+    async def handler(self, request, context):
+        return await self._unary(name, request, context)
+    return handler
+
+def _stream_handler(name):
+    async def handler(self, request, context):
+        async for message in self._stream(name, request, context):
+            yield message
+    return handler
+
+for _method in methods_pb2.DESCRIPTOR.services_by_name['Pass'].methods:
+    if _method.client_streaming:
+        # Written out above: a generic handler would have to read the stream from a
+        # worker thread, holding it while the client sends nothing
+        if _method.name not in AsyncPassServicer.__dict__:
+            raise NotImplementedError(f"AsyncPassServicer has no handler for {_method.name}.")
+        continue
+    _handler = _stream_handler if _method.server_streaming else _unary_handler
+    setattr(AsyncPassServicer, _method.name, _handler(_method.name))
+
+async def serve(port=50051):
+    server = grpc.aio.server()
+    methods_pb2_grpc.add_PassServicer_to_server(AsyncPassServicer(), server)
+    server.add_insecure_port(f'[::]:{port}')
+    await server.start()
+    print(f"gRPC Server (asyncio) started on port {port}...")
+    await server.wait_for_termination()
+
+if __name__ == '__main__':
+    asyncio.run(serve())
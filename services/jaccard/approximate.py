@@ -0,0 +1,34 @@
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+import sys
+
+def run():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    num_perm = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    print(f"--- Approximate Matches (Jaccard >= {threshold}) ---")
+    with grpc.insecure_channel('localhost:50051') as channel:
+        stub = methods_pb2_grpc.PassStub(channel)
+        request = methods_pb2.ApproximateRequest(threshold=threshold, num_perm=num_perm)
+
+        try:
+            count = 0
+            total_correlations = 0
+            for match in stub.CalculateApproximateMatches(request):
+                count += 1
+                total_correlations += len(match.correlations)
+            print(f"{count} proteins, {total_correlations} correlations above threshold")
+
+            print("Comparing against the exact engine...")
+            report = stub.EvaluateApproximateMatches(request)
+            print(f"  LSH: {report.bands} bands x {report.rows} rows ({report.num_perm} permutations)")
+            print(f"  Candidates: {report.candidate_pairs}, approximate pairs: {report.approximate_pairs}, exact pairs: {report.exact_pairs}")
+            print(f"  Precision: {report.precision:.4f}, recall: {report.recall:.4f}")
+            print(f"  Time: approximate {report.approximate_seconds:.3f}s, exact {report.exact_seconds:.3f}s")
+
+        except grpc.RpcError as e:
+            print(f"RPC Error: {e.details()}")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,263 @@
+import numpy as np
+from scipy import sparse
+from versions import CowDict
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        return np.bitwise_count(words)
+else:
+    _POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        counts = _POPCOUNT_8[np.ascontiguousarray(words).view(np.uint8)]
+        return counts.reshape(words.shape + (8,)).sum(axis=-1)
+
+# Rows unpacked at once when converting to a CSR matrix
+CSR_BLOCK_ROWS = 1024
+
+class DomainBitsets:
+    """InterPro domain sets of every protein, stored as packed bits.
+
+    A global symbol table interns each InterPro ID to a column. Each distinct domain
+    set (signature) owns one fixed-width row of uint64 words in a single matrix, bit c
+    being set when it carries column c. Proteins with identical signatures share a row,
+    so pairwise work only happens between unique signatures. Rows freed by pop() when
+    their last protein leaves are reused by later signatures.
+
+    Readers run without the writer's lock, while intern() may replace bits and sizes
+    with wider copies: the read methods take each array once, so they never mix two.
+    """
+
+    def __init__(self, capacity=64):
+        self.columns = {}       # InterPro ID -> column
+        self.symbols = []       # column -> InterPro ID
+        self.rows = CowDict()   # protein ID -> row, snapshotted by each published version
+        self._signatures = {}   # sorted column tuple -> row, None until first needed (see signatures)
+        self.members = {}       # row -> set of protein IDs sharing it
+        self.free_rows = []
+        self.next_row = 0
+        self.bits = np.zeros((capacity, 1), dtype=np.uint64)
+        # Popcount of every row, so |A u B| = sizes[a] + sizes[b] - popcount(A & B)
+        self.sizes = np.zeros(capacity, dtype=np.int64)
+
+    @property
+    def signatures(self):
+        """Sorted column tuple -> row of every row in use. Bitsets loaded from a file
+        only build it once a signature is looked up."""
+        if self._signatures is None:
+            self._signatures = {tuple(self._row_columns(row).tolist()): row for row in self.members}
+        return self._signatures
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + self.sizes.nbytes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, p_id):
+        return p_id in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def _grow(self, capacity, words):
+        bits = np.zeros((capacity, words), dtype=np.uint64)
+        bits[:self.bits.shape[0], :self.bits.shape[1]] = self.bits
+        sizes = np.zeros(capacity, dtype=np.int64)
+        sizes[:len(self.sizes)] = self.sizes
+        self.bits, self.sizes = bits, sizes
+
+    def intern(self, domain):
+        col = self.columns.get(domain)
+        if col is None:
+            col = len(self.symbols)
+            self.columns[domain] = col
+            self.symbols.append(domain)
+            if col >= self.bits.shape[1] * 64:
+                self._grow(self.bits.shape[0], self.bits.shape[1] * 2)
+        return col
+
+    def add(self, p_id, domains):
+        """Store the domain set of p_id (p_id must not be present, see pop).
+
+        Returns (row, is_new) where is_new tells whether the signature got a fresh row.
+        """
+        signature = tuple(sorted({self.intern(d) for d in domains}))
+        row = self.signatures.get(signature)
+        if row is not None:
+            self.rows[p_id] = row
+            self.members[row].add(p_id)
+            return row, False
+
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.next_row >= self.bits.shape[0]:
+                self._grow(max(64, self.bits.shape[0] * 2), self.bits.shape[1])
+            row = self.next_row
+            self.next_row += 1
+
+        cols = np.array(signature, dtype=np.int64)
+        self.bits[row] = 0
+        if len(cols):
+            masks = np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64))
+            np.bitwise_or.at(self.bits[row], cols >> 6, masks)
+        self.sizes[row] = len(cols)
+        self.signatures[signature] = row
+        self.members[row] = {p_id}
+        self.rows[p_id] = row
+        return row, True
+
+    def pop(self, p_id):
+        """Remove p_id. Returns (row, retired) where retired tells whether it was the last
+        protein with that signature. A retired row keeps its bits (readers of older
+        versions may still score it) until it is handed back with release()."""
+        signatures = self.signatures  # built from members before they change
+        row = self.rows.pop(p_id)
+        members = self.members[row]
+        members.discard(p_id)
+        if members:
+            return row, False
+        del self.members[row]
+        del signatures[tuple(self._row_columns(row).tolist())]
+        return row, True
+
+    def release(self, rows):
+        """Clear retired rows and make them available for reuse."""
+        rows = list(rows)
+        self.bits[rows] = 0
+        self.sizes[rows] = 0
+        self.free_rows.extend(rows)
+
+    def restore(self, rows):
+        """Make rows (protein ID -> row, a CowDict) the current proteins. Their rows must
+        still hold their bits, i.e. not have been released since."""
+        signatures = self.signatures  # built from members before they change
+        previous = self.members
+        self.rows = rows
+        self.members = {}
+        for p_id, row in rows.items():
+            self.members.setdefault(row, set()).add(p_id)
+        for row in previous.keys() - self.members.keys():
+            del signatures[tuple(self._row_columns(row).tolist())]
+        for row in self.members.keys() - previous.keys():
+            signatures[tuple(self._row_columns(row).tolist())] = row
+
+    def unique_rows(self):
+        """Rows in use, one per distinct signature."""
+        return np.fromiter(self.members.keys(), dtype=np.int64, count=len(self.members))
+
+    def _row_columns(self, row):
+        words = self.bits[row]
+        nz = np.nonzero(words)[0]
+        if len(nz) == 0:
+            return np.empty(0, dtype=np.int64)
+        unpacked = np.unpackbits(words[nz].view(np.uint8), bitorder="little").reshape(len(nz), 64)
+        w, b = np.nonzero(unpacked)
+        return nz[w].astype(np.int64) * 64 + b
+
+    def columns_of(self, p_id):
+        return self._row_columns(self.rows[p_id])
+
+    def row_columns(self, row):
+        return self._row_columns(row)
+
+    def get(self, p_id, default=None):
+        """Domain set of p_id as a frozenset of InterPro IDs (decoded from its row)."""
+        if p_id not in self.rows:
+            return default
+        return frozenset(self.symbols[c] for c in self.columns_of(p_id).tolist())
+
+    def items(self):
+        for p_id in self.rows:
+            yield p_id, self.get(p_id)
+
+    def compacted(self, rows):
+        """Copy holding only the proteins in rows (protein ID -> row), renumbered densely
+        in row order. Returns (copy, old_rows) where old_rows[new_row] is the previous row."""
+        old_rows = np.array(sorted(set(rows.values())), dtype=np.int64)
+        rank = {old: new for new, old in enumerate(old_rows.tolist())}
+
+        out = DomainBitsets(capacity=max(64, len(old_rows)))
+        out.columns = dict(self.columns)
+        out.symbols = list(self.symbols)
+        out.rows = CowDict((p_id, rank[row]) for p_id, row in rows.items())
+        for p_id, row in out.rows.items():
+            out.members.setdefault(row, set()).add(p_id)
+        out.next_row = len(old_rows)
+        out.bits = np.zeros((out.bits.shape[0], self.bits.shape[1]), dtype=np.uint64)
+        out.bits[:len(old_rows)] = self.bits[old_rows]
+        out.sizes[:len(old_rows)] = self.sizes[old_rows]
+        out._signatures = None
+        return out, old_rows
+
+    @classmethod
+    def loaded(cls, symbols, bits, sizes, rows, free_rows=()):
+        """Bitsets over symbols using the word matrix bits and row popcounts sizes as
+        they are, e.g. views on a memory-mapped state file (see statestore.py). rows maps
+        protein ID -> row; rows of bits no protein uses must be in free_rows."""
+        out = cls(capacity=1)
+        out.symbols = list(symbols)
+        out.columns = {symbol: col for col, symbol in enumerate(out.symbols)}
+        out.bits, out.sizes = bits, sizes
+        out.next_row = len(bits)
+        out.free_rows = list(free_rows)
+        out.rows = rows
+        for p_id, row in rows.items():
+            out.members.setdefault(row, set()).add(p_id)
+        out._signatures = None
+        return out
+
+    def row_indices(self, ids):
+        return np.fromiter((self.rows[p_id] for p_id in ids), dtype=np.int64, count=len(ids))
+
+    def jaccard_rows(self, r1, r2):
+        bits, sizes = self.bits, self.sizes
+        inter = int(popcount(bits[r1] & bits[r2]).sum())
+        if inter == 0:
+            return 0.0
+        return inter / int(sizes[r1] + sizes[r2] - inter)
+
+    def score_row(self, row, others):
+        """Jaccard of row against every row in others (an index array)."""
+        bits, sizes = self.bits, self.sizes
+        inter = popcount(bits[row] & bits[others]).sum(axis=1).astype(np.int64)
+        union = sizes[row] + sizes[others] - inter
+        return np.divide(inter, union, out=np.zeros(len(others), dtype=np.float64), where=inter > 0)
+
+    def score_columns(self, cols, size, others):
+        """Jaccard of a domain set that has no row against every row in others. cols are
+        its interned columns and size counts all its domains, interned or not."""
+        bits, sizes = self.bits, self.sizes
+        query = np.zeros(bits.shape[1], dtype=np.uint64)
+        cols = np.asarray(cols, dtype=np.int64)
+        np.bitwise_or.at(query, cols >> 6, np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64)))
+        inter = popcount(query & bits[others]).sum(axis=1).astype(np.int64)
+        union = size + sizes[others] - inter
+        return np.divide(inter, union, out=np.zeros(len(others), dtype=np.float64), where=inter > 0)
+
+    def to_csr(self, rows, block_rows=CSR_BLOCK_ROWS):
+        """Protein x domain CSR matrix (int32 ones) for the given rows, in that order."""
+        bits = self.bits
+        indptr = [np.zeros(1, dtype=np.int64)]
+        indices = []
+        nnz = 0
+        for start in range(0, len(rows), block_rows):
+            block = bits[rows[start:start + block_rows]]
+            # Only non-zero words are unpacked: rows carry few of the symbols
+            r, w = np.nonzero(block)
+            unpacked = np.unpackbits(block[r, w].view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+            k, b = np.nonzero(unpacked)
+            r, c = r[k], w[k] * 64 + b
+            indices.append(c.astype(np.int32))
+            counts = np.bincount(r, minlength=len(block))
+            indptr.append(nnz + np.cumsum(counts))
+            nnz += len(c)
+
+        indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int32)
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csr_matrix(
+            (data, indices, np.concatenate(indptr)),
+            shape=(len(rows), bits.shape[1] * 64)
+        )
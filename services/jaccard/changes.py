@@ -0,0 +1,51 @@
+import uuid
+
+class ChangeLog:
+    """Protein changes numbered by a monotonically increasing sequence.
+
+    Event n records a protein ID and the Protein it had before (None if it was added).
+    The pairs that changed since a sequence are derived from these on request (see
+    ProteinAnalyzer.pair_changes), so recording costs O(1) per protein. Only the
+    newest max_events are kept. The epoch identifies this log: sequences of another
+    epoch mean nothing here. A server recovering from a WAL checkpoint resumes the
+    checkpoint's epoch and sequence, so cursors survive the restart.
+    """
+
+    def __init__(self, max_events):
+        self.max_events = max_events
+        self.epoch = uuid.uuid4().hex
+        # (sequence of events[0], events), replaced in one assignment when trimmed so
+        # readers outside the lock see a consistent pair
+        self._window = (1, [])
+
+    @property
+    def sequence(self):
+        """Sequence of the newest event, 0 before the first."""
+        first, events = self._window
+        return first + len(events) - 1
+
+    def resume(self, epoch, sequence):
+        """Continue the log epoch from sequence, as a checkpoint recorded them. Events up
+        to sequence are not kept: cursors older than it get a full resync."""
+        self.epoch = epoch
+        self._window = (sequence + 1, [])
+
+    def record(self, p_id, previous):
+        first, events = self._window
+        events.append((p_id, previous))
+        # Trim in steps of a quarter, so appends stay amortized O(1)
+        if len(events) > self.max_events + self.max_events // 4:
+            drop = len(events) - self.max_events
+            self._window = (first + drop, events[drop:])
+
+    def since(self, sequence, until):
+        """Protein ID -> its Protein as of sequence (None if absent then), for every
+        protein changed after sequence up to until. None if those events are no longer
+        kept."""
+        first, events = self._window
+        if sequence < first - 1 or sequence > until:
+            return None
+        prior = {}
+        for p_id, previous in events[sequence + 1 - first:until + 1 - first]:
+            prior.setdefault(p_id, previous)
+        return prior
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+import send
+from compact import read_block
+from payload import protein_batches
+
+# Jaccard server the listener talks to, and the channels it keeps open to it. Calls
+# are spread over the channels round-robin; each channel multiplexes many calls.
+SERVER_TARGET = os.getenv("JACCARD_SERVER_TARGET", "localhost:50051")
+CLIENT_CHANNELS = int(os.getenv("JACCARD_CLIENT_CHANNELS", 4))
+
+def blocking_iter(stream, loop):
+    """The messages of a grpc.aio response stream running on loop, for a blocking
+    consumer in another thread."""
+    messages = stream.__aiter__()
+
+    async def next_message():
+        return await messages.__anext__()
+
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(next_message(), loop).result()
+        except StopAsyncIteration:
+            return
+
+class JaccardClient:
+    """Long-lived, pooled grpc.aio client of the Jaccard server for the listener.
+
+    Channels are opened on first use, on the running event loop, and reused by every
+    request until close(). Payloads are serialized straight to protobuf and streamed
+    in chunks, so their size is not bounded by a single message.
+    """
+
+    def __init__(self, target=SERVER_TARGET, channels=CLIENT_CHANNELS):
+        self.target = target
+        self.size = max(1, channels)
+        self._channels = []
+        self._stubs = []
+        self._next = 0
+        # send.py's cursor file is read and written by one forward at a time
+        self._forward_lock = None
+
+    def _stub(self):
+        if not self._stubs:
+            self._channels = [grpc.aio.insecure_channel(self.target) for _ in range(self.size)]
+            self._stubs = [methods_pb2_grpc.PassStub(channel) for channel in self._channels]
+        self._next = (self._next + 1) % len(self._stubs)
+        return self._stubs[self._next]
+
+    async def close(self):
+        channels, self._channels, self._stubs = self._channels, [], []
+        for channel in channels:
+            await channel.close()
+
+    async def add_proteins(self, payload, timeout=None):
+        """Inject a list of {Entry, InterPro, Sequence} dicts; returns the Ack."""
+        return await self._stub().AddProteinStream(protein_batches(payload), timeout=timeout)
+
+    async def compute(self, timeout=None):
+        """Have the server store the scores of the signatures added since the last
+        computation; returns the Ack."""
+        return await self._stub().ComputePending(methods_pb2.Empty(), timeout=timeout)
+
+    async def top_matches(self, k, timeout=None):
+        """(entry, correlations, total_matches) of every protein, best k correlations
+        first, as print.py reads them."""
+        request = methods_pb2.CompactMatchesRequest(k=k, quantize=True)
+        entries, proteins = [], []
+        async for block in self._stub().CalculateCompactMatches(request, timeout=timeout):
+            for entry, _, correlations, total in read_block(block, entries, proteins):
+                yield entry, correlations, total
+
+    def match_batches(self, k, min_jaccard=0.0, after="", offset=0, limit=0, timeout=None):
+        """CalculateTopMatchBatches call for one page of proteins in ID order: read it
+        for MatchResultBatches as they arrive, without sequences."""
+        request = methods_pb2.TopMatchesRequest(
+            k=k, min_jaccard=min_jaccard, after=after, offset=offset, limit=limit, omit_sequence=True
+        )
+        return self._stub().CalculateTopMatchBatches(request, timeout=timeout)
+
+    async def forward(self, timeout=None):
+        """send.py in process: post the correlations changed since the last forward to
+        the Neo4j API. Returns whether they were delivered (True if there were none)."""
+        if self._forward_lock is None:
+            self._forward_lock = asyncio.Lock()
+        async with self._forward_lock:
+            stub = self._stub()
+            epoch, since = send.load_cursor()
+            cursor, batches, full = (epoch, since), [], False
+            call = stub.StreamChanges(methods_pb2.ChangesRequest(since=since, epoch=epoch), timeout=timeout)
+            async for batch in call:
+                cursor = (batch.epoch, batch.sequence)
+                if batch.full:
+                    call.cancel()
+                    full = True
+                    break
+                batches.append(batch)
+            # Converting and posting are blocking: keep them off the event loop
+            if full:
+                # Block by block as the export arrives, so the listener never holds it whole
+                call = stub.CalculateCompactMatches(methods_pb2.CompactMatchesRequest(), timeout=timeout)
+                blocks = blocking_iter(call, asyncio.get_running_loop())
+                if not await asyncio.to_thread(send.post_all, blocks):
+                    call.cancel()
+                    return False
+                send.save_cursor(*cursor)
+                return True
+
+            payload = await asyncio.to_thread(send.changes_payload, batches)
+            if not payload:
+                send.save_cursor(*cursor)
+                return True
+            response = await asyncio.to_thread(send.post, payload)
+            if send.delivered(response):
+                send.save_cursor(*cursor)
+                return True
+            return False
@@ -0,0 +1,56 @@
+import numpy as np
+import methods_pb2
+
+# Version of the CalculateCompactMatches layout; bumped on incompatible changes
+COMPACT_FORMAT_VERSION = 1
+# Quantized scores are round(jaccard * QUANTIZE_SCALE), i.e. uint16 steps
+QUANTIZE_SCALE = 65535
+
+def quantize(scores):
+    return np.rint(np.asarray(scores, dtype=np.float64) * QUANTIZE_SCALE).astype(np.uint32).tolist()
+
+def row_scores(row):
+    """Scores of a CompactMatchRow as floats, whichever encoding it uses."""
+    if row.quantized_scores:
+        return [q / QUANTIZE_SCALE for q in row.quantized_scores]
+    return list(row.scores)
+
+def stripped_protein(protein, include_sequence):
+    if include_sequence or not protein.sequence:
+        return protein
+    out = methods_pb2.Protein()
+    out.CopyFrom(protein)
+    out.ClearField("sequence")
+    return out
+
+def read_block(block, entries, proteins, dense=False):
+    """Rows of one block of a CalculateCompactMatches stream, as read_matches yields
+    them. entries and proteins collect the dictionary across the blocks of a stream."""
+    if block.format_version != COMPACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact format version {block.format_version}.")
+    entries.extend(block.entries)
+    proteins.extend(block.proteins)
+    for row in block.rows:
+        scores = row_scores(row)
+        if dense:
+            dense_scores = [0.0] * len(entries)
+            for i, score in zip(row.indices, scores):
+                dense_scores[i] = score
+            correlations = list(zip(entries, dense_scores))
+            del correlations[row.query]
+        else:
+            correlations = [(entries[i], score) for i, score in zip(row.indices, scores)]
+        protein = proteins[row.query] if proteins else None
+        yield entries[row.query], protein, correlations, row.total_matches
+
+def read_matches(blocks, dense=False):
+    """Decode a CalculateCompactMatches stream.
+
+    Yields (entry, protein, correlations, total_matches) per query, protein being None
+    unless the request asked for proteins. correlations are (entry, jaccard) pairs,
+    best first; with dense=True they instead cover every other protein in dictionary
+    order with 0.0 where no score was sent, like CalculateBestMatches.
+    """
+    entries, proteins = [], []
+    for block in blocks:
+        yield from read_block(block, entries, proteins, dense)
@@ -1,22 +1,23 @@
 import grpc
 import methods_pb2
 import methods_pb2_grpc
+from compact import read_matches
 import sys
 import json
 
 OUTPUT_JSON_FILE = "jaccard_results.json"
 
-def proto_to_json_dict(match):
-    """Convert match result to JSON format with JaccardCorrelations as list."""
+def to_json_dict(entry, correlations):
+    """Convert one decoded row to JSON format with JaccardCorrelations as list."""
     correlations_list = []
-    for c in match.correlations:
+    for other, jaccard in correlations:
         correlations_list.append({
-            "Entry": c.entry,
-            "Jaccard": c.jaccard
+            "Entry": other,
+            "Jaccard": jaccard
         })
 
     return {
-        "Entry": match.query_protein.entry,
+        "Entry": entry,
         "JaccardCorrelations": correlations_list
     }
 
@@ -29,8 +30,10 @@ def run():
         print("Requesting list...")
         all_matches_json = []
         try:
-            for match in stub.CalculateBestMatches(methods_pb2.Empty()):
-                all_matches_json.append(proto_to_json_dict(match))
+            # Compact stream, expanded to every pair (zeros included) as CalculateBestMatches sends it
+            blocks = stub.CalculateCompactMatches(methods_pb2.CompactMatchesRequest())
+            for entry, _, correlations, _ in read_matches(blocks, dense=True):
+                all_matches_json.append(to_json_dict(entry, correlations))
                 
             if all_matches_json:
                 with open(file_name + OUTPUT_JSON_FILE, 'w') as f:
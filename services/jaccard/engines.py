@@ -0,0 +1,339 @@
+import multiprocessing
+from concurrent import futures
+from multiprocessing import shared_memory
+import numpy as np
+from bitsets import popcount
+
+# Rows of the protein x domain matrix multiplied per step in the sparse backend.
+# Bounds the size of each intermediate product.
+SPARSE_BLOCK_ROWS = 1024
+
+# Side length of the square tiles the upper triangle is split into for the process backend.
+PROCESS_TILE_SIZE = 512
+# Upper bound on uint64 words materialised at once while scoring a tile.
+TILE_WORD_BUDGET = 1 << 22
+
+def sparse_pair_scores(slots, domain_sets, block_rows=SPARSE_BLOCK_ROWS):
+    """Jaccard for every pair of slots sharing a domain, one sparse product per row block.
+
+    Intersections come from X @ X.T and unions from the row sums
+    (|A u B| = |A| + |B| - |A n B|). Pairs with an empty intersection never appear
+    in the product, so zero scores are implicit. slots are rows of domain_sets (a
+    bitsets.DomainBitsets); yields (first_slots, second_slots, scores) arrays per block.
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    n = len(slots)
+    if n < 2:
+        return
+
+    matrix = domain_sets.to_csr(slots)
+    matrix_t = matrix.T.tocsc()
+    sizes = domain_sets.sizes[slots]
+
+    for start in range(0, n - 1, block_rows):
+        stop = min(start + block_rows, n - 1)
+        inter = (matrix[start:stop] @ matrix_t).tocoo()
+        rows = inter.row.astype(np.int64) + start
+        cols = inter.col.astype(np.int64)
+
+        # Upper triangle only
+        upper = cols > rows
+        rows, cols = rows[upper], cols[upper]
+        row_inter = inter.data[upper].astype(np.int64)
+        scores = row_inter / (sizes[rows] + sizes[cols] - row_inter)
+        yield slots[rows], slots[cols], scores
+
+def plan_tiles(n, tile_size=PROCESS_TILE_SIZE):
+    """Split the upper triangle of an n x n matrix into (r0, r1, c0, c1) tiles.
+
+    Off-diagonal tiles are full squares and diagonal tiles are half squares, so
+    tiles are ordered largest first and handed out dynamically to stay balanced.
+    """
+    starts = range(0, n, tile_size)
+    tiles = [
+        (r0, min(r0 + tile_size, n), c0, min(c0 + tile_size, n))
+        for r0 in starts for c0 in starts if c0 >= r0
+    ]
+    tiles.sort(key=lambda t: -((t[1] - t[0]) * (t[3] - t[2]) // (2 if t[0] == t[2] else 1)))
+    return tiles
+
+# Per-worker view of the shared bitset matrix, attached once by _attach_bitsets
+_worker_bits = None
+_worker_sizes = None
+_worker_shm = None
+
+def _attach_bitsets(shm_name, shape):
+    global _worker_bits, _worker_sizes, _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_bits = np.ndarray(shape, dtype=np.uint64, buffer=_worker_shm.buf)
+    _worker_sizes = popcount(_worker_bits).sum(axis=1).astype(np.int64)
+
+def score_block(row_bits, row_sizes, col_bits, col_sizes, offset=0, word_budget=TILE_WORD_BUDGET):
+    """Non-zero Jaccard of every row against every column of two bitset blocks.
+
+    Returns (i, j, scores) with i, j local to the blocks, keeping only pairs with
+    j + offset > i (offset is the column block start minus the row block start, so
+    diagonal blocks yield their upper triangle). Rows are ANDed against the whole
+    column block at once, at most word_budget uint64 words at a time.
+    """
+    step = max(1, word_budget // max(1, len(col_bits) * col_bits.shape[1]))
+    rows, cols, scores = [], [], []
+    for start in range(0, len(row_bits), step):
+        stop = min(start + step, len(row_bits))
+        inter = popcount(row_bits[start:stop, None, :] & col_bits[None, :, :]).sum(axis=2)
+        i, j = np.nonzero(inter)
+        row_inter = inter[i, j].astype(np.int64)
+        i += start
+        upper = j + offset > i
+        i, j, row_inter = i[upper], j[upper], row_inter[upper]
+        rows.append(i)
+        cols.append(j)
+        scores.append(row_inter / (row_sizes[i] + col_sizes[j] - row_inter))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores)
+
+def _score_tile(tile):
+    """Non-zero Jaccard scores for one tile, as (rows, cols, scores) arrays (worker side)."""
+    r0, r1, c0, c1 = tile
+    bits, sizes = _worker_bits, _worker_sizes
+    rows, cols, scores = score_block(bits[r0:r1], sizes[r0:r1], bits[c0:c1], sizes[c0:c1], c0 - r0)
+    return rows + r0, cols + c0, scores
+
+def process_pair_scores(slots, domain_sets, workers, tile_size=PROCESS_TILE_SIZE):
+    """Jaccard for every pair of slots sharing a domain, computed by a process pool.
+
+    The bitset rows of slots (rows of a bitsets.DomainBitsets) are copied once into a
+    shared-memory buffer so workers read them without pickling, and each worker
+    scores whole tiles of the upper triangle. Yields (first_slots, second_slots, scores)
+    arrays per tile.
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    n = len(slots)
+    if n < 2:
+        return
+
+    bits = domain_sets.bits[slots]
+    shm = shared_memory.SharedMemory(create=True, size=bits.nbytes)
+    try:
+        np.ndarray(bits.shape, dtype=np.uint64, buffer=shm.buf)[:] = bits
+        # spawn, not fork: the gRPC server is multithreaded
+        with futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_bitsets,
+            initargs=(shm.name, bits.shape)
+        ) as executor:
+            for rows, cols, scores in executor.map(_score_tile, plan_tiles(n, tile_size)):
+                yield slots[rows], slots[cols], scores
+    finally:
+        shm.close()
+        shm.unlink()
+
+def stream_tile_size(memory_budget, words):
+    """Tile side and AND word budget keeping one streamed tile within memory_budget bytes.
+
+    A tile holds two gathered bitset blocks, the ANDed words of a row step and up to
+    side^2 (i, j, score) results of 24 bytes each; half the budget goes to the results.
+    """
+    side = max(1, int(np.sqrt(memory_budget / 48)))
+    side = min(side, max(1, memory_budget // (8 * 8 * max(1, words))))
+    word_budget = max(1, memory_budget // 32)
+    return side, word_budget
+
+def stream_pair_scores(slots, domain_sets, memory_budget):
+    """Jaccard for every pair of positions in slots, computed tile by tile in row-major
+    order over the upper triangle and yielded as soon as each tile is scored.
+
+    slots may repeat rows (one entry per protein). Only one tile is materialised at a
+    time, so memory is bounded by memory_budget (see stream_tile_size), not by len(slots).
+    Yields (first, second, scores) arrays of positions into slots (first < second),
+    grouped by ascending first within a tile.
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    n = len(slots)
+    # Taken once: a writer may widen the arrays while the tiles are streamed
+    bits, sizes = domain_sets.bits, domain_sets.sizes
+    side, word_budget = stream_tile_size(memory_budget, bits.shape[1])
+    for r0 in range(0, n - 1, side):
+        r1 = min(r0 + side, n)
+        row_bits = bits[slots[r0:r1]]
+        row_sizes = sizes[slots[r0:r1]]
+        for c0 in range(r0, n, side):
+            c1 = min(c0 + side, n)
+            i, j, scores = score_block(
+                row_bits, row_sizes,
+                bits[slots[c0:c1]], sizes[slots[c0:c1]],
+                c0 - r0, word_budget
+            )
+            if len(scores):
+                yield i + r0, j + c0, scores
+
+def meets_threshold(scores, threshold):
+    """scores >= threshold compared at float32, the precision thresholds arrive with over gRPC."""
+    return np.asarray(scores).astype(np.float32) >= np.float32(threshold)
+
+# MinHash / LSH approximate mode
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 1
+DEFAULT_NUM_PERM = 128
+# Proteins whose signatures are computed per step
+MINHASH_BLOCK_ROWS = 4096
+# Candidates are verified exactly, so a missed pair costs more than an extra candidate
+LSH_FALSE_NEGATIVE_WEIGHT = 0.9
+
+def lsh_params(threshold, num_perm):
+    """Pick (bands, rows) minimising the weighted false positive + false negative area around threshold.
+
+    A pair with Jaccard s becomes a candidate with probability 1 - (1 - s^rows)^bands.
+    """
+    xs = np.linspace(0.0, 1.0, 201)
+    below, above = xs <= threshold, xs >= threshold
+    best, best_err = (1, num_perm), None
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        prob = 1.0 - (1.0 - xs ** rows) ** bands
+        false_pos = prob[below].sum() * threshold / max(1, below.sum())
+        false_neg = (1.0 - prob[above]).sum() * (1.0 - threshold) / max(1, above.sum())
+        err = (1.0 - LSH_FALSE_NEGATIVE_WEIGHT) * false_pos + LSH_FALSE_NEGATIVE_WEIGHT * false_neg
+        if best_err is None or err < best_err:
+            best, best_err = (bands, rows), err
+    return best
+
+def minhash_signatures(slots, domain_sets, num_perm=DEFAULT_NUM_PERM, seed=MINHASH_SEED):
+    """MinHash signature (num_perm uint64 values) of every bitset row in slots.
+
+    Each permutation is h(x) = (a * x + b) mod p over the interned domain columns,
+    hashed once per column. Proteins without domains get an all-max signature and
+    never collide with anything. Returns a (len(slots), num_perm) array.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    cols = np.arange(max(1, len(domain_sets.symbols)), dtype=np.uint64)
+    col_hashes = (cols[:, None] * a[None, :] + b[None, :]) % np.uint64(MINHASH_PRIME)
+
+    empty = np.iinfo(np.uint64).max
+    signatures = np.full((len(slots), num_perm), empty, dtype=np.uint64)
+    for start in range(0, len(slots), MINHASH_BLOCK_ROWS):
+        matrix = domain_sets.to_csr(slots[start:start + MINHASH_BLOCK_ROWS])
+        lengths = np.diff(matrix.indptr)
+        filled = np.nonzero(lengths)[0]
+        if len(filled) == 0:
+            continue
+        hashed = col_hashes[matrix.indices]
+        signatures[start + filled] = np.minimum.reduceat(hashed, matrix.indptr[filled], axis=0)
+    return signatures
+
+def lsh_candidate_pairs(signatures, bands, rows):
+    """Index pairs (i < j) whose signatures agree on every row of at least one band."""
+    candidates = set()
+    empty = np.iinfo(np.uint64).max
+    filled = np.nonzero(signatures[:, 0] != empty)[0]
+    for band in range(bands):
+        chunk = signatures[filled, band * rows:(band + 1) * rows]
+        _, buckets = np.unique(chunk, axis=0, return_inverse=True)
+        buckets = buckets.ravel()
+        order = np.argsort(buckets, kind="stable")
+        bounds = np.nonzero(np.diff(buckets[order]))[0] + 1
+        for members in np.split(filled[order], bounds):
+            if len(members) < 2:
+                continue
+            members = members.tolist()
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    candidates.add((i, j) if i < j else (j, i))
+    return candidates
+
+def approximate_pair_scores(slots, domain_sets, threshold, num_perm=DEFAULT_NUM_PERM, bands=0):
+    """Pairs of slots with Jaccard >= threshold found by MinHash + banded LSH.
+
+    Candidates are verified exactly against the bitsets, so every returned score is
+    exact (precision is 1), but pairs missed by LSH are absent. Returns
+    (pairs, stats) where pairs maps (slot, slot) keys to scores.
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    if bands:
+        rows = max(1, num_perm // bands)
+    else:
+        bands, rows = lsh_params(threshold, num_perm)
+
+    signatures = minhash_signatures(slots, domain_sets, num_perm)
+    candidates = lsh_candidate_pairs(signatures, bands, rows)
+
+    by_row = {}
+    for i, j in candidates:
+        by_row.setdefault(i, []).append(j)
+
+    pairs = {}
+    for i, others in by_row.items():
+        other_slots = slots[others]
+        scores = domain_sets.score_row(slots[i], other_slots)
+        keep = (scores > 0.0) & meets_threshold(scores, threshold)
+        for other, score, kept in zip(other_slots.tolist(), scores.tolist(), keep.tolist()):
+            if kept:
+                pairs[(int(slots[i]), other)] = score
+
+    stats = {"bands": bands, "rows": rows, "candidate_pairs": len(candidates)}
+    return pairs, stats
+
+# Prefix filtering is done against a threshold lowered by this much, so that rounding in
+# ceil(t * |x|) never prunes a pair that meets_threshold (float32) would keep.
+PPJOIN_THRESHOLD_SLACK = 1e-6
+
+def ppjoin_pair_scores(slots, domain_sets, threshold):
+    """Exact pairs of slots with Jaccard >= threshold by prefix-filtering similarity join (PPJoin).
+
+    Domains are ordered by global frequency (rarest first) and rows are probed in order of
+    increasing size. Two sets x, y with J(x, y) >= t must share a domain within the first
+    |x| - ceil(t|x|) + 1 domains of x, so only those prefixes are probed and only the shorter
+    mid-prefixes are indexed. Candidates are pruned by length (|y| >= t|x|) and position
+    (the overlap still reachable after the current prefix positions), then verified
+    against the bitsets. Yields (first_slots, second_slots, scores) arrays per probed row.
+    """
+    if not 0.0 < threshold <= 1.0:
+        raise ValueError(f"Threshold join needs 0 < threshold <= 1, got {threshold}.")
+    slots = np.asarray(slots, dtype=np.int64)
+    t = max(threshold - PPJOIN_THRESHOLD_SLACK, PPJOIN_THRESHOLD_SLACK)
+
+    columns = [domain_sets.row_columns(row) for row in slots.tolist()]
+    frequency = np.bincount(np.concatenate(columns), minlength=len(domain_sets.symbols)) if columns else np.zeros(0)
+    # Rank of each column: rarest first, ties broken by column
+    order = np.argsort(frequency, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    records = [np.sort(rank[cols]).tolist() for cols in columns]
+
+    index = {}  # token -> [(record, position)]
+    for x in sorted(range(len(records)), key=lambda r: len(records[r])):
+        tokens = records[x]
+        size = len(tokens)
+        if size == 0:
+            continue
+        overlap = {}
+        for i, token in enumerate(tokens[:size - int(np.ceil(t * size)) + 1]):
+            for y, j in index.get(token, ()):
+                y_size = len(records[y])
+                # Length filter (records are probed by size, so y is never larger than x)
+                if y_size < t * size:
+                    continue
+                current = overlap.get(y, 0)
+                if current is None:
+                    continue
+                needed = int(np.ceil(t / (1.0 + t) * (size + y_size)))
+                # Positional filter: overlap still reachable from positions i and j on
+                if current + 1 + min(size - i - 1, y_size - j - 1) >= needed:
+                    overlap[y] = current + 1
+                else:
+                    overlap[y] = None
+        for i, token in enumerate(tokens[:size - int(np.ceil(2.0 * t / (1.0 + t) * size)) + 1]):
+            index.setdefault(token, []).append((x, i))
+
+        candidates = [y for y, count in overlap.items() if count]
+        if not candidates:
+            continue
+        other_slots = slots[candidates]
+        scores = domain_sets.score_row(slots[x], other_slots)
+        keep = (scores > 0.0) & meets_threshold(scores, threshold)
+        if keep.any():
+            yield np.full(int(keep.sum()), slots[x], dtype=np.int64), other_slots[keep], scores[keep]
@@ -2,8 +2,14 @@ import grpc
 import methods_pb2
 import methods_pb2_grpc
 import json
+import re
 
 FILENAME = "test1.json"
+# Proteins per streamed ProteinBatch, well below gRPC's 4 MB message limit
+CHUNK_SIZE = 1000
+# Characters of the file read at a time
+READ_BLOCK = 1 << 20
+_SEPARATORS = re.compile(r"[\s,]*")
 
 def json_entry_to_proto(data):
     return methods_pb2.Protein(
@@ -17,25 +23,53 @@ def json_entry_to_proto(data):
         sequence=data.get('Sequence', '')
     )
 
+def iter_json_array(f):
+    """Yield the elements of the JSON array in f one by one, reading it in blocks."""
+    decoder = json.JSONDecoder()
+    buf = f.read(READ_BLOCK).lstrip()
+    if not buf.startswith("["):
+        raise ValueError(f"{f.name} does not hold a JSON array.")
+    pos = 1
+    while True:
+        pos = _SEPARATORS.match(buf, pos).end()
+        if buf.startswith("]", pos):
+            return
+        try:
+            item, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            more = f.read(READ_BLOCK)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield item
+
+def protein_batches(f):
+    chunk = []
+    for d in iter_json_array(f):
+        chunk.append(json_entry_to_proto(d))
+        if len(chunk) == CHUNK_SIZE:
+            yield methods_pb2.ProteinBatch(proteins=chunk)
+            chunk = []
+    # Marks the end, so the server knows the stream was not cut short
+    yield methods_pb2.ProteinBatch(proteins=chunk, last=True)
+
 def run():
     print(f"--- File Import ({FILENAME}) ---")
     with grpc.insecure_channel('localhost:50051') as channel:
         stub = methods_pb2_grpc.PassStub(channel)
 
         try:
+            # Streamed in chunks as the file is read, so memory does not grow with its size
+            print(f"Uploading proteins in chunks of {CHUNK_SIZE}...")
             with open(FILENAME, 'r') as f:
-                data = json.load(f)
-            
-            proto_list = [json_entry_to_proto(d) for d in data]
-            batch = methods_pb2.ProteinBatch(proteins=proto_list)
-
-            print(f"Uploading {len(proto_list)} proteins...")
-            ack = stub.AddProteinBatch(batch)
+                ack = stub.AddProteinStream(protein_batches(f))
             print(f"Response: {ack.message}")
 
+            # Counts only: the full match stream is quadratic in the number of proteins
             print("Verifying Output...")
-            for match in stub.CalculateBestMatches(methods_pb2.Empty()):
-                print(f"  {match.query_protein.entry}: {len(match.correlations)} correlations found.")
+            stats = stub.GetStats(methods_pb2.Empty())
+            print(f"  {stats.proteins} proteins stored, {stats.unique_signatures} unique signatures.")
 
         except Exception as e:
             print(f"Error: {e}")
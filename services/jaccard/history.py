@@ -0,0 +1,17 @@
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+
+def run():
+    print("--- Rollback History ---")
+    with grpc.insecure_channel('localhost:50051') as channel:
+        stub = methods_pb2_grpc.PassStub(channel)
+        try:
+            stats = stub.GetHistoryStats(methods_pb2.Empty())
+            print(f"Operations: {stats.depth} of {stats.max_depth}, {stats.checkpoints} with a checkpoint")
+            print(f"Recorded data: {stats.bytes / 1e6:.1f} MB of {stats.max_bytes / 1e6:.1f} MB")
+        except grpc.RpcError as e:
+            print(f"RPC Error: {e.details()}")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+import grpc
+
+# A job waits this long for further jobs to ingest together with it
+INJECT_COALESCE_MS = int(os.getenv("JACCARD_INJECT_COALESCE_MS", 50))
+# Proteins after which a coalesced ingest takes no further jobs
+INJECT_MAX_BATCH = int(os.getenv("JACCARD_INJECT_MAX_BATCH", 100000))
+# Finished jobs whose status can still be polled; older ones are forgotten
+INJECT_JOBS_KEPT = int(os.getenv("JACCARD_INJECT_JOBS_KEPT", 10000))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+class InjectQueue:
+    """/inject jobs, ingested and forwarded by one background worker.
+
+    Jobs that arrive while the worker is busy, or within INJECT_COALESCE_MS of each
+    other, are ingested together: one AddProteinStream of all their proteins, one
+    ComputePending, so the server computes the new pairs once for the whole group, then
+    one forward. Must be used from the event loop it was first submitted to.
+
+    The server applies a stream only once it has read all of it, so the jobs of a group
+    that failed were not ingested, or (if the deadline passed while it was applied)
+    all of them were. Ingesting the same proteins again changes nothing, so failed jobs
+    can simply be resubmitted.
+    """
+
+    def __init__(self, client, timeout=None, coalesce_ms=INJECT_COALESCE_MS,
+                 max_batch=INJECT_MAX_BATCH, kept=INJECT_JOBS_KEPT):
+        self.client = client
+        self.timeout = timeout
+        self.window = coalesce_ms / 1000
+        self.max_batch = max_batch
+        self.kept = kept
+        # Job ID -> status, see submit
+        self.jobs = {}
+        self._finished = deque()
+        self._queue = None
+        self._worker = None
+
+    def submit(self, payload):
+        """Queue a list of {Entry, InterPro, Sequence} dicts; returns the job's status."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "proteins_count": len(payload),
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "coalesced": None,
+            "computed": None,
+            "forwarded": None,
+            "message": None,
+            "error": None
+        }
+        self.jobs[job["job_id"]] = job
+        self._queue.put_nowait((job, payload))
+        return job
+
+    def status(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _next_group(self):
+        """The oldest queued job and those that follow it within the window."""
+        loop = asyncio.get_running_loop()
+        group = [await self._queue.get()]
+        proteins = len(group[0][1])
+        deadline = loop.time() + self.window
+        while proteins < self.max_batch:
+            remaining = deadline - loop.time()
+            try:
+                if self._queue.empty() and remaining > 0:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            group.append(item)
+            proteins += len(item[1])
+        return group
+
+    async def _run(self):
+        while True:
+            group = await self._next_group()
+            try:
+                await self._ingest(group)
+            except Exception as e:
+                # Keep the worker alive for the jobs behind this group
+                self._finish([job for job, _ in group], FAILED, error=str(e))
+
+    async def _ingest(self, group):
+        jobs = [job for job, _ in group]
+        payload = [protein for _, part in group for protein in part]
+        started = time.time()
+        for job in jobs:
+            job.update(status=RUNNING, started=started, coalesced=len(jobs))
+        try:
+            ack = await self.client.add_proteins(payload, timeout=self.timeout)
+        except grpc.aio.AioRpcError as e:
+            error = "timed out" if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED else e.details()
+            print(f"Injection of {len(jobs)} jobs failed: {error}")
+            self._finish(jobs, FAILED, error=error)
+            return
+
+        print(f"Ingested {len(jobs)} jobs ({len(payload)} proteins) at once. Computing their pairs...")
+        try:
+            await self.client.compute(timeout=self.timeout)
+            computed = True
+        except grpc.aio.AioRpcError as e:
+            # Pairs not computed yet are scored on read, so this does not fail the injection
+            print(f"Computing the new pairs failed: {e.details()}")
+            computed = False
+
+        print("Now forwarding data via HTTP POST...")
+        try:
+            forwarded = await self.client.forward(timeout=self.timeout)
+        except Exception as e:
+            # A failed forward does not fail the injection
+            print(f"Forwarding failed: {e}")
+            forwarded = False
+        self._finish(jobs, DONE, message=ack.message, computed=computed, forwarded=forwarded)
+
+    def _finish(self, jobs, status, **fields):
+        finished = time.time()
+        for job in jobs:
+            job.update(status=status, finished=finished, **fields)
+            self._finished.append(job["job_id"])
+        while len(self._finished) > self.kept:
+            self.jobs.pop(self._finished.popleft(), None)
@@ -0,0 +1,116 @@
+from collections import deque
+
+class JournalEntry:
+    """Inverse of one mutation: what rolling it back has to put back.
+
+    Only the proteins and entries the mutation touched are recorded, each with its
+    value from before the mutation, so an entry costs as much as the data it changed.
+    A jump (loading a named state) records no inverse and is undone from its
+    checkpoint alone.
+    """
+
+    __slots__ = ("proteins", "entries", "checkpoint", "jump", "held", "nbytes")
+
+    def __init__(self, checkpoint=None, jump=False):
+        self.proteins = {}            # protein ID -> Protein it replaced or deleted, None if it was added
+        self.entries = {}             # entry -> protein ID it mapped to, None if unmapped
+        self.checkpoint = checkpoint  # retained IndexVersion of the state before, or None
+        self.jump = jump
+        self.held = 0                 # bytes of replaced arrays only the checkpoint keeps alive
+        self.nbytes = 0
+
+    def record_protein(self, p_id, previous):
+        if p_id not in self.proteins:
+            self.proteins[p_id] = previous
+            self.nbytes += len(p_id) + (previous.ByteSize() if previous is not None else 0)
+
+    def record_entry(self, entry, previous):
+        if entry not in self.entries:
+            self.entries[entry] = previous
+            self.nbytes += len(entry) + (len(previous) if previous is not None else 0)
+
+class HistoryJournal:
+    """Bounded undo log of JournalEntry, newest last.
+
+    Every checkpoint_interval entries (0 disables them) an entry also carries a
+    checkpoint, which rollback restores directly instead of replaying the inverse.
+    The oldest entries are dropped once there are more than max_depth of them or
+    their recorded data exceeds max_bytes.
+    """
+
+    def __init__(self, max_depth, max_bytes, checkpoint_interval):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.checkpoint_interval = checkpoint_interval
+        self.entries = deque()
+        self.nbytes = 0
+        self._since_checkpoint = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def wants_checkpoint(self):
+        return self.checkpoint_interval > 0 and self._since_checkpoint + 1 >= self.checkpoint_interval
+
+    def append(self, entry):
+        """Add entry; returns the entries dropped to stay within bounds (their
+        checkpoints must be released by the caller)."""
+        self.entries.append(entry)
+        self.nbytes += entry.nbytes
+        self._since_checkpoint = 0 if entry.checkpoint is not None else self._since_checkpoint + 1
+        return self._trim()
+
+    def _trim(self):
+        dropped = []
+        while self.entries and (len(self.entries) > self.max_depth or self.nbytes > self.max_bytes):
+            dropped.append(self.entries.popleft())
+            self.nbytes -= dropped[-1].nbytes
+        return dropped
+
+    def grown(self, nbytes):
+        """Account for the newest entry having recorded nbytes more since it was
+        appended; returns the entries dropped to stay within bounds, like append()."""
+        self.nbytes += nbytes
+        return self._trim()
+
+    def detach(self, domain_sets, pair_scores):
+        """The working arrays were replaced by domain_sets and pair_scores: checkpoints
+        still holding older ones would keep whole arrays alive. Entries with an inverse
+        drop their checkpoint; jumps keep it and count the arrays it holds towards
+        max_bytes. Returns the checkpoints to release, including those of entries
+        dropped to stay within bounds."""
+        released = []
+        for entry in self.entries:
+            version = entry.checkpoint
+            if version is None:
+                continue
+            held = 0
+            if version.domain_sets is not domain_sets:
+                held += version.domain_sets.nbytes
+            if version.pair_scores is not pair_scores:
+                held += version.pair_scores.nbytes
+            if not held:
+                continue
+            if not entry.jump:
+                entry.checkpoint = None
+                released.append(version)
+            elif held > entry.held:
+                entry.nbytes += held - entry.held
+                self.nbytes += held - entry.held
+                entry.held = held
+        released.extend(dropped.checkpoint for dropped in self._trim() if dropped.checkpoint is not None)
+        return released
+
+    def newest(self):
+        return self.entries[-1] if self.entries else None
+
+    def pop(self):
+        if not self.entries:
+            return None
+        entry = self.entries.pop()
+        self.nbytes -= entry.nbytes
+        self._since_checkpoint = max(0, self._since_checkpoint - 1)
+        return entry
+
+    def checkpoints(self):
+        return sum(1 for entry in self.entries if entry.checkpoint is not None)
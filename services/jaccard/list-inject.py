@@ -3,8 +3,12 @@ import methods_pb2
 import methods_pb2_grpc
 import sys
 import json
+from payload import protein_batches
 
 SERVER_URL = "http://localhost:50051"
+# Injected entries whose neighbours are looked up to verify the injection
+VERIFY_SAMPLE = 5
+VERIFY_K = 10
 
 MOCK_HTTP_PAYLOAD = [
     { "Entry": "HTTP_PROT_01", "InterPro": "IPR001;IPR002;IPR003;", "Sequence": "MKV..." },
@@ -12,14 +16,6 @@ MOCK_HTTP_PAYLOAD = [
     { "Entry": "HTTP_PROT_03", "InterPro": "IPR005;IPR006;", "Sequence": "MKV..." }
 ]
 
-def dict_to_proto(d):
-    return methods_pb2.Protein(
-        id=d.get("Entry"),
-        entry=d.get("Entry"),
-        interpro=d.get("InterPro"),
-        sequence=d.get("Sequence")
-    )
-
 def run():
     print("--- List Injection ---")
     with grpc.insecure_channel('localhost:50051') as channel:
@@ -38,16 +34,25 @@ def run():
         stub = methods_pb2_grpc.PassStub(channel)
         
         try:
-            proto_list = [dict_to_proto(d) for d in payload]
-            batch = methods_pb2.ProteinBatch(proteins=proto_list)
-
-            print(f"Sending {len(proto_list)} proteins...")
-            ack = stub.AddProteinBatch(batch)
+            print(f"Sending {len(payload)} proteins...")
+            ack = stub.AddProteinStream(protein_batches(payload))
             print(f"Response: {ack.message}")
 
+            # Counts and a few bounded lookups only: the full match stream is quadratic
+            # in the number of proteins
             print("Verifying...")
-            for match in stub.CalculateBestMatches(methods_pb2.Empty()):
-                print(f"  {match.query_protein.entry}: {len(match.correlations)} correlations found.")
+            stats = stub.GetStats(methods_pb2.Empty())
+            print(f"  {stats.proteins} proteins stored, {stats.unique_signatures} unique signatures.")
+            queries = (
+                methods_pb2.NeighbourQuery(query_id=str(i), entry=d.get("Entry"), k=VERIFY_K)
+                for i, d in enumerate(payload[:VERIFY_SAMPLE])
+            )
+            for result in stub.QueryNeighbours(queries):
+                entry = payload[int(result.query_id)].get("Entry")
+                if result.found:
+                    print(f"  {entry}: {result.total_matches} correlations found.")
+                else:
+                    print(f"  {entry}: {result.error}")
                 
         except Exception as e:
             print(f"Error: {e}")
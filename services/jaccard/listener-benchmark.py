@@ -0,0 +1,99 @@
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from client import JaccardClient
+from jobs import DONE, FAILED, InjectQueue
+
+# Usage: python listener-benchmark.py [requests] [proteins per request] [concurrency]
+# Compares /inject as subprocesses, as direct calls over the pooled client and as
+# queued jobs (the current endpoint).
+# Needs the gRPC server on localhost:50051 (python server.py). Forwards go to a local
+# stand-in for the Neo4j API on port 8080, which must be free.
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+PROTEINS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+CONCURRENCY = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+class _Sink(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"status": "ok"}')
+
+    def log_message(self, *args):
+        pass
+
+def payload(run, i):
+    return [
+        {"Entry": f"BENCH_{run}_{i}_{j}", "InterPro": f"IPR{n % 997:06d};IPR{n * 7 % 1009:06d};", "Sequence": "MKV"}
+        for j, n in enumerate(range(i * PROTEINS, (i + 1) * PROTEINS))
+    ]
+
+def subprocess_inject(data):
+    """What /inject did before: one interpreter for list-inject.py, one for send.py."""
+    subprocess.run([sys.executable, 'list-inject.py', json.dumps(data)], capture_output=True, timeout=30)
+    subprocess.run([sys.executable, 'send.py'], capture_output=True, timeout=30)
+
+def run_subprocess():
+    start = time.time()
+    with futures.ThreadPoolExecutor(CONCURRENCY) as pool:
+        list(pool.map(subprocess_inject, [payload("sub", i) for i in range(REQUESTS)]))
+    return time.time() - start
+
+async def run_pooled():
+    client = JaccardClient()
+    limit = asyncio.Semaphore(CONCURRENCY)
+
+    async def inject(data):
+        async with limit:
+            await client.add_proteins(data, timeout=30)
+            await client.forward(timeout=30)
+
+    start = time.time()
+    await asyncio.gather(*(inject(payload("pool", i)) for i in range(REQUESTS)))
+    elapsed = time.time() - start
+    await client.close()
+    return elapsed
+
+async def run_queued():
+    """/inject now: every request is queued at once, as a bursty producer would, and
+    the worker ingests and forwards the queued jobs in groups."""
+    client = JaccardClient()
+    queue = InjectQueue(client, timeout=30)
+    start = time.time()
+    jobs = [queue.submit(payload("queue", i)) for i in range(REQUESTS)]
+    while any(job["status"] not in (DONE, FAILED) for job in jobs):
+        await asyncio.sleep(0.01)
+    elapsed = time.time() - start
+    await queue.close()
+    await client.close()
+    groups = len({job["started"] for job in jobs})
+    return elapsed, groups
+
+def run():
+    print(f"--- Listener /inject Benchmark ({REQUESTS} requests x {PROTEINS} proteins, concurrency {CONCURRENCY}) ---")
+    try:
+        sink = HTTPServer(('localhost', 8080), _Sink)
+    except OSError:
+        print("Port 8080 is in use: stop the Neo4j API first, the benchmark would post to it.")
+        sys.exit(1)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    try:
+        before = run_subprocess()
+        after = asyncio.run(run_pooled())
+        queued, groups = asyncio.run(run_queued())
+    finally:
+        sink.shutdown()
+    print(f"Subprocesses (list-inject.py + send.py): {REQUESTS / before:.1f} requests/s ({before:.2f}s)")
+    print(f"Pooled in-process client: {REQUESTS / after:.1f} requests/s ({after:.2f}s)")
+    print(f"Job queue, {groups} coalesced ingests: {REQUESTS / queued:.1f} requests/s ({queued:.2f}s)")
+    print(f"Speed-up: {before / after:.1f}x pooled, {before / queued:.1f}x queued")
+
+if __name__ == '__main__':
+    run()
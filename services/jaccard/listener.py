@@ -1,12 +1,25 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List
-import subprocess
+from typing import List, Optional
+import asyncio
+import grpc
 import json
+import subprocess
 import sys
-import threading
 import time
+from client import JaccardClient
+from report import report_lines
+from jobs import InjectQueue
+
+# Deadline of each gRPC call made for a request; exceeding it answers 504
+GRPC_TIMEOUT = 30
+# Deadline of each gRPC call of a queued injection; no request waits on it
+INJECT_TIMEOUT = 600
+# Correlations shown per protein by /print
+PRINT_TOP_K = 3
+# Correlations per protein /matches sends unless the request sets k
+MATCHES_TOP_K = 10
 
 app = FastAPI(
     title="Protein Data Injection API",
@@ -20,8 +33,8 @@ app = FastAPI(
     - View current state and correlations (print, state not supported via request for confidentiality reasons)
     
     ## Workflow
-    1. POST protein data to `/inject` endpoint
-    2. Data is processed by gRPC server (auto-started)
+    1. POST protein data to `/inject` endpoint, which queues it and returns a job ID
+    2. Data is processed by gRPC server (auto-started); poll `/jobs/{job_id}` for progress
     3. Jaccard similarities calculated for all pairs
     4. View results using `/print` endpoint
     5. Data can be forwarded to Neo4j (optional)
@@ -42,6 +55,10 @@ app = FastAPI(
 
 # Global variable to track server process
 grpc_server_process = None
+# Shared by all requests: one pool of long-lived channels to the gRPC server
+grpc_client = JaccardClient()
+# /inject jobs, ingested in the background
+inject_queue = InjectQueue(grpc_client, timeout=INJECT_TIMEOUT)
 
 class Protein(BaseModel):
     Entry: str = Field(
@@ -69,11 +86,18 @@ class Protein(BaseModel):
             }
         }
 
-class InjectionResponse(BaseModel):
-    status: str = Field(..., description="Status of the operation", example="success")
-    message: str = Field(..., description="Human-readable message", example="Data injected successfully")
-    proteins_count: int = Field(..., description="Number of proteins processed", example=4)
-    script_output: str = Field(..., description="Output from the injection script", example="Added 4 proteins.")
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="ID to poll at /jobs/{job_id}", example="3f2a9c0e5b6d4e1f8a7b9c0d1e2f3a4b")
+    status: str = Field(..., description="queued, running, done or failed", example="queued")
+    proteins_count: int = Field(..., description="Number of proteins in the job", example=4)
+    submitted: float = Field(..., description="Unix time the job was queued", example=1760000000.0)
+    started: Optional[float] = Field(None, description="Unix time its ingest started")
+    finished: Optional[float] = Field(None, description="Unix time it finished")
+    coalesced: Optional[int] = Field(None, description="Jobs ingested together with it, itself included", example=3)
+    computed: Optional[bool] = Field(None, description="Whether the new pairs were computed (if not, they are scored on read)")
+    forwarded: Optional[bool] = Field(None, description="Whether the changed correlations reached Neo4j")
+    message: Optional[str] = Field(None, description="gRPC server response", example="Added 12 proteins in 1 batches.")
+    error: Optional[str] = Field(None, description="Why the job failed", example="Connection refused")
 
 class ErrorResponse(BaseModel):
     status: str = Field(..., example="error")
@@ -110,19 +134,46 @@ def start_grpc_server():
         print(f"✗ Failed to start gRPC server: {e}")
         return False
 
+def rpc_error(e, message):
+    """HTTPException for a failed gRPC call: 504 past its deadline, else 500."""
+    if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+        return HTTPException(
+            status_code=504,
+            detail={
+                "status": "error",
+                "message": f"{message}: timed out"
+            }
+        )
+    return HTTPException(
+        status_code=500,
+        detail={
+            "status": "error",
+            "message": message,
+            "error": e.details()
+        }
+    )
+
 @app.post(
     "/inject", 
-    response_model=InjectionResponse,
+    response_model=JobResponse,
+    status_code=202,
     responses={
-        200: {
-            "description": "Data injected successfully",
+        202: {
+            "description": "Injection queued",
             "content": {
                 "application/json": {
                     "example": {
-                        "status": "success",
-                        "message": "Data injected successfully",
+                        "job_id": "3f2a9c0e5b6d4e1f8a7b9c0d1e2f3a4b",
+                        "status": "queued",
                         "proteins_count": 4,
-                        "script_output": "Added 4 proteins."
+                        "submitted": 1760000000.0,
+                        "started": None,
+                        "finished": None,
+                        "coalesced": None,
+                        "computed": None,
+                        "forwarded": None,
+                        "message": None,
+                        "error": None
                     }
                 }
             }
@@ -142,29 +193,26 @@ def start_grpc_server():
                     }
                 }
             }
-        },
-        500: {
-            "description": "Server Error - Script execution failed",
-            "model": ErrorResponse
-        },
-        504: {
-            "description": "Timeout - Script execution timed out"
         }
     },
     tags=["Protein Data"],
-    summary="Inject protein data into gRPC server"
+    summary="Queue protein data for injection into the gRPC server"
 )
 async def inject_proteins(proteins: List[Protein]):
     """
     ## Inject Protein Data
     
-    Receives a list of proteins and injects them into the gRPC server for processing.
+    Queues a list of proteins for injection into the gRPC server and returns at once
+    with a job ID. Poll `/jobs/{job_id}` until its status is `done` or `failed`.
     
     ### Process Flow:
     1. Validates protein data structure
-    2. Sends data to gRPC server via `list-inject.py`
-    3. Calculates Jaccard similarities between all protein pairs
-    4. Automatically forwards results via `send.py`
+    2. Queues the proteins as a job and answers `202 Accepted`
+    3. A background worker streams them to the gRPC server, together with the jobs
+       queued close to them, in one ingest
+    4. Calculates Jaccard similarities between the new proteins and all others, once
+       for the whole group
+    5. Automatically forwards the changed correlations as `send.py` does
     
     ### Expected Payload:
     ```json
@@ -180,68 +228,44 @@ async def inject_proteins(proteins: List[Protein]):
     ### Notes:
     - InterPro field must end with a semicolon
     - Multiple proteins will be compared pairwise
+    - Jobs are ingested in the order they were queued
     - Results can be viewed via `/print` endpoint
     """
-    try:
-        # Convert Pydantic models to dict for JSON serialization
-        payload = [protein.model_dump() for protein in proteins]
-        
-        # Convert payload to JSON string for command line argument
-        payload_json = json.dumps(payload)
-        
-        # Run list-inject.py with the payload
-        result = subprocess.run(
-            [sys.executable, 'list-inject.py', payload_json],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        print("Data collected. Now running send.py to forward data via HTTP POST...")
-        
-        sending = subprocess.run(
-            [sys.executable, 'send.py'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        print(sending)
-        
-        # Check if the script executed successfully
-        if result.returncode == 0:
-            return InjectionResponse(
-                status="success",
-                message="Data injected successfully",
-                proteins_count=len(payload),
-                script_output=result.stdout
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail={
-                    "status": "error",
-                    "message": "Script execution failed",
-                    "error": result.stderr
-                }
-            )
-            
-    except subprocess.TimeoutExpired:
-        raise HTTPException(
-            status_code=504,
-            detail={
-                "status": "error",
-                "message": "Script execution timed out"
-            }
-        )
-    except Exception as e:
+    job = inject_queue.submit([protein.model_dump() for protein in proteins])
+    return JobResponse(**job)
+
+@app.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={
+        404: {
+            "description": "Unknown job, or finished too long ago to be kept",
+            "model": ErrorResponse
+        }
+    },
+    tags=["Protein Data"],
+    summary="Status of a queued injection"
+)
+async def job_status(job_id: str):
+    """
+    ## Injection Job Status
+    
+    `queued` until the worker picks the job up, `running` while it is ingested,
+    computed and forwarded, then `done` (with the gRPC server's response in `message`)
+    or `failed` (with the reason in `error`). `coalesced` tells how many jobs were
+    ingested together. A group is ingested whole or not at all, so a failed job can be
+    resubmitted as it is.
+    """
+    job = inject_queue.status(job_id)
+    if job is None:
         raise HTTPException(
-            status_code=500,
+            status_code=404,
             detail={
                 "status": "error",
-                "message": str(e)
+                "message": f"Unknown job {job_id}"
             }
         )
+    return JobResponse(**job)
 
 @app.get(
     "/print", 
@@ -253,13 +277,13 @@ async def inject_proteins(proteins: List[Protein]):
                 "application/json": {
                     "example": {
                         "status": "success",
-                        "output": "[1] A0A087QH05\n    Correlations: 3 pairs (excluding self)\n      - A0A087QKA0: 0.7000\n      - A0A087QKA1: 0.5000\n      - A0A087QKA2: 0.8000\n\nSummary: 4 proteins, avg 3.0 correlations per protein"
+                        "output": "[1] A0A087QH05\n    Correlations: 3 non-zero pairs (excluding self)\n      - A0A087QKA0: 0.7000\n      - A0A087QKA1: 0.5000\n      - A0A087QKA2: 0.8000\n\nSummary: 4 proteins, avg 3.0 non-zero correlations per protein"
                     }
                 }
             }
         },
-        500: {"description": "Script execution failed"},
-        504: {"description": "Script execution timed out"}
+        500: {"description": "gRPC call failed"},
+        504: {"description": "gRPC call timed out"}
     },
     tags=["Protein Data"],
     summary="View current state and correlations"
@@ -268,7 +292,8 @@ async def print_current_state():
     """
     ## View Current State
     
-    Executes `print.py` to retrieve and display all proteins with their Jaccard correlations.
+    Retrieves all proteins with their best Jaccard correlations from the gRPC server,
+    formatted as `print.py` prints them.
     
     ### Output Includes:
     - List of all proteins in the system
@@ -278,65 +303,127 @@ async def print_current_state():
     ### Example Output:
     ```
     [1] A0A087QH05
-        Correlations: 3 pairs (excluding self)
+        Correlations: 3 non-zero pairs (excluding self)
           - A0A087QKA0: 0.7000
           - A0A087QKA1: 0.5000
           - A0A087QKA2: 0.8000
     
-    Summary: 4 proteins, avg 3.0 correlations per protein
+    Summary: 4 proteins, avg 3.0 non-zero correlations per protein
     ```
     
     The output is returned both as HTTP response and printed to the server console.
     """
     try:
         print("\n" + "="*60)
-        print("Executing print.py to view current state...")
+        print("Retrieving current state...")
         print("="*60)
         
-        result = subprocess.run(
-            [sys.executable, 'print.py'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        rows = [row async for row in grpc_client.top_matches(PRINT_TOP_K, timeout=GRPC_TIMEOUT)]
+        output = "\n".join(report_lines(rows)) + "\n"
         
         # Print to console
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
+        print(output)
         print("="*60 + "\n")
         
-        if result.returncode == 0:
-            return PrintResponse(
-                status="success",
-                output=result.stdout
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail={
-                    "status": "error",
-                    "message": "print.py execution failed",
-                    "error": result.stderr
-                }
-            )
+        return PrintResponse(
+            status="success",
+            output=output
+        )
             
-    except subprocess.TimeoutExpired:
+    except grpc.aio.AioRpcError as e:
+        raise rpc_error(e, "Retrieving the current state failed")
+    except Exception as e:
         raise HTTPException(
-            status_code=504,
+            status_code=500,
             detail={
                 "status": "error",
-                "message": "print.py execution timed out"
+                "message": str(e)
             }
         )
-    except Exception as e:
+
+def match_line(result):
+    """One NDJSON line of /matches, for a MatchResult."""
+    protein = result.query_protein
+    return json.dumps({
+        "entry": protein.entry,
+        "cursor": protein.id,
+        "correlations": [
+            {"entry": c.entry, "jaccard": round(c.jaccard, 6)} for c in result.correlations
+        ],
+        "total_matches": result.total_matches
+    }) + "\n"
+
+@app.get(
+    "/matches",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One JSON object per line and protein, in protein ID order",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"entry": "A0A087QH05", "cursor": "A0A087QH05", "correlations": [{"entry": "A0A087QKA2", "jaccard": 0.8}, {"entry": "A0A087QKA0", "jaccard": 0.7}], "total_matches": 3}\n'
+                }
+            }
+        },
+        500: {"description": "gRPC call failed", "model": ErrorResponse},
+        504: {"description": "gRPC server did not answer in time"}
+    },
+    tags=["Protein Data"],
+    summary="Stream all proteins and their best correlations as NDJSON"
+)
+async def stream_matches(
+    k: int = Query(MATCHES_TOP_K, ge=0, description="Best correlations per protein (0: all)"),
+    min_jaccard: float = Query(0.0, ge=0.0, le=1.0, description="Leave out weaker correlations"),
+    after: str = Query("", description="Start after this cursor (the last line's `cursor`)"),
+    offset: int = Query(0, ge=0, description="Proteins to skip"),
+    limit: int = Query(0, ge=0, description="Most proteins to send (0: all)")
+):
+    """
+    ## Stream Matches
+    
+    Sends one JSON line per protein as the gRPC server computes it: its `entry`, best
+    `k` correlations (best first) and `total_matches`, the number of non-zero
+    correlations it has. Unlike `/print`, nothing is collected in the listener, so the
+    first lines arrive at once and memory does not grow with the dataset.
+    
+    ### Paging:
+    - Proteins come in protein ID order
+    - `limit` and `offset` select a page
+    - For pages that stay consistent while proteins are added, pass the `cursor` of
+      the last line received as `after`
+    
+    ### Errors:
+    A failure after the first line can no longer change the status code; the stream
+    then ends with a line `{"error": "..."}`.
+    """
+    call = grpc_client.match_batches(k, min_jaccard, after, offset, limit)
+    try:
+        first = await asyncio.wait_for(call.read(), GRPC_TIMEOUT)
+    except asyncio.TimeoutError:
+        call.cancel()
         raise HTTPException(
-            status_code=500,
+            status_code=504,
             detail={
                 "status": "error",
-                "message": str(e)
+                "message": "Streaming the matches failed: timed out"
             }
         )
+    except grpc.aio.AioRpcError as e:
+        raise rpc_error(e, "Streaming the matches failed")
+
+    async def lines():
+        batch = first
+        try:
+            while batch is not grpc.aio.EOF:
+                yield "".join(match_line(result) for result in batch.results)
+                batch = await call.read()
+        except grpc.aio.AioRpcError as e:
+            yield json.dumps({"error": e.details()}) + "\n"
+        finally:
+            # Also stops the server when the client disconnects early
+            call.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @app.get(
     "/health",
@@ -384,15 +471,15 @@ async def root():
         },
         "workflow": {
             "1": "Start this listener (which auto-starts the gRPC server)",
-            "2": "POST protein data to /inject endpoint",
-            "3": "Data is sent to gRPC server for processing",
+            "2": "POST protein data to /inject endpoint; it is queued and a job ID returned",
+            "3": "Data is sent to gRPC server for processing; poll /jobs/{job_id} for progress",
             "4": "Jaccard similarities are calculated between all protein pairs",
             "5": "Use /print to view current state and correlations",
             "6": "Data can be forwarded to Neo4j service via send.py"
         },
         "endpoints": {
             "POST /inject": {
-                "description": "Inject protein data into gRPC server",
+                "description": "Queue protein data for injection into gRPC server; returns a job ID",
                 "payload": "Array of protein objects with Entry, InterPro, and Sequence fields",
                 "example": [
                     {
@@ -402,6 +489,13 @@ async def root():
                     }
                 ]
             },
+            "GET /jobs/{job_id}": {
+                "description": "Status of a queued injection: queued, running, done or failed"
+            },
+            "GET /matches": {
+                "description": "Stream every protein with its best correlations, one JSON line each",
+                "parameters": "k, min_jaccard, after (cursor), offset, limit"
+            },
             "GET /print": {
                 "description": "View current state of all proteins and their Jaccard correlations",
                 "returns": "Formatted output showing proteins and their similarity scores"
@@ -481,7 +575,12 @@ Invoke-RestMethod -Uri http://localhost:50052/inject -Method POST -Body $body -C
                 "curl": "curl http://localhost:50052/print",
                 "browser": "Open http://localhost:50052/print in your browser"
             },
-            "4_check_health": {
+            "4_stream_matches": {
+                "description": "Stream proteins and their best correlations, one JSON line each",
+                "curl": "curl -N 'http://localhost:50052/matches?k=5&limit=1000'",
+                "next_page": "curl -N 'http://localhost:50052/matches?k=5&limit=1000&after=<cursor of the last line>'"
+            },
+            "5_check_health": {
                 "description": "Check if both servers are running",
                 "curl": "curl http://localhost:50052/health"
             }
@@ -496,19 +595,33 @@ Invoke-RestMethod -Uri http://localhost:50052/inject -Method POST -Body $body -C
         },
         "workflow_details": {
             "step_1": "POST protein data to /inject",
-            "step_2": "listener.py calls list-inject.py to send data to gRPC server",
+            "step_2": "listener.py queues it as a job; a background worker streams the jobs queued close together to the gRPC server in one ingest",
             "step_3": "gRPC server processes proteins and extracts InterPro domains",
             "step_4": "Server calculates Jaccard similarity for all protein pairs",
-            "step_5": "listener.py automatically calls send.py to forward results",
+            "step_5": "listener.py automatically forwards the changed results, as send.py does",
             "step_6": "Use /print to view current state and all correlations",
             "optional": "Results can be sent to Neo4j service at localhost:8080/api/proteins"
         },
         "response_formats": {
-            "injection_success": {
-                "status": "success",
-                "message": "Data injected successfully",
+            "injection_queued": {
+                "job_id": "3f2a9c0e5b6d4e1f8a7b9c0d1e2f3a4b",
+                "status": "queued",
                 "proteins_count": 2,
-                "script_output": "Server response..."
+                "submitted": 1760000000.0
+            },
+            "job_done": {
+                "job_id": "3f2a9c0e5b6d4e1f8a7b9c0d1e2f3a4b",
+                "status": "done",
+                "proteins_count": 2,
+                "coalesced": 3,
+                "forwarded": True,
+                "message": "Server response..."
+            },
+            "matches_line_format": {
+                "entry": "PROT_001",
+                "cursor": "PROT_001",
+                "correlations": [{"entry": "PROT_002", "jaccard": 0.666667}],
+                "total_matches": 1
             },
             "print_output_format": {
                 "status": "success",
@@ -517,12 +630,13 @@ Invoke-RestMethod -Uri http://localhost:50052/inject -Method POST -Body $body -C
         },
         "additional_scripts": {
             "print.py": "View current state (also available via GET /print)",
-            "send.py": "Send results to Neo4j (called automatically after injection)",
+            "send.py": "Send results to Neo4j (done in process after each injection)",
             "file-import.py": "Import from file (run directly)",
-            "list-inject.py": "Inject from command line (called by /inject endpoint)"
+            "list-inject.py": "Inject from command line (the /inject endpoint does the same in process)"
         },
         "tips": [
             "Use /docs for interactive API testing",
+            "/inject returns before the data is ingested: poll /jobs/{job_id} until it is done",
             "The gRPC server maintains state across requests",
             "Correlations are cached for performance",
             "Each protein is compared with all others (excluding itself)",
@@ -534,6 +648,8 @@ Invoke-RestMethod -Uri http://localhost:50052/inject -Method POST -Body $body -C
 async def shutdown_event():
     """Clean up gRPC server process on shutdown"""
     global grpc_server_process
+    await inject_queue.close()
+    await grpc_client.close()
     if grpc_server_process:
         print("\nShutting down gRPC server...")
         grpc_server_process.terminate()
@@ -562,6 +678,8 @@ if __name__ == '__main__':
     print("="*70)
     print("\n📍 API Endpoints:")
     print("   • POST http://localhost:50052/inject    - Inject protein data")
+    print("   • GET  http://localhost:50052/jobs/ID   - Injection job status")
+    print("   • GET  http://localhost:50052/matches   - Stream results as NDJSON")
     print("   • GET  http://localhost:50052/print     - View current state")
     print("   • GET  http://localhost:50052/health    - Health check")
     print("   • GET  http://localhost:50052/help      - Detailed help")
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmethods.proto\x12\x04grpc\"\x07\n\x05\x45mpty\"\'\n\x03\x41\x63k\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"/\n\x0cProteinBatch\x12\x1f\n\x08proteins\x18\x01 \x03(\x0b\x32\r.grpc.Protein\".\n\x0cJaccardTuple\x12\r\n\x05\x65ntry\x18\x01 \x01(\t\x12\x0f\n\x07jaccard\x18\x02 \x01(\x02\"]\n\x0bMatchResult\x12$\n\rquery_protein\x18\x01 \x01(\x0b\x32\r.grpc.Protein\x12(\n\x0c\x63orrelations\x18\x02 \x03(\x0b\x32\x12.grpc.JaccardTuple\"\x1c\n\tEntryList\x12\x0f\n\x07\x65ntries\x18\x01 \x03(\t\"9\n\x10SaveStateRequest\x12\x12\n\nstate_name\x18\x01 \x01(\t\x12\x11\n\toverwrite\x18\x02 \x01(\x08\"6\n\x0fRollbackRequest\x12\x12\n\nstate_name\x18\x01 \x01(\t\x12\x0f\n\x07\x63onfirm\x18\x02 \x01(\x08\"\x1a\n\tStateList\x12\r\n\x05names\x18\x01 \x03(\t\"\x19\n\tStateName\x12\x0c\n\x04name\x18\x01 \x01(\t\"\xbe\x01\n\x07Protein\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05\x65ntry\x18\x02 \x01(\t\x12\x10\n\x08reviewed\x18\x03 \x01(\t\x12\x12\n\nentry_name\x18\x04 \x01(\t\x12\x15\n\rprotein_names\x18\x05 \x01(\t\x12\x12\n\ngene_names\x18\x06 \x01(\t\x12\x10\n\x08organism\x18\x07 \x01(\t\x12\x10\n\x08interpro\x18\x08 \x01(\t\x12\x11\n\tec_number\x18\t \x01(\t\x12\x10\n\x08sequence\x18\n \x01(\t2\xe0\x03\n\x04Pass\x12\x32\n\x0f\x41\x64\x64ProteinBatch\x12\x12.grpc.ProteinBatch\x1a\t.grpc.Ack\"\x00\x12:\n\x14\x43\x61lculateBestMatches\x12\x0b.grpc.Empty\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12\x37\n\x11\x43\x61lculateAllPairs\x12\x0b.grpc.Empty\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12.\n\x0e\x44\x65leteProteins\x12\x0f.grpc.EntryList\x1a\t.grpc.Ack\"\x00\x12\x32\n\x16RecalculateBestMatches\x12\x0b.grpc.Empty\x1a\t.grpc.Ack\"\x00\x12\x30\n\tSaveState\x12\x16.grpc.SaveStateRequest\x1a\t.grpc.Ack\"\x00\x12\x35\n\x0fRollbackToState\x12\x15.grpc.RollbackRequest\x1a\t.grpc.Ack\"\x00\x12\x30\n\x0eGetSavedStates\x12\x0b.grpc.Empty\x1a\x0f.grpc.StateList\"\x00\x12\x30\n\x10RemoveSavedState\x12\x0f.grpc.StateName\x1a\t.grpc.Ack\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmethods.proto\x12\x04grpc\"\x07\n\x05\x45mpty\"\'\n\x03\x41\x63k\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"=\n\x0cProteinBatch\x12\x1f\n\x08proteins\x18\x01 \x03(\x0b\x32\r.grpc.Protein\x12\x0c\n\x04last\x18\x02 \x01(\x08\".\n\x0cJaccardTuple\x12\r\n\x05\x65ntry\x18\x01 \x01(\t\x12\x0f\n\x07jaccard\x18\x02 \x01(\x02\"t\n\x0bMatchResult\x12$\n\rquery_protein\x18\x01 \x01(\x0b\x32\r.grpc.Protein\x12(\n\x0c\x63orrelations\x18\x02 \x03(\x0b\x32\x12.grpc.JaccardTuple\x12\x15\n\rtotal_matches\x18\x03 \x01(\r\"6\n\x10MatchResultBatch\x12\"\n\x07results\x18\x01 \x03(\x0b\x32\x11.grpc.MatchResult\"x\n\x11TopMatchesRequest\x12\t\n\x01k\x18\x01 \x01(\r\x12\x13\n\x0bmin_jaccard\x18\x02 \x01(\x02\x12\r\n\x05\x61\x66ter\x18\x03 \x01(\t\x12\x0e\n\x06offset\x18\x04 \x01(\r\x12\r\n\x05limit\x18\x05 \x01(\r\x12\x15\n\romit_sequence\x18\x06 \x01(\x08\"c\n\x0eNeighbourQuery\x12\x10\n\x08query_id\x18\x01 \x01(\t\x12\r\n\x05\x65ntry\x18\x02 \x01(\t\x12\x10\n\x08interpro\x18\x03 \x01(\t\x12\t\n\x01k\x18\x04 \x01(\r\x12\x13\n\x0bmin_jaccard\x18\x05 \x01(\x02\"\xa8\x01\n\x0fNeighbourResult\x12\x10\n\x08query_id\x18\x01 \x01(\t\x12\r\n\x05\x66ound\x18\x02 \x01(\x08\x12$\n\rquery_protein\x18\x03 \x01(\x0b\x32\r.grpc.Protein\x12(\n\x0c\x63orrelations\x18\x04 \x03(\x0b\x32\x12.grpc.JaccardTuple\x12\x15\n\rtotal_matches\x18\x05 \x01(\r\x12\r\n\x05\x65rror\x18\x06 \x01(\t\".\n\x0e\x43hangesRequest\x12\r\n\x05since\x18\x01 \x01(\x04\x12\r\n\x05\x65poch\x18\x02 \x01(\t\"\x8c\x01\n\nPairChange\x12\r\n\x05\x65ntry\x18\x01 \x01(\t\x12\r\n\x05other\x18\x02 \x01(\t\x12\x0f\n\x07jaccard\x18\x03 \x01(\x02\x12#\n\x04kind\x18\x04 \x01(\x0e\x32\x15.grpc.PairChange.Kind\"*\n\x04Kind\x12\n\n\x06INSERT\x10\x00\x12\n\n\x06UPDATE\x10\x01\x12\n\n\x06\x44\x45LETE\x10\x02\"\x97\x01\n\x0b\x43hangeBatch\x12\r\n\x05\x65poch\x18\x01 \x01(\t\x12\x10\n\x08sequence\x18\x02 \x01(\x04\x12\x0c\n\x04\x66ull\x18\x03 \x01(\x08\x12\x1f\n\x08proteins\x18\x04 \x03(\x0b\x32\r.grpc.Protein\x12\x17\n\x0fremoved_entries\x18\x05 \x03(\t\x12\x1f\n\x05pairs\x18\x06 \x03(\x0b\x32\x10.grpc.PairChange\";\n\rStreamRequest\x12\x15\n\rmemory_budget\x18\x01 \x01(\x04\x12\x13\n\x0bmin_jaccard\x18\x02 \x01(\x02\"\'\n\x10ThresholdRequest\x12\x13\n\x0bmin_jaccard\x18\x01 \x01(\x02\"\x95\x01\n\x15\x43ompactMatchesRequest\x12\x16\n\x0e\x66ormat_version\x18\x01 \x01(\r\x12\t\n\x01k\x18\x02 \x01(\r\x12\x13\n\x0bmin_jaccard\x18\x03 \x01(\x02\x12\x10\n\x08quantize\x18\x04 \x01(\x08\x12\x18\n\x10include_proteins\x18\x05 \x01(\x08\x12\x18\n\x10include_sequence\x18\x06 \x01(\x08\"\x82\x01\n\x11\x43ompactMatchBlock\x12\x16\n\x0e\x66ormat_version\x18\x01 \x01(\r\x12\x0f\n\x07\x65ntries\x18\x02 \x03(\t\x12\x1f\n\x08proteins\x18\x03 \x03(\x0b\x32\r.grpc.Protein\x12#\n\x04rows\x18\x04 \x03(\x0b\x32\x15.grpc.CompactMatchRow\"r\n\x0f\x43ompactMatchRow\x12\r\n\x05query\x18\x01 \x01(\r\x12\x0f\n\x07indices\x18\x02 \x03(\r\x12\x0e\n\x06scores\x18\x03 \x03(\x02\x12\x18\n\x10quantized_scores\x18\x04 \x03(\r\x12\x15\n\rtotal_matches\x18\x05 \x01(\r\"\x1c\n\tEntryList\x12\x0f\n\x07\x65ntries\x18\x01 \x03(\t\"D\n\x0cProteinDelta\x12\x13\n\x0bremoved_ids\x18\x01 \x03(\t\x12\x1f\n\x08proteins\x18\x02 \x03(\x0b\x32\r.grpc.Protein\"9\n\x10SaveStateRequest\x12\x12\n\nstate_name\x18\x01 \x01(\t\x12\x11\n\toverwrite\x18\x02 \x01(\x08\"6\n\x0fRollbackRequest\x12\x12\n\nstate_name\x18\x01 \x01(\t\x12\x0f\n\x07\x63onfirm\x18\x02 \x01(\x08\"@\n\tStateList\x12\r\n\x05names\x18\x01 \x03(\t\x12$\n\x06states\x18\x02 \x03(\x0b\x32\x14.grpc.SavedStateInfo\"?\n\x0eSavedStateInfo\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x62ytes\x18\x02 \x01(\x04\x12\x10\n\x08proteins\x18\x03 \x01(\x04\"\x19\n\tStateName\x12\x0c\n\x04name\x18\x01 \x01(\t\"H\n\x12\x41pproximateRequest\x12\x11\n\tthreshold\x18\x01 \x01(\x02\x12\x10\n\x08num_perm\x18\x02 \x01(\r\x12\r\n\x05\x62\x61nds\x18\x03 \x01(\r\"\xf7\x01\n\x13\x41pproximationReport\x12\x11\n\tthreshold\x18\x01 \x01(\x02\x12\x10\n\x08num_perm\x18\x02 \x01(\r\x12\r\n\x05\x62\x61nds\x18\x03 \x01(\r\x12\x0c\n\x04rows\x18\x04 \x01(\r\x12\x17\n\x0f\x63\x61ndidate_pairs\x18\x05 \x01(\x04\x12\x19\n\x11\x61pproximate_pairs\x18\x06 \x01(\x04\x12\x13\n\x0b\x65xact_pairs\x18\x07 \x01(\x04\x12\x11\n\tprecision\x18\x08 \x01(\x02\x12\x0e\n\x06recall\x18\t \x01(\x02\x12\x1b\n\x13\x61pproximate_seconds\x18\n \x01(\x02\x12\x15\n\rexact_seconds\x18\x0b \x01(\x02\"\xdd\x01\n\rAnalyzerStats\x12\x10\n\x08proteins\x18\x01 \x01(\x04\x12\x19\n\x11unique_signatures\x18\x02 \x01(\x04\x12\x13\n\x0b\x64\x65\x64up_ratio\x18\x03 \x01(\x02\x12\x15\n\rprotein_pairs\x18\x04 \x01(\x04\x12\x17\n\x0fsignature_pairs\x18\x05 \x01(\x04\x12\x15\n\rnonzero_pairs\x18\x06 \x01(\x04\x12\x1a\n\x12pending_signatures\x18\x07 \x01(\x04\x12\x12\n\nfree_slots\x18\x08 \x01(\x04\x12\x13\n\x0bscore_bytes\x18\t \x01(\x04\"g\n\x0cHistoryStats\x12\r\n\x05\x64\x65pth\x18\x01 \x01(\r\x12\r\n\x05\x62ytes\x18\x02 \x01(\x04\x12\x13\n\x0b\x63heckpoints\x18\x03 \x01(\r\x12\x11\n\tmax_depth\x18\x04 \x01(\r\x12\x11\n\tmax_bytes\x18\x05 \x01(\x04\"\xbe\x01\n\x07Protein\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05\x65ntry\x18\x02 \x01(\t\x12\x10\n\x08reviewed\x18\x03 \x01(\t\x12\x12\n\nentry_name\x18\x04 \x01(\t\x12\x15\n\rprotein_names\x18\x05 \x01(\t\x12\x12\n\ngene_names\x18\x06 \x01(\t\x12\x10\n\x08organism\x18\x07 \x01(\t\x12\x10\n\x08interpro\x18\x08 \x01(\t\x12\x11\n\tec_number\x18\t \x01(\t\x12\x10\n\x08sequence\x18\n \x01(\t2\xc7\n\n\x04Pass\x12\x32\n\x0f\x41\x64\x64ProteinBatch\x12\x12.grpc.ProteinBatch\x1a\t.grpc.Ack\"\x00\x12\x35\n\x10\x41\x64\x64ProteinStream\x12\x12.grpc.ProteinBatch\x1a\t.grpc.Ack\"\x00(\x01\x12:\n\x14\x43\x61lculateBestMatches\x12\x0b.grpc.Empty\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12\x37\n\x11\x43\x61lculateAllPairs\x12\x0b.grpc.Empty\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12<\n\x0eStreamAllPairs\x12\x13.grpc.StreamRequest\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12\x45\n\x13\x43\x61lculateTopMatches\x12\x17.grpc.TopMatchesRequest\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12O\n\x18\x43\x61lculateTopMatchBatches\x12\x17.grpc.TopMatchesRequest\x1a\x16.grpc.MatchResultBatch\"\x00\x30\x01\x12H\n\x17\x43\x61lculateThresholdPairs\x12\x16.grpc.ThresholdRequest\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12S\n\x17\x43\x61lculateCompactMatches\x12\x1b.grpc.CompactMatchesRequest\x1a\x17.grpc.CompactMatchBlock\"\x00\x30\x01\x12\x44\n\x0fQueryNeighbours\x12\x14.grpc.NeighbourQuery\x1a\x15.grpc.NeighbourResult\"\x00(\x01\x30\x01\x12<\n\rStreamChanges\x12\x14.grpc.ChangesRequest\x1a\x11.grpc.ChangeBatch\"\x00\x30\x01\x12.\n\x0e\x44\x65leteProteins\x12\x0f.grpc.EntryList\x1a\t.grpc.Ack\"\x00\x12\x32\n\x16RecalculateBestMatches\x12\x0b.grpc.Empty\x1a\t.grpc.Ack\"\x00\x12*\n\x0e\x43omputePending\x12\x0b.grpc.Empty\x1a\t.grpc.Ack\"\x00\x12\x30\n\tSaveState\x12\x16.grpc.SaveStateRequest\x1a\t.grpc.Ack\"\x00\x12\x35\n\x0fRollbackToState\x12\x15.grpc.RollbackRequest\x1a\t.grpc.Ack\"\x00\x12\x30\n\x0eGetSavedStates\x12\x0b.grpc.Empty\x1a\x0f.grpc.StateList\"\x00\x12\x30\n\x10RemoveSavedState\x12\x0f.grpc.StateName\x1a\t.grpc.Ack\"\x00\x12N\n\x1b\x43\x61lculateApproximateMatches\x12\x18.grpc.ApproximateRequest\x1a\x11.grpc.MatchResult\"\x00\x30\x01\x12S\n\x1a\x45valuateApproximateMatches\x12\x18.grpc.ApproximateRequest\x1a\x19.grpc.ApproximationReport\"\x00\x12.\n\x08GetStats\x12\x0b.grpc.Empty\x1a\x13.grpc.AnalyzerStats\"\x00\x12\x34\n\x0fGetHistoryStats\x12\x0b.grpc.Empty\x1a\x12.grpc.HistoryStats\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -36,23 +36,61 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_ACK']._serialized_start=32
   _globals['_ACK']._serialized_end=71
   _globals['_PROTEINBATCH']._serialized_start=73
-  _globals['_PROTEINBATCH']._serialized_end=120
-  _globals['_JACCARDTUPLE']._serialized_start=122
-  _globals['_JACCARDTUPLE']._serialized_end=168
-  _globals['_MATCHRESULT']._serialized_start=170
-  _globals['_MATCHRESULT']._serialized_end=263
-  _globals['_ENTRYLIST']._serialized_start=265
-  _globals['_ENTRYLIST']._serialized_end=293
-  _globals['_SAVESTATEREQUEST']._serialized_start=295
-  _globals['_SAVESTATEREQUEST']._serialized_end=352
-  _globals['_ROLLBACKREQUEST']._serialized_start=354
-  _globals['_ROLLBACKREQUEST']._serialized_end=408
-  _globals['_STATELIST']._serialized_start=410
-  _globals['_STATELIST']._serialized_end=436
-  _globals['_STATENAME']._serialized_start=438
-  _globals['_STATENAME']._serialized_end=463
-  _globals['_PROTEIN']._serialized_start=466
-  _globals['_PROTEIN']._serialized_end=656
-  _globals['_PASS']._serialized_start=659
-  _globals['_PASS']._serialized_end=1139
+  _globals['_PROTEINBATCH']._serialized_end=134
+  _globals['_JACCARDTUPLE']._serialized_start=136
+  _globals['_JACCARDTUPLE']._serialized_end=182
+  _globals['_MATCHRESULT']._serialized_start=184
+  _globals['_MATCHRESULT']._serialized_end=300
+  _globals['_MATCHRESULTBATCH']._serialized_start=302
+  _globals['_MATCHRESULTBATCH']._serialized_end=356
+  _globals['_TOPMATCHESREQUEST']._serialized_start=358
+  _globals['_TOPMATCHESREQUEST']._serialized_end=478
+  _globals['_NEIGHBOURQUERY']._serialized_start=480
+  _globals['_NEIGHBOURQUERY']._serialized_end=579
+  _globals['_NEIGHBOURRESULT']._serialized_start=582
+  _globals['_NEIGHBOURRESULT']._serialized_end=750
+  _globals['_CHANGESREQUEST']._serialized_start=752
+  _globals['_CHANGESREQUEST']._serialized_end=798
+  _globals['_PAIRCHANGE']._serialized_start=801
+  _globals['_PAIRCHANGE']._serialized_end=941
+  _globals['_PAIRCHANGE_KIND']._serialized_start=899
+  _globals['_PAIRCHANGE_KIND']._serialized_end=941
+  _globals['_CHANGEBATCH']._serialized_start=944
+  _globals['_CHANGEBATCH']._serialized_end=1095
+  _globals['_STREAMREQUEST']._serialized_start=1097
+  _globals['_STREAMREQUEST']._serialized_end=1156
+  _globals['_THRESHOLDREQUEST']._serialized_start=1158
+  _globals['_THRESHOLDREQUEST']._serialized_end=1197
+  _globals['_COMPACTMATCHESREQUEST']._serialized_start=1200
+  _globals['_COMPACTMATCHESREQUEST']._serialized_end=1349
+  _globals['_COMPACTMATCHBLOCK']._serialized_start=1352
+  _globals['_COMPACTMATCHBLOCK']._serialized_end=1482
+  _globals['_COMPACTMATCHROW']._serialized_start=1484
+  _globals['_COMPACTMATCHROW']._serialized_end=1598
+  _globals['_ENTRYLIST']._serialized_start=1600
+  _globals['_ENTRYLIST']._serialized_end=1628
+  _globals['_PROTEINDELTA']._serialized_start=1630
+  _globals['_PROTEINDELTA']._serialized_end=1698
+  _globals['_SAVESTATEREQUEST']._serialized_start=1700
+  _globals['_SAVESTATEREQUEST']._serialized_end=1757
+  _globals['_ROLLBACKREQUEST']._serialized_start=1759
+  _globals['_ROLLBACKREQUEST']._serialized_end=1813
+  _globals['_STATELIST']._serialized_start=1815
+  _globals['_STATELIST']._serialized_end=1879
+  _globals['_SAVEDSTATEINFO']._serialized_start=1881
+  _globals['_SAVEDSTATEINFO']._serialized_end=1944
+  _globals['_STATENAME']._serialized_start=1946
+  _globals['_STATENAME']._serialized_end=1971
+  _globals['_APPROXIMATEREQUEST']._serialized_start=1973
+  _globals['_APPROXIMATEREQUEST']._serialized_end=2045
+  _globals['_APPROXIMATIONREPORT']._serialized_start=2048
+  _globals['_APPROXIMATIONREPORT']._serialized_end=2295
+  _globals['_ANALYZERSTATS']._serialized_start=2298
+  _globals['_ANALYZERSTATS']._serialized_end=2519
+  _globals['_HISTORYSTATS']._serialized_start=2521
+  _globals['_HISTORYSTATS']._serialized_end=2624
+  _globals['_PROTEIN']._serialized_start=2627
+  _globals['_PROTEIN']._serialized_end=2817
+  _globals['_PASS']._serialized_start=2820
+  _globals['_PASS']._serialized_end=4171
 # @@protoc_insertion_point(module_scope)
@@ -1,4 +1,5 @@
 from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
 from collections.abc import Iterable as _Iterable, Mapping as _Mapping
@@ -19,10 +20,12 @@ class Ack(_message.Message):
     def __init__(self, success: bool = ..., message: _Optional[str] = ...) -> None: ...
 
 class ProteinBatch(_message.Message):
-    __slots__ = ("proteins",)
+    __slots__ = ("proteins", "last")
     PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    LAST_FIELD_NUMBER: _ClassVar[int]
     proteins: _containers.RepeatedCompositeFieldContainer[Protein]
-    def __init__(self, proteins: _Optional[_Iterable[_Union[Protein, _Mapping]]] = ...) -> None: ...
+    last: bool
+    def __init__(self, proteins: _Optional[_Iterable[_Union[Protein, _Mapping]]] = ..., last: bool = ...) -> None: ...
 
 class JaccardTuple(_message.Message):
     __slots__ = ("entry", "jaccard")
@@ -33,12 +36,166 @@ class JaccardTuple(_message.Message):
     def __init__(self, entry: _Optional[str] = ..., jaccard: _Optional[float] = ...) -> None: ...
 
 class MatchResult(_message.Message):
-    __slots__ = ("query_protein", "correlations")
+    __slots__ = ("query_protein", "correlations", "total_matches")
     QUERY_PROTEIN_FIELD_NUMBER: _ClassVar[int]
     CORRELATIONS_FIELD_NUMBER: _ClassVar[int]
+    TOTAL_MATCHES_FIELD_NUMBER: _ClassVar[int]
     query_protein: Protein
     correlations: _containers.RepeatedCompositeFieldContainer[JaccardTuple]
-    def __init__(self, query_protein: _Optional[_Union[Protein, _Mapping]] = ..., correlations: _Optional[_Iterable[_Union[JaccardTuple, _Mapping]]] = ...) -> None: ...
+    total_matches: int
+    def __init__(self, query_protein: _Optional[_Union[Protein, _Mapping]] = ..., correlations: _Optional[_Iterable[_Union[JaccardTuple, _Mapping]]] = ..., total_matches: _Optional[int] = ...) -> None: ...
+
+class MatchResultBatch(_message.Message):
+    __slots__ = ("results",)
+    RESULTS_FIELD_NUMBER: _ClassVar[int]
+    results: _containers.RepeatedCompositeFieldContainer[MatchResult]
+    def __init__(self, results: _Optional[_Iterable[_Union[MatchResult, _Mapping]]] = ...) -> None: ...
+
+class TopMatchesRequest(_message.Message):
+    __slots__ = ("k", "min_jaccard", "after", "offset", "limit", "omit_sequence")
+    K_FIELD_NUMBER: _ClassVar[int]
+    MIN_JACCARD_FIELD_NUMBER: _ClassVar[int]
+    AFTER_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    LIMIT_FIELD_NUMBER: _ClassVar[int]
+    OMIT_SEQUENCE_FIELD_NUMBER: _ClassVar[int]
+    k: int
+    min_jaccard: float
+    after: str
+    offset: int
+    limit: int
+    omit_sequence: bool
+    def __init__(self, k: _Optional[int] = ..., min_jaccard: _Optional[float] = ..., after: _Optional[str] = ..., offset: _Optional[int] = ..., limit: _Optional[int] = ..., omit_sequence: bool = ...) -> None: ...
+
+class NeighbourQuery(_message.Message):
+    __slots__ = ("query_id", "entry", "interpro", "k", "min_jaccard")
+    QUERY_ID_FIELD_NUMBER: _ClassVar[int]
+    ENTRY_FIELD_NUMBER: _ClassVar[int]
+    INTERPRO_FIELD_NUMBER: _ClassVar[int]
+    K_FIELD_NUMBER: _ClassVar[int]
+    MIN_JACCARD_FIELD_NUMBER: _ClassVar[int]
+    query_id: str
+    entry: str
+    interpro: str
+    k: int
+    min_jaccard: float
+    def __init__(self, query_id: _Optional[str] = ..., entry: _Optional[str] = ..., interpro: _Optional[str] = ..., k: _Optional[int] = ..., min_jaccard: _Optional[float] = ...) -> None: ...
+
+class NeighbourResult(_message.Message):
+    __slots__ = ("query_id", "found", "query_protein", "correlations", "total_matches", "error")
+    QUERY_ID_FIELD_NUMBER: _ClassVar[int]
+    FOUND_FIELD_NUMBER: _ClassVar[int]
+    QUERY_PROTEIN_FIELD_NUMBER: _ClassVar[int]
+    CORRELATIONS_FIELD_NUMBER: _ClassVar[int]
+    TOTAL_MATCHES_FIELD_NUMBER: _ClassVar[int]
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    query_id: str
+    found: bool
+    query_protein: Protein
+    correlations: _containers.RepeatedCompositeFieldContainer[JaccardTuple]
+    total_matches: int
+    error: str
+    def __init__(self, query_id: _Optional[str] = ..., found: bool = ..., query_protein: _Optional[_Union[Protein, _Mapping]] = ..., correlations: _Optional[_Iterable[_Union[JaccardTuple, _Mapping]]] = ..., total_matches: _Optional[int] = ..., error: _Optional[str] = ...) -> None: ...
+
+class ChangesRequest(_message.Message):
+    __slots__ = ("since", "epoch")
+    SINCE_FIELD_NUMBER: _ClassVar[int]
+    EPOCH_FIELD_NUMBER: _ClassVar[int]
+    since: int
+    epoch: str
+    def __init__(self, since: _Optional[int] = ..., epoch: _Optional[str] = ...) -> None: ...
+
+class PairChange(_message.Message):
+    __slots__ = ("entry", "other", "jaccard", "kind")
+    class Kind(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+        __slots__ = ()
+        INSERT: _ClassVar[PairChange.Kind]
+        UPDATE: _ClassVar[PairChange.Kind]
+        DELETE: _ClassVar[PairChange.Kind]
+    INSERT: PairChange.Kind
+    UPDATE: PairChange.Kind
+    DELETE: PairChange.Kind
+    ENTRY_FIELD_NUMBER: _ClassVar[int]
+    OTHER_FIELD_NUMBER: _ClassVar[int]
+    JACCARD_FIELD_NUMBER: _ClassVar[int]
+    KIND_FIELD_NUMBER: _ClassVar[int]
+    entry: str
+    other: str
+    jaccard: float
+    kind: PairChange.Kind
+    def __init__(self, entry: _Optional[str] = ..., other: _Optional[str] = ..., jaccard: _Optional[float] = ..., kind: _Optional[_Union[PairChange.Kind, str]] = ...) -> None: ...
+
+class ChangeBatch(_message.Message):
+    __slots__ = ("epoch", "sequence", "full", "proteins", "removed_entries", "pairs")
+    EPOCH_FIELD_NUMBER: _ClassVar[int]
+    SEQUENCE_FIELD_NUMBER: _ClassVar[int]
+    FULL_FIELD_NUMBER: _ClassVar[int]
+    PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    REMOVED_ENTRIES_FIELD_NUMBER: _ClassVar[int]
+    PAIRS_FIELD_NUMBER: _ClassVar[int]
+    epoch: str
+    sequence: int
+    full: bool
+    proteins: _containers.RepeatedCompositeFieldContainer[Protein]
+    removed_entries: _containers.RepeatedScalarFieldContainer[str]
+    pairs: _containers.RepeatedCompositeFieldContainer[PairChange]
+    def __init__(self, epoch: _Optional[str] = ..., sequence: _Optional[int] = ..., full: bool = ..., proteins: _Optional[_Iterable[_Union[Protein, _Mapping]]] = ..., removed_entries: _Optional[_Iterable[str]] = ..., pairs: _Optional[_Iterable[_Union[PairChange, _Mapping]]] = ...) -> None: ...
+
+class StreamRequest(_message.Message):
+    __slots__ = ("memory_budget", "min_jaccard")
+    MEMORY_BUDGET_FIELD_NUMBER: _ClassVar[int]
+    MIN_JACCARD_FIELD_NUMBER: _ClassVar[int]
+    memory_budget: int
+    min_jaccard: float
+    def __init__(self, memory_budget: _Optional[int] = ..., min_jaccard: _Optional[float] = ...) -> None: ...
+
+class ThresholdRequest(_message.Message):
+    __slots__ = ("min_jaccard",)
+    MIN_JACCARD_FIELD_NUMBER: _ClassVar[int]
+    min_jaccard: float
+    def __init__(self, min_jaccard: _Optional[float] = ...) -> None: ...
+
+class CompactMatchesRequest(_message.Message):
+    __slots__ = ("format_version", "k", "min_jaccard", "quantize", "include_proteins", "include_sequence")
+    FORMAT_VERSION_FIELD_NUMBER: _ClassVar[int]
+    K_FIELD_NUMBER: _ClassVar[int]
+    MIN_JACCARD_FIELD_NUMBER: _ClassVar[int]
+    QUANTIZE_FIELD_NUMBER: _ClassVar[int]
+    INCLUDE_PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    INCLUDE_SEQUENCE_FIELD_NUMBER: _ClassVar[int]
+    format_version: int
+    k: int
+    min_jaccard: float
+    quantize: bool
+    include_proteins: bool
+    include_sequence: bool
+    def __init__(self, format_version: _Optional[int] = ..., k: _Optional[int] = ..., min_jaccard: _Optional[float] = ..., quantize: bool = ..., include_proteins: bool = ..., include_sequence: bool = ...) -> None: ...
+
+class CompactMatchBlock(_message.Message):
+    __slots__ = ("format_version", "entries", "proteins", "rows")
+    FORMAT_VERSION_FIELD_NUMBER: _ClassVar[int]
+    ENTRIES_FIELD_NUMBER: _ClassVar[int]
+    PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    ROWS_FIELD_NUMBER: _ClassVar[int]
+    format_version: int
+    entries: _containers.RepeatedScalarFieldContainer[str]
+    proteins: _containers.RepeatedCompositeFieldContainer[Protein]
+    rows: _containers.RepeatedCompositeFieldContainer[CompactMatchRow]
+    def __init__(self, format_version: _Optional[int] = ..., entries: _Optional[_Iterable[str]] = ..., proteins: _Optional[_Iterable[_Union[Protein, _Mapping]]] = ..., rows: _Optional[_Iterable[_Union[CompactMatchRow, _Mapping]]] = ...) -> None: ...
+
+class CompactMatchRow(_message.Message):
+    __slots__ = ("query", "indices", "scores", "quantized_scores", "total_matches")
+    QUERY_FIELD_NUMBER: _ClassVar[int]
+    INDICES_FIELD_NUMBER: _ClassVar[int]
+    SCORES_FIELD_NUMBER: _ClassVar[int]
+    QUANTIZED_SCORES_FIELD_NUMBER: _ClassVar[int]
+    TOTAL_MATCHES_FIELD_NUMBER: _ClassVar[int]
+    query: int
+    indices: _containers.RepeatedScalarFieldContainer[int]
+    scores: _containers.RepeatedScalarFieldContainer[float]
+    quantized_scores: _containers.RepeatedScalarFieldContainer[int]
+    total_matches: int
+    def __init__(self, query: _Optional[int] = ..., indices: _Optional[_Iterable[int]] = ..., scores: _Optional[_Iterable[float]] = ..., quantized_scores: _Optional[_Iterable[int]] = ..., total_matches: _Optional[int] = ...) -> None: ...
 
 class EntryList(_message.Message):
     __slots__ = ("entries",)
@@ -46,6 +203,14 @@ class EntryList(_message.Message):
     entries: _containers.RepeatedScalarFieldContainer[str]
     def __init__(self, entries: _Optional[_Iterable[str]] = ...) -> None: ...
 
+class ProteinDelta(_message.Message):
+    __slots__ = ("removed_ids", "proteins")
+    REMOVED_IDS_FIELD_NUMBER: _ClassVar[int]
+    PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    removed_ids: _containers.RepeatedScalarFieldContainer[str]
+    proteins: _containers.RepeatedCompositeFieldContainer[Protein]
+    def __init__(self, removed_ids: _Optional[_Iterable[str]] = ..., proteins: _Optional[_Iterable[_Union[Protein, _Mapping]]] = ...) -> None: ...
+
 class SaveStateRequest(_message.Message):
     __slots__ = ("state_name", "overwrite")
     STATE_NAME_FIELD_NUMBER: _ClassVar[int]
@@ -63,10 +228,22 @@ class RollbackRequest(_message.Message):
     def __init__(self, state_name: _Optional[str] = ..., confirm: bool = ...) -> None: ...
 
 class StateList(_message.Message):
-    __slots__ = ("names",)
+    __slots__ = ("names", "states")
     NAMES_FIELD_NUMBER: _ClassVar[int]
+    STATES_FIELD_NUMBER: _ClassVar[int]
     names: _containers.RepeatedScalarFieldContainer[str]
-    def __init__(self, names: _Optional[_Iterable[str]] = ...) -> None: ...
+    states: _containers.RepeatedCompositeFieldContainer[SavedStateInfo]
+    def __init__(self, names: _Optional[_Iterable[str]] = ..., states: _Optional[_Iterable[_Union[SavedStateInfo, _Mapping]]] = ...) -> None: ...
+
+class SavedStateInfo(_message.Message):
+    __slots__ = ("name", "bytes", "proteins")
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    BYTES_FIELD_NUMBER: _ClassVar[int]
+    PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    bytes: int
+    proteins: int
+    def __init__(self, name: _Optional[str] = ..., bytes: _Optional[int] = ..., proteins: _Optional[int] = ...) -> None: ...
 
 class StateName(_message.Message):
     __slots__ = ("name",)
@@ -74,6 +251,78 @@ class StateName(_message.Message):
     name: str
     def __init__(self, name: _Optional[str] = ...) -> None: ...
 
+class ApproximateRequest(_message.Message):
+    __slots__ = ("threshold", "num_perm", "bands")
+    THRESHOLD_FIELD_NUMBER: _ClassVar[int]
+    NUM_PERM_FIELD_NUMBER: _ClassVar[int]
+    BANDS_FIELD_NUMBER: _ClassVar[int]
+    threshold: float
+    num_perm: int
+    bands: int
+    def __init__(self, threshold: _Optional[float] = ..., num_perm: _Optional[int] = ..., bands: _Optional[int] = ...) -> None: ...
+
+class ApproximationReport(_message.Message):
+    __slots__ = ("threshold", "num_perm", "bands", "rows", "candidate_pairs", "approximate_pairs", "exact_pairs", "precision", "recall", "approximate_seconds", "exact_seconds")
+    THRESHOLD_FIELD_NUMBER: _ClassVar[int]
+    NUM_PERM_FIELD_NUMBER: _ClassVar[int]
+    BANDS_FIELD_NUMBER: _ClassVar[int]
+    ROWS_FIELD_NUMBER: _ClassVar[int]
+    CANDIDATE_PAIRS_FIELD_NUMBER: _ClassVar[int]
+    APPROXIMATE_PAIRS_FIELD_NUMBER: _ClassVar[int]
+    EXACT_PAIRS_FIELD_NUMBER: _ClassVar[int]
+    PRECISION_FIELD_NUMBER: _ClassVar[int]
+    RECALL_FIELD_NUMBER: _ClassVar[int]
+    APPROXIMATE_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    EXACT_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    threshold: float
+    num_perm: int
+    bands: int
+    rows: int
+    candidate_pairs: int
+    approximate_pairs: int
+    exact_pairs: int
+    precision: float
+    recall: float
+    approximate_seconds: float
+    exact_seconds: float
+    def __init__(self, threshold: _Optional[float] = ..., num_perm: _Optional[int] = ..., bands: _Optional[int] = ..., rows: _Optional[int] = ..., candidate_pairs: _Optional[int] = ..., approximate_pairs: _Optional[int] = ..., exact_pairs: _Optional[int] = ..., precision: _Optional[float] = ..., recall: _Optional[float] = ..., approximate_seconds: _Optional[float] = ..., exact_seconds: _Optional[float] = ...) -> None: ...
+
+class AnalyzerStats(_message.Message):
+    __slots__ = ("proteins", "unique_signatures", "dedup_ratio", "protein_pairs", "signature_pairs", "nonzero_pairs", "pending_signatures", "free_slots", "score_bytes")
+    PROTEINS_FIELD_NUMBER: _ClassVar[int]
+    UNIQUE_SIGNATURES_FIELD_NUMBER: _ClassVar[int]
+    DEDUP_RATIO_FIELD_NUMBER: _ClassVar[int]
+    PROTEIN_PAIRS_FIELD_NUMBER: _ClassVar[int]
+    SIGNATURE_PAIRS_FIELD_NUMBER: _ClassVar[int]
+    NONZERO_PAIRS_FIELD_NUMBER: _ClassVar[int]
+    PENDING_SIGNATURES_FIELD_NUMBER: _ClassVar[int]
+    FREE_SLOTS_FIELD_NUMBER: _ClassVar[int]
+    SCORE_BYTES_FIELD_NUMBER: _ClassVar[int]
+    proteins: int
+    unique_signatures: int
+    dedup_ratio: float
+    protein_pairs: int
+    signature_pairs: int
+    nonzero_pairs: int
+    pending_signatures: int
+    free_slots: int
+    score_bytes: int
+    def __init__(self, proteins: _Optional[int] = ..., unique_signatures: _Optional[int] = ..., dedup_ratio: _Optional[float] = ..., protein_pairs: _Optional[int] = ..., signature_pairs: _Optional[int] = ..., nonzero_pairs: _Optional[int] = ..., pending_signatures: _Optional[int] = ..., free_slots: _Optional[int] = ..., score_bytes: _Optional[int] = ...) -> None: ...
+
+class HistoryStats(_message.Message):
+    __slots__ = ("depth", "bytes", "checkpoints", "max_depth", "max_bytes")
+    DEPTH_FIELD_NUMBER: _ClassVar[int]
+    BYTES_FIELD_NUMBER: _ClassVar[int]
+    CHECKPOINTS_FIELD_NUMBER: _ClassVar[int]
+    MAX_DEPTH_FIELD_NUMBER: _ClassVar[int]
+    MAX_BYTES_FIELD_NUMBER: _ClassVar[int]
+    depth: int
+    bytes: int
+    checkpoints: int
+    max_depth: int
+    max_bytes: int
+    def __init__(self, depth: _Optional[int] = ..., bytes: _Optional[int] = ..., checkpoints: _Optional[int] = ..., max_depth: _Optional[int] = ..., max_bytes: _Optional[int] = ...) -> None: ...
+
 class Protein(_message.Message):
     __slots__ = ("id", "entry", "reviewed", "entry_name", "protein_names", "gene_names", "organism", "interpro", "ec_number", "sequence")
     ID_FIELD_NUMBER: _ClassVar[int]
@@ -39,6 +39,11 @@ class PassStub(object):
                 request_serializer=methods__pb2.ProteinBatch.SerializeToString,
                 response_deserializer=methods__pb2.Ack.FromString,
                 _registered_method=True)
+        self.AddProteinStream = channel.stream_unary(
+                '/grpc.Pass/AddProteinStream',
+                request_serializer=methods__pb2.ProteinBatch.SerializeToString,
+                response_deserializer=methods__pb2.Ack.FromString,
+                _registered_method=True)
         self.CalculateBestMatches = channel.unary_stream(
                 '/grpc.Pass/CalculateBestMatches',
                 request_serializer=methods__pb2.Empty.SerializeToString,
@@ -49,6 +54,41 @@ class PassStub(object):
                 request_serializer=methods__pb2.Empty.SerializeToString,
                 response_deserializer=methods__pb2.MatchResult.FromString,
                 _registered_method=True)
+        self.StreamAllPairs = channel.unary_stream(
+                '/grpc.Pass/StreamAllPairs',
+                request_serializer=methods__pb2.StreamRequest.SerializeToString,
+                response_deserializer=methods__pb2.MatchResult.FromString,
+                _registered_method=True)
+        self.CalculateTopMatches = channel.unary_stream(
+                '/grpc.Pass/CalculateTopMatches',
+                request_serializer=methods__pb2.TopMatchesRequest.SerializeToString,
+                response_deserializer=methods__pb2.MatchResult.FromString,
+                _registered_method=True)
+        self.CalculateTopMatchBatches = channel.unary_stream(
+                '/grpc.Pass/CalculateTopMatchBatches',
+                request_serializer=methods__pb2.TopMatchesRequest.SerializeToString,
+                response_deserializer=methods__pb2.MatchResultBatch.FromString,
+                _registered_method=True)
+        self.CalculateThresholdPairs = channel.unary_stream(
+                '/grpc.Pass/CalculateThresholdPairs',
+                request_serializer=methods__pb2.ThresholdRequest.SerializeToString,
+                response_deserializer=methods__pb2.MatchResult.FromString,
+                _registered_method=True)
+        self.CalculateCompactMatches = channel.unary_stream(
+                '/grpc.Pass/CalculateCompactMatches',
+                request_serializer=methods__pb2.CompactMatchesRequest.SerializeToString,
+                response_deserializer=methods__pb2.CompactMatchBlock.FromString,
+                _registered_method=True)
+        self.QueryNeighbours = channel.stream_stream(
+                '/grpc.Pass/QueryNeighbours',
+                request_serializer=methods__pb2.NeighbourQuery.SerializeToString,
+                response_deserializer=methods__pb2.NeighbourResult.FromString,
+                _registered_method=True)
+        self.StreamChanges = channel.unary_stream(
+                '/grpc.Pass/StreamChanges',
+                request_serializer=methods__pb2.ChangesRequest.SerializeToString,
+                response_deserializer=methods__pb2.ChangeBatch.FromString,
+                _registered_method=True)
         self.DeleteProteins = channel.unary_unary(
                 '/grpc.Pass/DeleteProteins',
                 request_serializer=methods__pb2.EntryList.SerializeToString,
@@ -59,6 +99,11 @@ class PassStub(object):
                 request_serializer=methods__pb2.Empty.SerializeToString,
                 response_deserializer=methods__pb2.Ack.FromString,
                 _registered_method=True)
+        self.ComputePending = channel.unary_unary(
+                '/grpc.Pass/ComputePending',
+                request_serializer=methods__pb2.Empty.SerializeToString,
+                response_deserializer=methods__pb2.Ack.FromString,
+                _registered_method=True)
         self.SaveState = channel.unary_unary(
                 '/grpc.Pass/SaveState',
                 request_serializer=methods__pb2.SaveStateRequest.SerializeToString,
@@ -79,6 +124,26 @@ class PassStub(object):
                 request_serializer=methods__pb2.StateName.SerializeToString,
                 response_deserializer=methods__pb2.Ack.FromString,
                 _registered_method=True)
+        self.CalculateApproximateMatches = channel.unary_stream(
+                '/grpc.Pass/CalculateApproximateMatches',
+                request_serializer=methods__pb2.ApproximateRequest.SerializeToString,
+                response_deserializer=methods__pb2.MatchResult.FromString,
+                _registered_method=True)
+        self.EvaluateApproximateMatches = channel.unary_unary(
+                '/grpc.Pass/EvaluateApproximateMatches',
+                request_serializer=methods__pb2.ApproximateRequest.SerializeToString,
+                response_deserializer=methods__pb2.ApproximationReport.FromString,
+                _registered_method=True)
+        self.GetStats = channel.unary_unary(
+                '/grpc.Pass/GetStats',
+                request_serializer=methods__pb2.Empty.SerializeToString,
+                response_deserializer=methods__pb2.AnalyzerStats.FromString,
+                _registered_method=True)
+        self.GetHistoryStats = channel.unary_unary(
+                '/grpc.Pass/GetHistoryStats',
+                request_serializer=methods__pb2.Empty.SerializeToString,
+                response_deserializer=methods__pb2.HistoryStats.FromString,
+                _registered_method=True)
 
 
 class PassServicer(object):
@@ -90,6 +155,12 @@ class PassServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AddProteinStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def CalculateBestMatches(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -102,6 +173,48 @@ class PassServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamAllPairs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CalculateTopMatches(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CalculateTopMatchBatches(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CalculateThresholdPairs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CalculateCompactMatches(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def QueryNeighbours(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamChanges(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def DeleteProteins(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -114,6 +227,12 @@ class PassServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ComputePending(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SaveState(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -138,6 +257,30 @@ class PassServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CalculateApproximateMatches(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EvaluateApproximateMatches(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetHistoryStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_PassServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -146,6 +289,11 @@ def add_PassServicer_to_server(servicer, server):
                     request_deserializer=methods__pb2.ProteinBatch.FromString,
                     response_serializer=methods__pb2.Ack.SerializeToString,
             ),
+            'AddProteinStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.AddProteinStream,
+                    request_deserializer=methods__pb2.ProteinBatch.FromString,
+                    response_serializer=methods__pb2.Ack.SerializeToString,
+            ),
             'CalculateBestMatches': grpc.unary_stream_rpc_method_handler(
                     servicer.CalculateBestMatches,
                     request_deserializer=methods__pb2.Empty.FromString,
@@ -156,6 +304,41 @@ def add_PassServicer_to_server(servicer, server):
                     request_deserializer=methods__pb2.Empty.FromString,
                     response_serializer=methods__pb2.MatchResult.SerializeToString,
             ),
+            'StreamAllPairs': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamAllPairs,
+                    request_deserializer=methods__pb2.StreamRequest.FromString,
+                    response_serializer=methods__pb2.MatchResult.SerializeToString,
+            ),
+            'CalculateTopMatches': grpc.unary_stream_rpc_method_handler(
+                    servicer.CalculateTopMatches,
+                    request_deserializer=methods__pb2.TopMatchesRequest.FromString,
+                    response_serializer=methods__pb2.MatchResult.SerializeToString,
+            ),
+            'CalculateTopMatchBatches': grpc.unary_stream_rpc_method_handler(
+                    servicer.CalculateTopMatchBatches,
+                    request_deserializer=methods__pb2.TopMatchesRequest.FromString,
+                    response_serializer=methods__pb2.MatchResultBatch.SerializeToString,
+            ),
+            'CalculateThresholdPairs': grpc.unary_stream_rpc_method_handler(
+                    servicer.CalculateThresholdPairs,
+                    request_deserializer=methods__pb2.ThresholdRequest.FromString,
+                    response_serializer=methods__pb2.MatchResult.SerializeToString,
+            ),
+            'CalculateCompactMatches': grpc.unary_stream_rpc_method_handler(
+                    servicer.CalculateCompactMatches,
+                    request_deserializer=methods__pb2.CompactMatchesRequest.FromString,
+                    response_serializer=methods__pb2.CompactMatchBlock.SerializeToString,
+            ),
+            'QueryNeighbours': grpc.stream_stream_rpc_method_handler(
+                    servicer.QueryNeighbours,
+                    request_deserializer=methods__pb2.NeighbourQuery.FromString,
+                    response_serializer=methods__pb2.NeighbourResult.SerializeToString,
+            ),
+            'StreamChanges': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamChanges,
+                    request_deserializer=methods__pb2.ChangesRequest.FromString,
+                    response_serializer=methods__pb2.ChangeBatch.SerializeToString,
+            ),
             'DeleteProteins': grpc.unary_unary_rpc_method_handler(
                     servicer.DeleteProteins,
                     request_deserializer=methods__pb2.EntryList.FromString,
@@ -166,6 +349,11 @@ def add_PassServicer_to_server(servicer, server):
                     request_deserializer=methods__pb2.Empty.FromString,
                     response_serializer=methods__pb2.Ack.SerializeToString,
             ),
+            'ComputePending': grpc.unary_unary_rpc_method_handler(
+                    servicer.ComputePending,
+                    request_deserializer=methods__pb2.Empty.FromString,
+                    response_serializer=methods__pb2.Ack.SerializeToString,
+            ),
             'SaveState': grpc.unary_unary_rpc_method_handler(
                     servicer.SaveState,
                     request_deserializer=methods__pb2.SaveStateRequest.FromString,
@@ -186,6 +374,26 @@ def add_PassServicer_to_server(servicer, server):
                     request_deserializer=methods__pb2.StateName.FromString,
                     response_serializer=methods__pb2.Ack.SerializeToString,
             ),
+            'CalculateApproximateMatches': grpc.unary_stream_rpc_method_handler(
+                    servicer.CalculateApproximateMatches,
+                    request_deserializer=methods__pb2.ApproximateRequest.FromString,
+                    response_serializer=methods__pb2.MatchResult.SerializeToString,
+            ),
+            'EvaluateApproximateMatches': grpc.unary_unary_rpc_method_handler(
+                    servicer.EvaluateApproximateMatches,
+                    request_deserializer=methods__pb2.ApproximateRequest.FromString,
+                    response_serializer=methods__pb2.ApproximationReport.SerializeToString,
+            ),
+            'GetStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetStats,
+                    request_deserializer=methods__pb2.Empty.FromString,
+                    response_serializer=methods__pb2.AnalyzerStats.SerializeToString,
+            ),
+            'GetHistoryStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetHistoryStats,
+                    request_deserializer=methods__pb2.Empty.FromString,
+                    response_serializer=methods__pb2.HistoryStats.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'grpc.Pass', rpc_method_handlers)
@@ -224,6 +432,33 @@ class Pass(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def AddProteinStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/grpc.Pass/AddProteinStream',
+            methods__pb2.ProteinBatch.SerializeToString,
+            methods__pb2.Ack.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def CalculateBestMatches(request,
             target,
@@ -278,6 +513,195 @@ class Pass(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def StreamAllPairs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/StreamAllPairs',
+            methods__pb2.StreamRequest.SerializeToString,
+            methods__pb2.MatchResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CalculateTopMatches(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/CalculateTopMatches',
+            methods__pb2.TopMatchesRequest.SerializeToString,
+            methods__pb2.MatchResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CalculateTopMatchBatches(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/CalculateTopMatchBatches',
+            methods__pb2.TopMatchesRequest.SerializeToString,
+            methods__pb2.MatchResultBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CalculateThresholdPairs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/CalculateThresholdPairs',
+            methods__pb2.ThresholdRequest.SerializeToString,
+            methods__pb2.MatchResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CalculateCompactMatches(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/CalculateCompactMatches',
+            methods__pb2.CompactMatchesRequest.SerializeToString,
+            methods__pb2.CompactMatchBlock.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def QueryNeighbours(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/grpc.Pass/QueryNeighbours',
+            methods__pb2.NeighbourQuery.SerializeToString,
+            methods__pb2.NeighbourResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamChanges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/StreamChanges',
+            methods__pb2.ChangesRequest.SerializeToString,
+            methods__pb2.ChangeBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def DeleteProteins(request,
             target,
@@ -332,6 +756,33 @@ class Pass(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ComputePending(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/grpc.Pass/ComputePending',
+            methods__pb2.Empty.SerializeToString,
+            methods__pb2.Ack.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def SaveState(request,
             target,
@@ -439,3 +890,111 @@ class Pass(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def CalculateApproximateMatches(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grpc.Pass/CalculateApproximateMatches',
+            methods__pb2.ApproximateRequest.SerializeToString,
+            methods__pb2.MatchResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EvaluateApproximateMatches(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/grpc.Pass/EvaluateApproximateMatches',
+            methods__pb2.ApproximateRequest.SerializeToString,
+            methods__pb2.ApproximationReport.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/grpc.Pass/GetStats',
+            methods__pb2.Empty.SerializeToString,
+            methods__pb2.AnalyzerStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetHistoryStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/grpc.Pass/GetHistoryStats',
+            methods__pb2.Empty.SerializeToString,
+            methods__pb2.HistoryStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,45 @@
+import importlib
+import random
+import sys
+import time
+import numpy as np
+import server
+
+# Usage: python neighbours-benchmark.py [proteins] [lookups] [k]
+PROTEINS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+LOOKUPS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+K = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+# Same data distribution as the recovery benchmark
+recovery = importlib.import_module("recovery-benchmark")
+
+def lookups(analyzer, ids):
+    """Latency in ms of one top_matches lookup (as QueryNeighbours answers it) per ID."""
+    latencies = []
+    for p_id in ids:
+        start = time.perf_counter()
+        with analyzer.pinned() as version:
+            analyzer.top_matches(p_id, K, 0.0, version)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def report(label, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label}: p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {latencies.max():.2f} ms")
+
+def run():
+    print(f"--- Neighbour Lookup Benchmark ({PROTEINS} proteins, {LOOKUPS} lookups, k={K}) ---")
+    proteins = recovery.synthetic_proteins(PROTEINS)
+    analyzer = server.ProteinAnalyzer()
+    recovery.ingest(analyzer, proteins)
+    ids = [p.id for p in random.Random(1).sample(proteins, min(LOOKUPS, len(proteins)))]
+
+    # Every row pending: candidates are scored from the bitsets
+    report("Not computed yet (bitset popcount)", lookups(analyzer, ids))
+    start = time.time()
+    analyzer.compute_all()
+    print(f"compute_all: {time.time() - start:.2f}s")
+    # Stored rows: candidates are gathered from the score array
+    report("Computed (score array gather)", lookups(analyzer, ids))
+
+if __name__ == '__main__':
+    run()
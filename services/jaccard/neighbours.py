@@ -0,0 +1,45 @@
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+import sys
+import time
+
+# Usage: python neighbours.py [ENTRY | "IPR...;IPR...;"]...
+# Without arguments, queries are read from stdin, one per line. A query containing ';'
+# is an InterPro list for a protein that is not stored.
+TOP_K = 10
+
+def queries(lines, sent):
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        query = methods_pb2.NeighbourQuery(query_id=str(i), k=TOP_K)
+        if ';' in line:
+            query.interpro = line
+        else:
+            query.entry = line
+        sent[query.query_id] = (line, time.perf_counter())
+        yield query
+
+def run():
+    lines = sys.argv[1:] or sys.stdin
+    print(f"--- Neighbour Query (top {TOP_K}) ---")
+    with grpc.insecure_channel('localhost:50051') as channel:
+        stub = methods_pb2_grpc.PassStub(channel)
+        sent = {}
+        try:
+            for result in stub.QueryNeighbours(queries(lines, sent)):
+                line, start = sent.pop(result.query_id)
+                elapsed = (time.perf_counter() - start) * 1000
+                if not result.found:
+                    print(f"{line}: {result.error} ({elapsed:.1f} ms)")
+                    continue
+                print(f"{line}: {result.total_matches} neighbours ({elapsed:.1f} ms)")
+                for c in result.correlations:
+                    print(f"  - {c.entry}: {c.jaccard:.4f}")
+        except grpc.RpcError as e:
+            print(f"RPC Error: {e.details()}")
+
+if __name__ == '__main__':
+    run()
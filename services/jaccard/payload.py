@@ -0,0 +1,23 @@
+import methods_pb2
+
+# Proteins per streamed ProteinBatch
+CHUNK_SIZE = 1000
+
+def dict_to_proto(d):
+    """Protein of one {Entry, InterPro, Sequence} dict of an /inject payload."""
+    return methods_pb2.Protein(
+        id=d.get("Entry"),
+        entry=d.get("Entry"),
+        interpro=d.get("InterPro"),
+        sequence=d.get("Sequence")
+    )
+
+def protein_batches(payload):
+    """A list of such dicts as ProteinBatches of CHUNK_SIZE proteins, for AddProteinStream.
+    The final one is marked last, so the server knows the stream was not cut short."""
+    starts = range(0, len(payload), CHUNK_SIZE) or [0]
+    for start in starts:
+        yield methods_pb2.ProteinBatch(
+            proteins=[dict_to_proto(d) for d in payload[start:start + CHUNK_SIZE]],
+            last=start == starts[-1]
+        )
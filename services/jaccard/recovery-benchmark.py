@@ -0,0 +1,121 @@
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import methods_pb2
+import server
+from wal import CHECKPOINT_FILE, WriteAheadLog
+
+# Usage: python recovery-benchmark.py [proteins | file.json]
+SOURCE = sys.argv[1] if len(sys.argv) > 1 else "50000"
+BATCH_SIZE = 1000
+# Operations logged after the last checkpoint, replayed on recovery
+TAIL_BATCHES = 10
+DOMAINS = 8000
+
+def synthetic_proteins(count, seed=0):
+    """Proteins with 1-8 InterPro IDs drawn from a skewed pool, so many share signatures."""
+    rnd = random.Random(seed)
+    pool = [f"IPR{i:06d}" for i in range(DOMAINS)]
+    weights = [1 / (i + 1) for i in range(DOMAINS)]
+    proteins = []
+    for i in range(count):
+        domains = set(rnd.choices(pool, weights, k=rnd.randint(1, 8)))
+        proteins.append(methods_pb2.Protein(
+            id=f"B{seed}_{i}", entry=f"BENCH{seed}_{i}", interpro=";".join(sorted(domains)) + ";"
+        ))
+    return proteins
+
+def file_proteins(path):
+    with open(path) as f:
+        data = json.load(f)
+    return [
+        methods_pb2.Protein(
+            id=d.get('_id', {}).get('$oid', d.get('Entry')),
+            entry=d.get('Entry', ''),
+            interpro=d.get('InterPro', ''),
+            sequence=d.get('Sequence', '')
+        )
+        for d in data
+    ]
+
+def checkpoint_bytes(directory):
+    """Size of the checkpoint and the score files it uses."""
+    return sum(
+        os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+        if name == CHECKPOINT_FILE or name.startswith("scores-")
+    )
+
+def ingest(analyzer, proteins):
+    for i in range(0, len(proteins), BATCH_SIZE):
+        analyzer.add_batch(methods_pb2.ProteinBatch(proteins=proteins[i:i + BATCH_SIZE]))
+
+def run():
+    proteins = file_proteins(SOURCE) if SOURCE.endswith(".json") else synthetic_proteins(int(SOURCE))
+    tail = synthetic_proteins(TAIL_BATCHES * BATCH_SIZE // 10, seed=1)
+    print(f"--- Recovery Benchmark ({len(proteins)} proteins) ---")
+    directory = tempfile.mkdtemp(prefix="jaccard-wal-")
+    try:
+        # Cold start without a log: re-inject everything and recompute all pairs
+        start = time.time()
+        cold = server.ProteinAnalyzer()
+        ingest(cold, proteins)
+        cold.compute_all()
+        rebuild = time.time() - start
+        del cold
+
+        # A logged server: checkpoint, then a tail of operations, then "crash"
+        analyzer = server.ProteinAnalyzer()
+        analyzer.recover(WriteAheadLog(directory, fsync=server.WAL_FSYNC))
+        start = time.time()
+        ingest(analyzer, proteins)
+        analyzer.compute_all()
+        logged = time.time() - start
+        start = time.time()
+        analyzer.checkpoint()
+        checkpoint = time.time() - start
+        full_bytes = checkpoint_bytes(directory)
+        # Half the tail is computed and checkpointed again: only its scores are written
+        for i in range(TAIL_BATCHES):
+            if i == TAIL_BATCHES // 2:
+                analyzer.compute_all()
+                start = time.time()
+                analyzer.checkpoint()
+                delta_checkpoint = time.time() - start
+                delta_bytes = sum(
+                    os.path.getsize(os.path.join(directory, name))
+                    for name in os.listdir(directory) if name.endswith(".delta")
+                )
+            batch = tail[i * len(tail) // TAIL_BATCHES:(i + 1) * len(tail) // TAIL_BATCHES]
+            analyzer.add_batch(methods_pb2.ProteinBatch(proteins=batch))
+            analyzer.delete_proteins([p.entry for p in proteins[i::97][:10]])
+        analyzer.wal.close()
+        del analyzer
+
+        # Restart: load the checkpoint and replay the tail. Reads are served from here on;
+        # pairs of the replayed proteins are scored on demand until compute_all runs.
+        start = time.time()
+        recovered = server.ProteinAnalyzer()
+        recovered.recover(WriteAheadLog(directory, fsync=server.WAL_FSYNC))
+        loaded = time.time() - start
+        start = time.time()
+        recovered.compute_all()
+        tail_scoring = time.time() - start
+        # Let the post-recovery checkpoint finish before the directory goes away
+        recovered._checkpoint_thread.join()
+
+        print(f"Ingest + compute with the log: {logged:.2f}s")
+        print(f"Checkpoint ({full_bytes / 1e6:.1f} MB): {checkpoint:.2f}s")
+        print(f"Next checkpoint (score delta {delta_bytes / 1e6:.1f} MB): {delta_checkpoint:.2f}s")
+        print(f"Re-inject + recompute (no log): {rebuild:.2f}s")
+        print(f"Restart to ready (checkpoint + {TAIL_BATCHES} ops): {loaded:.2f}s ({rebuild / loaded:.1f}x faster)")
+        print(f"Scoring the {len(tail)} replayed proteins: {tail_scoring:.2f}s")
+        print(f"Recovered proteins: {len(recovered.proteins)}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == '__main__':
+    run()
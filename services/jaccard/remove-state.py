@@ -12,10 +12,10 @@ def run():
         # If no argument provided, list existing states
         if len(sys.argv) < 2:
             state_list = stub.GetSavedStates(methods_pb2.Empty())
-            if state_list.names:
+            if state_list.states:
                 print("Existing saved states:")
-                for i, name in enumerate(state_list.names, 1):
-                    print(f"  {i}. {name}")
+                for i, state in enumerate(state_list.states, 1):
+                    print(f"  {i}. {state.name} ({state.proteins} proteins, {state.bytes / 1e6:.1f} MB)")
             else:
                 print("No saved states found.")
             print("\nUsage: python remove-state.py <state_name>")
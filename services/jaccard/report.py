@@ -0,0 +1,17 @@
+def report_lines(rows):
+    """print.py's report of (entry, correlations, total_matches) rows, line by line."""
+    count = 0
+    total_correlations = 0
+    for entry, correlations, num_corr in rows:
+        count += 1
+        total_correlations += num_corr
+        yield f"[{count}] {entry}"
+        yield f"    Correlations: {num_corr} non-zero pairs (excluding self)"
+        for other, jaccard in correlations:
+            yield f"      - {other}: {jaccard:.4f}"
+        if num_corr > len(correlations):
+            yield f"      ... and {num_corr - len(correlations)} more"
+    if count == 0:
+        yield "No data."
+    else:
+        yield f"\nSummary: {count} proteins, avg {total_correlations / count:.1f} non-zero correlations per protein"
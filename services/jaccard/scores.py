@@ -0,0 +1,164 @@
+import threading
+import numpy as np
+
+class PairScores:
+    """Jaccard score of every pair of protein slots in one condensed triangular float32 array.
+
+    Slots are the dense row numbers handed out by DomainBitsets (freed slots are reused).
+    Pair (i, j) with i > j lives at i * (i - 1) // 2 + j: the pdist layout, row-major
+    over the lower triangle, so adding a slot only appends its row and growing the
+    array never moves existing scores. Pairs never written read as 0.0.
+
+    Only slots 0..slots-1 have room in the array; the array is grown when scores are
+    written, not when slots are handed out, and never past a byte cap (see ensure).
+
+    Once take_written() has been called, the positions written through set_row and
+    set_pairs are tracked, so WAL checkpoints only store what changed (see wal.py).
+    """
+
+    def __init__(self, capacity=1024):
+        self.slots = 0
+        self.data = np.zeros(capacity, dtype=np.float32)
+        # Index arrays written since the last take_written(): None before its first
+        # call, True once they cover too much of the array to be worth listing
+        self._written = None
+        self._written_count = 0
+        self._written_lock = threading.Lock()
+
+    @staticmethod
+    def index(i, j):
+        if i < j:
+            i, j = j, i
+        return i * (i - 1) // 2 + j
+
+    def _indices(self, i, others):
+        others = np.asarray(others, dtype=np.int64)
+        hi = np.maximum(others, i)
+        lo = np.minimum(others, i)
+        return hi * (hi - 1) // 2 + lo
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def size(self):
+        return self.slots * (self.slots - 1) // 2
+
+    @staticmethod
+    def max_slots(max_bytes):
+        """Most slots whose pairs fit in max_bytes."""
+        pairs = max_bytes // np.dtype(np.float32).itemsize
+        slots = int((1 + np.sqrt(1 + 8 * pairs)) // 2)
+        while slots * (slots - 1) // 2 > pairs:
+            slots -= 1
+        return slots
+
+    def ensure(self, slots, max_bytes=None):
+        """Make room for slots 0..slots-1, or as many as fit in max_bytes, growing the
+        array in amortized doubling chunks (never past max_bytes). Returns the slots
+        covered."""
+        limit = None
+        if max_bytes is not None:
+            limit = max(len(self.data), max_bytes // self.data.itemsize)
+            slots = min(slots, self.max_slots(max_bytes))
+        if slots <= self.slots:
+            return self.slots
+        needed = slots * (slots - 1) // 2
+        if needed > len(self.data):
+            size = max(needed, 2 * len(self.data))
+            if limit is not None:
+                size = max(needed, min(size, limit))
+            data = np.zeros(size, dtype=np.float32)
+            data[:len(self.data)] = self.data
+            self.data = data
+        self.slots = slots
+        return slots
+
+    def get(self, i, j):
+        return float(self.data[self.index(i, j)])
+
+    def set(self, i, j, score):
+        index = self.index(i, j)
+        self.data[index] = score
+        self._wrote(np.array([index], dtype=np.int64))
+
+    def row(self, i, others, diagonal=0.0):
+        """Scores of slot i against every slot in others; entries equal to i read diagonal."""
+        others = np.asarray(others, dtype=np.int64)
+        indices = self._indices(i, others)
+        same = others == i
+        indices[same] = 0
+        scores = self.data[indices]
+        scores[same] = diagonal
+        return scores
+
+    def set_row(self, i, others, scores):
+        indices = self._indices(i, others)
+        self.data[indices] = scores
+        self._wrote(indices)
+
+    def set_pairs(self, first, second, scores):
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        hi = np.maximum(first, second)
+        lo = np.minimum(first, second)
+        indices = hi * (hi - 1) // 2 + lo
+        self.data[indices] = scores
+        self._wrote(indices)
+
+    def _wrote(self, indices):
+        if self._written is None:
+            return
+        with self._written_lock:
+            if self._written is None or self._written is True:
+                return
+            self._written.append(indices)
+            self._written_count += len(indices)
+            if self._written_count > self.size() // 4:
+                self._written = True
+
+    def take_written(self):
+        """Positions written since the previous call, sorted, or True when that may be
+        any of them: on the first call, which starts tracking, and once they outnumber a
+        quarter of the pairs."""
+        with self._written_lock:
+            written, self._written, self._written_count = self._written, [], 0
+        if written is None or written is True:
+            return True
+        if not written:
+            return np.empty(0, dtype=np.int64)
+        written = np.sort(np.concatenate(written))
+        return written[np.append(True, written[1:] != written[:-1])]
+
+    def clear_slots(self, free):
+        """Zero every pair involving a slot where the boolean array free is set."""
+        free = np.asarray(free, dtype=bool)[:self.slots]
+        rows = np.flatnonzero(free)
+        if len(rows) == 0:
+            return
+        for i in range(1, len(free)):
+            start = i * (i - 1) // 2
+            if free[i]:
+                self.data[start:start + i] = 0.0
+            else:
+                self.data[start + rows[:np.searchsorted(rows, i)]] = 0.0
+
+    def clear(self):
+        self.data[:self.size()] = 0.0
+        with self._written_lock:
+            if self._written is not None:
+                self._written = True
+
+    def compacted(self, old_slots):
+        """Copy keeping only old_slots (ascending), renumbered 0..n-1 in that order.
+        Those beyond this array's slots stay beyond the copy's."""
+        n = int(np.searchsorted(old_slots, self.slots))
+        out = PairScores(capacity=max(1, n * (n - 1) // 2))
+        out.slots = n
+        for i in range(1, n):
+            start = i * (i - 1) // 2
+            out.data[start:start + i] = self.row(old_slots[i], old_slots[:i])
+        return out
+
+    def count_nonzero(self):
+        return int(np.count_nonzero(self.data[:self.size()]))
@@ -1,45 +1,92 @@
 import grpc
 import methods_pb2
 import methods_pb2_grpc
+from compact import read_block
 import json
+import os
 import requests
 import sys
 
 API_URL = "http://localhost:8080/api/proteins"
+# Proteins per POST of a full resync
+POST_CHUNK = 1000
+# Change-feed position (epoch and sequence) of the last successful send
+CURSOR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "send_cursor.json")
 
-def proto_to_json_dict(match):
-    """Convert match result to JSON format with JaccardCorrelations as list."""
+def to_json_dict(entry, correlations):
+    """Convert one decoded row to JSON format with JaccardCorrelations as list."""
     correlations_list = []
-    for c in match.correlations:
+    for other, jaccard in correlations:
         correlations_list.append({
-            "Entry": c.entry,
-            "Jaccard": c.jaccard
+            "Entry": other,
+            "Jaccard": jaccard
         })
 
     return {
-        "Entry": match.query_protein.entry,
+        "Entry": entry,
         "JaccardCorrelations": correlations_list
     }
 
-def run():
-    print("--- Client: Fetching data and POSTing via HTTP ---")
-    
-    all_matches_json = []
+def load_cursor():
     try:
-        with grpc.insecure_channel('localhost:50051') as channel:
-            stub = methods_pb2_grpc.PassStub(channel)
-            print("1. Requesting data...")
-            for match in stub.CalculateBestMatches(methods_pb2.Empty()):
-                all_matches_json.append(proto_to_json_dict(match))
-                
-    except grpc.RpcError as e:
-        print(f"ERROR: {e.details()}")
-        sys.exit(1)
+        with open(CURSOR_FILE) as f:
+            cursor = json.load(f)
+        return cursor["epoch"], cursor["sequence"]
+    except (OSError, ValueError, KeyError):
+        return "", 0
 
-    if not all_matches_json:
-        print("INFO: No data to send.")
-        return
+def save_cursor(epoch, sequence):
+    with open(CURSOR_FILE, 'w') as f:
+        json.dump({"epoch": epoch, "sequence": sequence}, f)
+
+def changes_payload(batches):
+    """JSON list of the proteins whose correlations changed in the ChangeBatch messages
+    batches (not a full resync), each with just the changed ones (0.0 for pairs that
+    are gone)."""
+    correlations = {}
+    for batch in batches:
+        for p in batch.proteins:
+            correlations.setdefault(p.entry, [])
+        if batch.removed_entries:
+            print(f"   {len(batch.removed_entries)} entries removed (not forwarded: the API has no delete)")
+        for pair in batch.pairs:
+            correlations.setdefault(pair.entry, []).append((pair.other, pair.jaccard))
+            correlations.setdefault(pair.other, []).append((pair.entry, pair.jaccard))
+    return [to_json_dict(entry, pairs) for entry, pairs in correlations.items()]
 
+def post_all(blocks, entries=None):
+    """POST every protein of a CalculateCompactMatches stream, expanded to every pair
+    (zeros included) as CalculateBestMatches sends it, POST_CHUNK proteins at a time:
+    blocks are converted as they arrive, never the whole export at once. entries
+    collects the entry dictionary when the stream is passed in several calls. Returns
+    whether every POST succeeded."""
+    entries = [] if entries is None else entries
+    chunk = []
+    for block in blocks:
+        for entry, _, correlations, _ in read_block(block, entries, [], dense=True):
+            chunk.append(to_json_dict(entry, correlations))
+            if len(chunk) == POST_CHUNK:
+                if not delivered(post(chunk)):
+                    return False
+                chunk = []
+    return not chunk or delivered(post(chunk))
+
+def fetch_changes(stub, epoch, since):
+    """(cursor, JSON list) of the changes since the cursor, None as the list when the
+    server needs a full resync."""
+    cursor = (epoch, since)
+    batches = []
+    call = stub.StreamChanges(methods_pb2.ChangesRequest(since=since, epoch=epoch))
+    for batch in call:
+        cursor = (batch.epoch, batch.sequence)
+        if batch.full:
+            call.cancel()
+            return cursor, None
+        batches.append(batch)
+    return cursor, changes_payload(batches)
+
+def post(all_matches_json):
+    """POST to the Neo4j API; the response, or None if it could not be reached."""
     print(f"Fetched {len(all_matches_json)} proteins.")
     print(f"2. Sending to {API_URL}")
     
@@ -56,5 +103,39 @@ def run():
     except Exception as e:
         print(f"Server is not open")
 
+def delivered(response):
+    return response is not None and response.ok
+
+def run():
+    print("--- Client: Fetching data and POSTing via HTTP ---")
+    
+    try:
+        with grpc.insecure_channel('localhost:50051') as channel:
+            stub = methods_pb2_grpc.PassStub(channel)
+            epoch, since = load_cursor()
+            print(f"1. Requesting changes since {since}...")
+            cursor, all_matches_json = fetch_changes(stub, epoch, since)
+            if all_matches_json is None:
+                # The export is at least as new as the cursor: changes after it that
+                # it already holds are sent again next time, which is harmless
+                print("   Full resync needed, sending everything...")
+                if post_all(stub.CalculateCompactMatches(methods_pb2.CompactMatchesRequest())):
+                    save_cursor(*cursor)
+                return
+
+    except grpc.RpcError as e:
+        print(f"ERROR: {e.details()}")
+        sys.exit(1)
+
+    if not all_matches_json:
+        print("INFO: No data to send.")
+        save_cursor(*cursor)
+        return
+
+    response = post(all_matches_json)
+    if delivered(response):
+        save_cursor(*cursor)
+    return response
+
 if __name__ == '__main__':
     run()
\ No newline at end of file
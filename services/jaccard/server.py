@@ -1,228 +1,1381 @@
 import grpc
+import bisect
 import time
-import copy
+import contextlib
 import threading
 from concurrent import futures
 import methods_pb2
 import methods_pb2_grpc
 from itertools import combinations
 import sys
+import os
+import engines
+import numpy as np
+from bitsets import DomainBitsets
+from scores import PairScores
+from versions import CowDict, IndexVersion
+from journal import HistoryJournal, JournalEntry
+from statestore import StateStore
+from wal import ADD, DELETE, JUMP, WriteAheadLog
+from compact import COMPACT_FORMAT_VERSION, quantize, stripped_protein
+from changes import ChangeLog
 
 _ONE_DAY_IN_SECONDS = 60 * 60 * 24
 
+# Compute backend used by compute_all: "python" (per-pair set operations),
+# "sparse" (one sparse matrix product) or "process" (bitset tiles on a process pool),
+# see engines.py.
+COMPUTE_BACKENDS = ("python", "sparse", "process")
+DEFAULT_BACKEND = os.getenv("JACCARD_BACKEND", "sparse")
+# Worker processes used by the "process" backend
+DEFAULT_WORKERS = int(os.getenv("JACCARD_WORKERS", os.cpu_count() or 1))
+# compute_all only scores the rows of pending proteins while they are at most this
+# fraction of the dataset; above it the configured backend recomputes everything.
+INCREMENTAL_MAX_FRACTION = 0.25
+# Background compaction renumbers slots densely once at least COMPACTION_MIN_FREE slots
+# and COMPACTION_FREE_FRACTION of all slots have been freed by deletions.
+COMPACTION_MIN_FREE = int(os.getenv("JACCARD_COMPACTION_MIN_FREE", 1024))
+COMPACTION_FREE_FRACTION = float(os.getenv("JACCARD_COMPACTION_FREE_FRACTION", 0.25))
+# "sync" serves from a thread pool; "aio" runs the asyncio server in aio_server.py
+SERVER_MODE = os.getenv("JACCARD_SERVER_MODE", "sync")
+# Largest score array compute_all grows to; signatures beyond it are scored from the
+# bitsets on read, as pending ones are (see versions.py)
+SCORE_MAX_BYTES = int(os.getenv("JACCARD_SCORE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+# Bytes one tile of StreamAllPairs may use when the request does not set memory_budget
+STREAM_MEMORY_BUDGET = int(os.getenv("JACCARD_STREAM_MEMORY_BUDGET", 64 * 1024 * 1024))
+# One-step rollback keeps at most HISTORY_DEPTH operations and HISTORY_MAX_BYTES of
+# recorded proteins; every HISTORY_CHECKPOINT_INTERVAL-th operation also keeps a
+# checkpoint of the state before it (0 disables checkpoints), see journal.py. Once the
+# arrays are replaced, checkpoints are dropped, except a load's, whose arrays count
+# towards HISTORY_MAX_BYTES.
+HISTORY_DEPTH = int(os.getenv("JACCARD_HISTORY_DEPTH", 256))
+HISTORY_MAX_BYTES = int(os.getenv("JACCARD_HISTORY_MAX_BYTES", 256 * 1024 * 1024))
+HISTORY_CHECKPOINT_INTERVAL = int(os.getenv("JACCARD_HISTORY_CHECKPOINT_INTERVAL", 16))
+# Directory holding named states (see statestore.py); they survive server restarts
+STATE_DIR = os.getenv("JACCARD_STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "states"))
+# Write-ahead log directory the server recovers from on startup ("" disables it, see
+# wal.py). A new checkpoint is written in the background once WAL_CHECKPOINT_RECORDS
+# operations or WAL_CHECKPOINT_BYTES have been logged since the last one.
+WAL_DIR = os.getenv("JACCARD_WAL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "wal"))
+WAL_FSYNC = os.getenv("JACCARD_WAL_FSYNC", "1") == "1"
+WAL_CHECKPOINT_RECORDS = int(os.getenv("JACCARD_WAL_CHECKPOINT_RECORDS", 1000))
+WAL_CHECKPOINT_BYTES = int(os.getenv("JACCARD_WAL_CHECKPOINT_BYTES", 256 * 1024 * 1024))
+# CalculateCompactMatches sends the dictionary in chunks of this many proteins and
+# starts a new message once its rows hold about this many matches
+COMPACT_DICTIONARY_CHUNK = 10000
+COMPACT_BLOCK_MATCHES = 100000
+# Protein changes kept for StreamChanges; clients further behind get a full resync
+CHANGEFEED_MAX_EVENTS = int(os.getenv("JACCARD_CHANGEFEED_MAX_EVENTS", 1000000))
+# Pair changes (or proteins) per ChangeBatch message
+CHANGEFEED_BATCH = 10000
+# Most MatchResults per CalculateTopMatchBatches message
+TOP_MATCH_BATCH = 512
+
+def stream_ack(batches, proteins):
+    """AddProteinStream's answer."""
+    return methods_pb2.Ack(success=True, message=f"Added {proteins} proteins in {batches} batches.")
+
+def stream_cut_short():
+    """AddProteinStream's answer to a stream without its last batch. A stream cut short
+    by its deadline or a cancellation ends that way, but the client no longer waits."""
+    return methods_pb2.Ack(success=False, message="Stream ended before its last batch; no proteins added.")
+
+def domain_set(interpro):
+    """InterPro IDs of a ';'-separated list."""
+    return set(x for x in interpro.split(';') if x.strip())
+
+def build_row_members(domain_sets):
+    """Signature row -> tuple of the protein IDs of domain_sets sharing it."""
+    return CowDict((row, tuple(ids)) for row, ids in domain_sets.members.items())
+
+def build_domain_index(domain_sets):
+    """InterPro column -> frozenset of signature rows of domain_sets carrying it, read
+    off the columns of one sparse matrix over all rows."""
+    rows = np.sort(domain_sets.unique_rows())
+    postings = domain_sets.to_csr(rows).tocsc()
+    bounds = postings.indptr.tolist()
+    carriers = rows[postings.indices].tolist()
+    return CowDict(
+        (col, frozenset(carriers[bounds[col]:bounds[col + 1]]))
+        for col in range(len(bounds) - 1) if bounds[col + 1] > bounds[col]
+    )
+
 class ProteinAnalyzer:
-    def __init__(self):
-        self.proteins = {}
-        self.entry_to_id = {}
-        self.domain_sets = {}
-        self.pair_cache = {}
-        self.history = []
-        self.named_states = {}
+    def __init__(self, backend=DEFAULT_BACKEND, workers=DEFAULT_WORKERS, state_dir=STATE_DIR):
+        if backend not in COMPUTE_BACKENDS:
+            raise ValueError(f"Unknown compute backend '{backend}'. Expected one of {COMPUTE_BACKENDS}.")
+        self.backend = backend
+        self.workers = max(1, workers)
+        # Writer-side working state, only touched with self.lock held. Readers use the
+        # published IndexVersion in self.current instead (see versions.py).
+        self.proteins = CowDict()
+        self.entry_to_id = CowDict()
+        # Packed bit row per distinct domain signature over a global InterPro symbol table;
+        # proteins with identical domain sets share a row (see bitsets.py)
+        self.domain_sets = DomainBitsets()
+        # Inverted index: InterPro column -> frozenset of signature rows carrying it.
+        # Only rows sharing a postings list can have a non-zero Jaccard. Postings are
+        # replaced, never mutated, so published versions can share them.
+        self.domain_index = CowDict()
+        # Signature row -> tuple of the protein IDs sharing it, refreshed for the rows a
+        # mutation touched, so versions need not derive it from every protein
+        self.row_members = CowDict()
+        # Condensed triangular float32 score array indexed by the domain_sets row slots
+        # (see scores.py). Pairs of rows sharing no domain are never written and read 0.0.
+        # It only grows when compute_all writes scores, up to SCORE_MAX_BYTES.
+        self.pair_scores = PairScores()
+        # Numbered protein changes, from which StreamChanges derives the changed pairs
+        self.changes = ChangeLog(CHANGEFEED_MAX_EVENTS)
+        # Undo log of inverse operations for one-step rollback
+        self.history = HistoryJournal(HISTORY_DEPTH, HISTORY_MAX_BYTES, HISTORY_CHECKPOINT_INTERVAL)
+        # History checkpoints are retained IndexVersions: their rows are never
+        # reclaimed while held
+        self.named_states = StateStore(state_dir)
         self.lock = threading.Lock()
-        self.is_dirty = False 
+        # Signature rows added since the last computation; their pairs are not cached yet
+        self.pending_rows = set()
+        # Rows whose last protein left, as (row, first version without it). They are
+        # cleared and reused only once no pinned version from their lifetime remains.
+        self._retired = []
+        # Row -> first version it appeared in
+        self._born = {}
+        # Version number -> readers and snapshots holding it
+        self._pins = {}
+        self._pin_lock = threading.Lock()
+        self._computing = 0
+        self._compaction_thread = None
+        # Set by recover(); mutations are logged to it before they are applied
+        self.wal = None
+        self._checkpoint_thread = None
+        # While recover() replays the log: its operations are not journaled, as they
+        # could never be rolled back past the checkpoint they apply to
+        self._replaying = False
+        self.current = IndexVersion(
+            0, CowDict(), CowDict(), CowDict(), CowDict(), CowDict(), frozenset(), self.domain_sets, self.pair_scores
+        )
+
+    def _publish(self):
+        """Publish the working state as a new version (called with the lock held)."""
+        self.current = IndexVersion(
+            self.current.number + 1,
+            self.proteins.snapshot(),
+            self.entry_to_id.snapshot(),
+            self.domain_sets.rows.snapshot(),
+            self.row_members.snapshot(),
+            self.domain_index.snapshot(),
+            frozenset(self.pending_rows),
+            self.domain_sets,
+            self.pair_scores,
+            self.changes.sequence
+        )
+
+    def _retain(self, version):
+        with self._pin_lock:
+            self._pins[version.number] = self._pins.get(version.number, 0) + 1
+        return version
+
+    def _release(self, version):
+        with self._pin_lock:
+            self._pins[version.number] -= 1
+            if not self._pins[version.number]:
+                del self._pins[version.number]
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Pin the current version for the duration of a read.
+
+        Never waits for writers; it only keeps the rows the version sees from being
+        reclaimed until the reader is done.
+        """
+        with self._pin_lock:
+            version = self.current
+            self._pins[version.number] = self._pins.get(version.number, 0) + 1
+        try:
+            yield version
+        finally:
+            self._release(version)
 
     def _get_current_state_snapshot(self):
-        return {
-            'proteins': copy.deepcopy(self.proteins),
-            'entry_to_id': copy.deepcopy(self.entry_to_id),
-            'domain_sets': copy.deepcopy(self.domain_sets),
-            'pair_cache': copy.deepcopy(self.pair_cache)
-        }
+        """The current version, retained until _release: O(1), nothing is copied."""
+        return self._retain(self.current)
 
     def _restore_state_from_snapshot(self, snapshot):
-        with self.lock:
-            self.proteins = snapshot['proteins']
-            self.entry_to_id = snapshot['entry_to_id']
-            self.domain_sets = snapshot['domain_sets']
-            if 'pair_cache' in snapshot:
-                self.pair_cache = snapshot['pair_cache']
-            self.is_dirty = False 
+        """Make a retained version current again (called with the lock held).
 
-    def create_history_snapshot(self):
-        self.history.append(self._get_current_state_snapshot())
+        The working mappings become copy-on-write clones of the snapshot's. Rows live now
+        but not in the snapshot are retired, and retired rows the snapshot still uses are
+        revived; they were kept intact because the snapshot was retained.
+        """
+        self._reclaim()
+        changed = self._record_jump(snapshot.proteins)
+        self.proteins = snapshot.proteins.copy()
+        self.entry_to_id = snapshot.entry_to_id.copy()
+        if snapshot.domain_sets is self.domain_sets and snapshot.pair_scores is self.pair_scores:
+            live = set(self.domain_sets.members)
+            self.domain_index = snapshot.index.copy()
+            self.row_members = snapshot.members.copy()
+            self.domain_sets.restore(snapshot.rows.copy())
+            kept = set(self.domain_sets.members)
+            self._retired = [(row, at) for row, at in self._retired if row not in kept]
+            self._retired.extend((row, self.current.number + 1) for row in live - kept)
+            # Revived rows are rescored too: a computation still running on a newer
+            # version would miss their pairs with the snapshot's pending rows
+            self.pending_rows = set(snapshot.pending) | (kept - live)
+        else:
+            # Taken before a compaction or recalculation: the snapshot's own arrays
+            # still hold its rows, but slots freed since were only cleared in the
+            # newer ones, so keep just the snapshot's rows, renumbered
+            domain_sets, old_slots = snapshot.domain_sets.compacted(snapshot.rows)
+            rank = {old: new for new, old in enumerate(old_slots.tolist())}
+            self._install(
+                domain_sets,
+                snapshot.pair_scores.compacted(old_slots),
+                {rank[row] for row in snapshot.pending}
+            )
+            self._detach_history()
+        self._publish()
+        return changed
 
-    def save_named_state(self, name, overwrite):
+    def _install(self, domain_sets, pair_scores, pending):
+        """Switch to new bitsets and scores; rows of the old ones need no reclaiming."""
+        self.domain_sets, self.pair_scores = domain_sets, pair_scores
+        self.domain_index = build_domain_index(domain_sets)
+        self.row_members = build_row_members(domain_sets)
+        self.pending_rows = pending
+        self._retired = []
+        self._born = {}
+
+    def _index_rows(self, rows):
+        """Add rows to the postings of their domains, one new frozenset per touched column."""
+        added = {}
+        for row in rows:
+            for col in self.domain_sets.row_columns(row).tolist():
+                added.setdefault(col, []).append(row)
+        for col, new_rows in added.items():
+            self.domain_index[col] = self.domain_index.get(col, frozenset()).union(new_rows)
+
+    def _record_jump(self, proteins):
+        """Record a change for every protein that differs between the working state and
+        proteins, which are about to replace it. Returns their IDs."""
+        changed = self.proteins.changed_keys(proteins)
+        for p_id in changed:
+            self.changes.record(p_id, self.proteins.get(p_id))
+        return changed
+
+    def _update_members(self, rows):
+        """Refresh row_members for rows whose proteins changed."""
+        members = self.domain_sets.members
+        for row in rows:
+            ids = members.get(row)
+            if ids:
+                self.row_members[row] = tuple(ids)
+            else:
+                self.row_members.pop(row, None)
+
+    def _unindex_rows(self, rows):
+        removed = {}
+        for row in rows:
+            for col in self.domain_sets.row_columns(row).tolist():
+                removed.setdefault(col, []).append(row)
+        for col, old_rows in removed.items():
+            postings = self.domain_index.get(col, frozenset()).difference(old_rows)
+            if postings:
+                self.domain_index[col] = postings
+            else:
+                self.domain_index.pop(col, None)
+
+    def _indexed_candidates(self, row):
+        """Rows of the working index sharing a domain with row (excluding itself)."""
+        candidates = set()
+        for col in self.domain_sets.row_columns(row).tolist():
+            candidates.update(self.domain_index.get(col, ()))
+        candidates.discard(row)
+        return candidates
+
+    def _journal_entry(self, jump=False):
+        """New history entry for a mutation about to start (called with the lock held).
+        A jump always gets a checkpoint, as it records no inverse. None while replaying."""
+        if self._replaying:
+            return None
+        if jump or self.history.wants_checkpoint():
+            return JournalEntry(self._get_current_state_snapshot(), jump)
+        return JournalEntry()
+
+    def _record(self, undo):
+        if undo is None:
+            return
+        self._release_dropped(self.history.append(undo))
+
+    def _release_dropped(self, entries):
+        for dropped in entries:
+            if dropped.checkpoint is not None:
+                self._release(dropped.checkpoint)
+
+    def _detach_history(self):
+        """Keep history checkpoints from holding arrays just replaced (called with the
+        lock held, see HistoryJournal.detach)."""
+        for version in self.history.detach(self.domain_sets, self.pair_scores):
+            self._release(version)
+
+    def get_history_stats(self):
         with self.lock:
-            if name in self.named_states and not overwrite:
-                return False, f"State '{name}' already exists. Use overwrite=True."
-            self.named_states[name] = self._get_current_state_snapshot()
-            return True, f"State saved as '{name}'. Proteins: {len(self.proteins)}"
+            return {
+                'depth': len(self.history),
+                'bytes': self.history.nbytes,
+                'checkpoints': self.history.checkpoints(),
+                'max_depth': self.history.max_depth,
+                'max_bytes': self.history.max_bytes,
+            }
+
+    def save_named_state(self, name, overwrite):
+        """Write the current version to disk. Runs on a pinned version, so writers are
+        not blocked while the file is written."""
+        if not self.named_states.valid_name(name):
+            return False, f"Invalid state name '{name}'. Use letters, digits, '_', '-' and '.'."
+        if self.named_states.exists(name) and not overwrite:
+            return False, f"State '{name}' already exists. Use overwrite=True."
+        with self.pinned() as version:
+            start = time.time()
+            size = self.named_states.save(name, version)
+        print(f"Server: Saved state '{name}' ({size / 1e6:.1f} MB) in {time.time() - start:.3f}s.")
+        return True, f"State saved as '{name}'. Proteins: {len(version.proteins)}"
 
     def load_named_state(self, name):
-        snapshot = self.named_states.get(name)
-        if not snapshot:
-            return False, f"State '{name}' not found."
-        self._restore_state_from_snapshot(snapshot)
-        return True, f"Rolled back to '{name}'. Total proteins: {len(self.proteins)}"
+        """Replace the working state with a saved one. The file is memory-mapped: the
+        proteins and signatures are read, the score array is used in place."""
+        try:
+            saved = self.named_states.open(name)
+            if saved is None:
+                return False, f"State '{name}' not found."
+            proteins, entry_to_id, domain_sets, pair_scores = saved.load()
+        except (OSError, ValueError) as e:
+            return False, f"State '{name}' could not be read: {e}"
+        with self.lock:
+            # Inverse deltas do not span a jump between states, so one-step rollback
+            # undoes the load from a checkpoint
+            undo = self._journal_entry(jump=True)
+            self._reclaim()
+            changed = self._record_jump(proteins)
+            self.proteins, self.entry_to_id = proteins, entry_to_id
+            self._install(domain_sets, pair_scores, set())
+            self._publish()
+            self._record(undo)
+            self._detach_history()
+            self._log_jump(changed)
+            return True, f"Rolled back to '{name}'. Total proteins: {len(self.proteins)}"
 
     def remove_named_state(self, name):
-        with self.lock:
-            if name in self.named_states:
-                del self.named_states[name]
-                return True, f"State '{name}' removed."
-            return False, f"State '{name}' not found."
+        if self.named_states.remove(name):
+            return True, f"State '{name}' removed."
+        return False, f"State '{name}' not found."
+
+    def get_saved_states(self):
+        """(name, bytes, proteins) of every state on disk."""
+        return self.named_states.list()
 
     def get_state_names(self):
-        return list(self.named_states.keys())
+        return [name for name, _, _ in self.get_saved_states()]
 
     def perform_standard_rollback(self):
-        if not self.history:
-            return False, "No history."
-        snapshot = self.history.pop()
-        self._restore_state_from_snapshot(snapshot)
-        return True, f"Rollback successful. Total proteins: {len(self.proteins)}"
+        """Undo the newest history entry: restore its checkpoint if it has one, else
+        replay its inverse (remove what it added, put back what it replaced)."""
+        with self.lock:
+            undo = self.history.pop()
+            if undo is None:
+                return False, "No history."
+            if undo.checkpoint is not None:
+                changed = self._restore_state_from_snapshot(undo.checkpoint)
+                self._release(undo.checkpoint)
+            else:
+                changed = set(undo.proteins)
+                self._reclaim()
+                self._remove_proteins([p_id for p_id, p in undo.proteins.items() if p is None])
+                self._add_proteins([p for p in undo.proteins.values() if p is not None])
+                for entry, p_id in undo.entries.items():
+                    if p_id is None:
+                        self.entry_to_id.pop(entry, None)
+                    else:
+                        self.entry_to_id[entry] = p_id
+                self._publish()
+            self._log_jump(changed)
+            return True, f"Rollback successful. Total proteins: {len(self.proteins)}"
 
     def add_batch(self, batch_proto):
+        """Insert or update proteins. Only signatures not seen before are marked pending
+        for the next compute_all; a protein whose domain set matches an existing
+        signature shares its row and scores straight away."""
+        with self.lock:
+            self._log(ADD, batch_proto)
+            self._reclaim()
+            undo = self._journal_entry()
+            self._add_proteins(batch_proto.proteins, undo)
+            self._publish()
+            self._record(undo)
+            self._maybe_schedule_checkpoint()
+
+    def add_stream(self, batches):
+        """add_batch for proteins arriving as a stream of batches. The stream is read to
+        its end before any batch is applied, and must end with a batch marked last: a
+        gRPC request stream cut short (by its deadline or a cancellation) can end as if
+        complete, so one without it changes nothing and None is returned. Each batch is
+        then indexed and published in turn, but the stream is one history entry, so a
+        rollback undoes all of it. If another mutation is recorded in between, the
+        batches after it start a new entry. Returns (batches, proteins) received."""
+        batches = list(batches)
+        if not batches or not batches[-1].last:
+            return None
+        undo = None
+        proteins = 0
+        for batch in batches:
+            undo = self.add_stream_batch(batch, undo)
+            proteins += len(batch.proteins)
+        return len(batches), proteins
+
+    def add_stream_batch(self, batch, undo):
+        """One batch of add_stream; undo is what the previous batch returned (None for
+        the first). Returns the history entry the batch went into."""
         with self.lock:
-            for p in batch_proto.proteins:
-                if p.id not in self.proteins:
-                    self.proteins[p.id] = p
-                    self.entry_to_id[p.entry] = p.id
-                    d_set = set(x for x in p.interpro.split(';') if x.strip())
-                    self.domain_sets[p.id] = d_set
-            self.is_dirty = True
+            self._log(ADD, batch)
+            self._reclaim()
+            if undo is None or self.history.newest() is not undo:
+                undo = self._journal_entry()
+                self._add_proteins(batch.proteins, undo)
+                self._publish()
+                self._record(undo)
+            else:
+                recorded = undo.nbytes
+                self._add_proteins(batch.proteins, undo)
+                self._publish()
+                self._release_dropped(self.history.grown(undo.nbytes - recorded))
+            self._maybe_schedule_checkpoint()
+        return undo
+
+    def _add_proteins(self, proteins, undo=None):
+        """Working-state part of add_batch, recording what it replaces in undo."""
+        new_rows, retired_rows, touched = [], [], set()
+        for p in proteins:
+            d_set = domain_set(p.interpro)
+            existing = self.proteins.get(p.id)
+            self.changes.record(p.id, existing)
+            if undo is not None:
+                undo.record_protein(p.id, existing)
+                undo.record_entry(p.entry, self.entry_to_id.get(p.entry))
+                if existing is not None:
+                    undo.record_entry(existing.entry, self.entry_to_id.get(existing.entry))
+            if existing is not None:
+                if existing.entry != p.entry and self.entry_to_id.get(existing.entry) == p.id:
+                    del self.entry_to_id[existing.entry]
+                self.proteins[p.id] = p
+                self.entry_to_id[p.entry] = p.id
+                if self.domain_sets.get(p.id) == d_set:
+                    continue
+                # Changed domains: move the protein to another signature row
+                retired_rows.extend(self._release_protein(p.id, touched))
+            else:
+                self.proteins[p.id] = p
+                self.entry_to_id[p.entry] = p.id
+            row, is_new = self.domain_sets.add(p.id, d_set)
+            touched.add(row)
+            if is_new:
+                new_rows.append(row)
+        new_rows = [row for row in new_rows if row in self.domain_sets.members]
+        for row in new_rows:
+            self._born[row] = self.current.number + 1
+        self._unindex_rows(retired_rows)
+        self._index_rows(new_rows)
+        self._update_members(touched)
+        self.pending_rows.update(new_rows)
+
+    def _release_protein(self, p_id, touched):
+        """Detach p_id from its signature row, adding the row to touched. Returns [row]
+        when that was the row's last protein (the row is then retired, see _reclaim),
+        else []."""
+        row, retired = self.domain_sets.pop(p_id)
+        touched.add(row)
+        if not retired:
+            return []
+        self.pending_rows.discard(row)
+        self._retired.append((row, self.current.number + 1))
+        return [row]
+
+    def _reclaim(self):
+        """Clear and free retired rows no pinned version can see (called with the lock held)."""
+        if not self._retired:
+            return
+        with self._pin_lock:
+            pinned = list(self._pins)
+        ready, waiting = [], []
+        for row, retired_at in self._retired:
+            born = self._born.get(row, 0)
+            if any(born <= number < retired_at for number in pinned):
+                waiting.append((row, retired_at))
+            else:
+                ready.append(row)
+        if not ready:
+            return
+        self._retired = waiting
+        # Stale scores can only pair a reclaimed row with a live row sharing a domain or
+        # with another retired row
+        unindexed = set(ready).union(row for row, _ in self._retired)
+        for row in ready:
+            self._clear_pairs(row, self._indexed_candidates(row) | unindexed)
+        self.domain_sets.release(ready)
+        for row in ready:
+            self._born.pop(row, None)
+
+    def _clear_pairs(self, row, others):
+        """Zero the stored pairs of row with others, in O(degree) rather than O(N)."""
+        scored = self.pair_scores.slots
+        if row >= scored:
+            return
+        others = np.array([other for other in others if other != row and other < scored], dtype=np.int64)
+        if len(others):
+            self.pair_scores.set_row(row, others, 0.0)
 
     def _calculate_pair(self, p1_id, p2_id):
-        """Calculate Jaccard for a pair. Always uses canonical key (sorted tuple)."""
+        """Jaccard for a pair, read from the current version by the slots of their signatures."""
         # Skip self-comparison
         if p1_id == p2_id:
             return None
-            
-        key = tuple(sorted((p1_id, p2_id)))
-        if key in self.pair_cache:
-            return self.pair_cache[key]
-        
-        s1 = self.domain_sets.get(p1_id, set())
-        s2 = self.domain_sets.get(p2_id, set())
-        union_len = len(s1.union(s2))
-        score = len(s1.intersection(s2)) / union_len if union_len > 0 else 0.0
-        
-        # Store with canonical key for bidirectional lookup
-        self.pair_cache[key] = score
-        return score
-
-    def compute_pairs_for_protein(self, p1_id, all_ids):
-        """Compute all pairs involving p1_id with IDs that come after it (to avoid duplicates)."""
-        for p2_id in all_ids:
-            if p1_id != p2_id:  # Skip self-comparison
-                self._calculate_pair(p1_id, p2_id)
-
-    def compute_all(self):
-        if not self.is_dirty:
-            return 
-
-        all_ids = list(self.proteins.keys())
-        if len(all_ids) == 0: 
+
+        with self.pinned() as version:
+            rows = version.rows
+            if p1_id not in rows or p2_id not in rows:
+                return 0.0
+            return version.score(rows[p1_id], rows[p2_id])
+
+    def compute_pairs_for_row(self, version, row, computing):
+        """Compute all pairs involving signature row. Pairs with another row in computing
+        are only computed from the smaller row (to avoid duplicates).
+
+        Only rows sharing a domain with row and with room in the score array are visited
+        (see candidate_rows), and the whole row is scored with one bitset popcount.
+        """
+        others = [
+            other for other in version.candidate_rows(row)
+            if other < version.scored and (other > row or other not in computing)
+        ]
+        if not others:
             return
+        others = np.array(others, dtype=np.int64)
+        version.pair_scores.set_row(row, others, version.domain_sets.score_row(row, others))
 
-        # Calculate number of unique pairs (excluding self-comparisons)
-        num_pairs = (len(all_ids) * (len(all_ids) - 1)) // 2
-        print(f"Server: Data dirty. Ensuring all {num_pairs} unique pairs are cached...")
-        
+    def _compute_incremental(self, version, pending):
+        """Compute only pending x existing and pending x pending pairs."""
+        for row in pending:
+            self.compute_pairs_for_row(version, row, pending)
+
+    def _compute_all_python(self, version, slots):
+        computing = set(slots)
         with futures.ThreadPoolExecutor(max_workers=8) as executor:
             futures.wait([
-                executor.submit(self.compute_pairs_for_protein, p_id, all_ids) 
-                for p_id in all_ids
+                executor.submit(self.compute_pairs_for_row, version, row, computing) 
+                for row in slots
             ])
+
+    def _compute_all_sparse(self, version, slots):
+        """Fill pair_scores from sparse matrix products."""
+        for first, second, scores in engines.sparse_pair_scores(slots, version.domain_sets):
+            version.pair_scores.set_pairs(first, second, scores)
+
+    def _compute_all_process(self, version, slots):
+        """Fill pair_scores from tiles scored by worker processes."""
+        for first, second, scores in engines.process_pair_scores(slots, version.domain_sets, self.workers):
+            version.pair_scores.set_pairs(first, second, scores)
+
+    def compute_all(self, backend=None):
+        """Score the pending rows of the current version and publish them as computed.
+
+        Runs without the lock on a pinned version, so readers and writers carry on
+        meanwhile. The result is dropped (rows stay pending) if the score array was
+        replaced or regrown while computing, as writes may have missed the new array.
+
+        The rows are marked computed while the version is still pinned: once unpinned,
+        a row retired meanwhile could be reclaimed and handed to a new, pending
+        signature, which must stay pending.
+        """
+        with self.lock:
+            self._computing += 1
+            self._grow_scores()
+        try:
+            with self.pinned() as version:
+                data = version.pair_scores.data
+                computed = self._compute_pending(version, backend)
+                if computed:
+                    with self.lock:
+                        if self.pair_scores is version.pair_scores and self.pair_scores.data is data:
+                            self.pending_rows.difference_update(computed)
+                            self._publish()
+        finally:
+            with self.lock:
+                self._computing -= 1
+
+    def _grow_scores(self):
+        """Make room in the score array for every row handed out, as far as
+        SCORE_MAX_BYTES allows (called with the lock held). Live rows gaining room are
+        marked pending: their pairs were scored on read until now, never stored."""
+        old = self.pair_scores.slots
+        if self.domain_sets.next_row <= old:
+            return
+        scored = self.pair_scores.ensure(self.domain_sets.next_row, SCORE_MAX_BYTES)
+        if scored == old:
+            return
+        if scored < self.domain_sets.next_row:
+            print(f"Server: Score array capped at {scored} signature slots "
+                  f"({self.pair_scores.data.nbytes / 1e6:.1f} MB); the rest are scored on read.")
+        self.pending_rows.update(row for row in self.domain_sets.members if old <= row < scored)
+        self._publish()
+
+    def _compute_pending(self, version, backend):
+        if not version.pending:
+            return None
+
+        # Pairs are only computed between unique signatures with room in the score
+        # array; pending rows without room are done as they are, scored on read
+        slots = version.unique_rows()
+        slots = slots[slots < version.scored].tolist()
+        pending = set(version.pending)
+        if len(slots) == 0:
+            return pending
+
+        backend = backend or self.backend
+        if backend not in COMPUTE_BACKENDS:
+            raise ValueError(f"Unknown compute backend '{backend}'. Expected one of {COMPUTE_BACKENDS}.")
+
+        # Calculate number of unique pairs (excluding self-comparisons)
+        num_pairs = (len(slots) * (len(slots) - 1)) // 2
+        stored = {row for row in pending if row < version.scored}
+
+        if len(stored) <= INCREMENTAL_MAX_FRACTION * len(slots):
+            start = time.time()
+            self._compute_incremental(version, stored)
+            print(f"Server: Computed rows of {len(stored)} new signatures in {time.time() - start:.3f}s.")
+            return pending
+
+        print(f"Server: Data dirty. Computing {num_pairs} pairs of {len(slots)} unique signatures "
+              f"({len(version.proteins)} proteins, {backend} backend)...")
+        
+        if backend == "sparse":
+            self._compute_all_sparse(version, slots)
+        elif backend == "process":
+            self._compute_all_process(version, slots)
+        else:
+            self._compute_all_python(version, slots)
         
-        self.is_dirty = False 
-        print(f"Server: Cache complete. {len(self.pair_cache)} pairs cached.")
+        print(f"Server: Scores complete. {version.pair_scores.count_nonzero()} non-zero pairs, "
+              f"{version.pair_scores.data.nbytes / 1e6:.1f} MB score array.")
+        return pending
+
+    def top_matches(self, p_id, k, min_jaccard=0.0, version=None):
+        """Best k neighbours of p_id with Jaccard >= min_jaccard, best first.
+
+        Reads the candidate signature rows' scores from the score array in one gather
+        (pairs not stored yet are scored from the bitsets, see IndexVersion.row_scores),
+        keeps the top k rows with a partial selection and only then expands them to
+        their proteins.
+        Proteins sharing no domain (Jaccard 0) are never returned. Returns
+        (matches, total) where total counts every neighbour above the threshold.
+        """
+        if version is None:
+            with self.pinned() as version:
+                return self.top_matches(p_id, k, min_jaccard, version)
+
+        row = version.rows[p_id]
+        members = version.members
+        others = np.array(list(version.candidate_rows(row)), dtype=np.int64)
+        scores = version.row_scores(row, others)
+        if len(members[row]) > 1:
+            # Other proteins with the same signature
+            others = np.append(others, row)
+            scores = np.append(scores, version.self_score(row))
+        return self._best_matches(version, others, scores, k, min_jaccard, p_id)
+
+    def domain_matches(self, domains, k, min_jaccard=0.0, version=None):
+        """top_matches for a protein that is not stored, given its InterPro IDs. Domains
+        no stored protein carries only count towards the union."""
+        if version is None:
+            with self.pinned() as version:
+                return self.domain_matches(domains, k, min_jaccard, version)
+
+        domain_sets = version.domain_sets
+        domains = set(domains)
+        cols = [domain_sets.columns[d] for d in domains if d in domain_sets.columns]
+        others = np.array(list(version.column_candidates(cols)), dtype=np.int64)
+        scores = domain_sets.score_columns(cols, len(domains), others)
+        return self._best_matches(version, others, scores, k, min_jaccard)
+
+    def _best_matches(self, version, others, scores, k, min_jaccard, p_id=None):
+        """Best k proteins of the signature rows others given their scores, without p_id."""
+        members = version.members
+        keep = np.nonzero((scores > 0.0) & engines.meets_threshold(scores, min_jaccard))[0]
+        counts = np.array([len(members[r]) for r in others[keep].tolist()], dtype=np.int64)
+        total = int(counts.sum())
+        if p_id is not None:
+            total -= int(version.rows[p_id] in others[keep])
+        # Every row holds at least one protein, so the best k rows cover the best k proteins
+        if k and len(keep) > k:
+            keep = keep[np.argpartition(-scores[keep], k - 1)[:k]]
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+
+        matches = []
+        for i in keep.tolist():
+            score = float(scores[i])
+            matches.extend((other_id, score) for other_id in members[int(others[i])] if other_id != p_id)
+        if k:
+            matches = matches[:k]
+        return matches, total
+
+    def pair_changes(self, since, epoch, version):
+        """What changed between sequence since of epoch and version.
+
+        Returns (full, proteins, removed, pairs): the proteins added or changed, the
+        entries no longer present and, lazily, (entry, other, before, after) for every
+        pair whose Jaccard changed (0.0 standing for no pair). When since cannot be
+        served (another epoch, or older than the kept changes), full is True and
+        everything is returned as added: every protein and every non-zero pair.
+        """
+        prior = None
+        if epoch == self.changes.epoch:
+            prior = self.changes.since(since, version.changes)
+        if prior is None:
+            ids = sorted(version.proteins)
+            return True, [version.proteins[p_id] for p_id in ids], [], self._all_pairs(ids, version)
+
+        proteins, removed = [], set()
+        for p_id, old in prior.items():
+            new = version.proteins.get(p_id)
+            if new is not None and new != old:
+                proteins.append(new)
+            if old is not None and old.entry not in version.entry_to_id:
+                removed.add(old.entry)
+        return False, proteins, sorted(removed), self._changed_pairs(prior, version)
+
+    def _all_pairs(self, ids, version):
+        for p_id in ids:
+            entry = version.proteins[p_id].entry
+            for other_id, score in self.top_matches(p_id, 0, 0.0, version)[0]:
+                if other_id > p_id:
+                    yield entry, version.proteins[other_id].entry, 0.0, score
+
+    def _changed_pairs(self, prior, version):
+        """Pairs with a protein of prior (protein ID -> Protein before, or None) whose
+        score differs between then and version. Proteins not in prior are unchanged,
+        so pairs as of then are scored against their current rows."""
+        def key(a, b):
+            return (a, b) if a < b else (b, a)
+
+        after = {}
+        for p_id in prior:
+            if p_id not in version.proteins:
+                continue
+            entry = version.proteins[p_id].entry
+            for other_id, score in self.top_matches(p_id, 0, 0.0, version)[0]:
+                after[key(entry, version.proteins[other_id].entry)] = score
+
+        before = {}
+        domain_sets = version.domain_sets
+        old_sets = {p_id: domain_set(p.interpro) for p_id, p in prior.items() if p is not None}
+        carriers = {}
+        for p_id, domains in old_sets.items():
+            for d in domains:
+                carriers.setdefault(d, []).append(p_id)
+        for p_id, domains in old_sets.items():
+            entry = prior[p_id].entry
+            cols = [domain_sets.columns[d] for d in domains if d in domain_sets.columns]
+            rows = np.array(list(version.column_candidates(cols)), dtype=np.int64)
+            for row, score in zip(rows.tolist(), domain_sets.score_columns(cols, len(domains), rows).tolist()):
+                if score > 0.0:
+                    for other_id in version.members[row]:
+                        if other_id not in prior:
+                            before[key(entry, version.proteins[other_id].entry)] = score
+            # Other changed proteins, as they were then
+            for other_id in {o for d in domains for o in carriers[d]}:
+                if other_id != p_id:
+                    others = old_sets[other_id]
+                    before[key(entry, prior[other_id].entry)] = len(domains & others) / len(domains | others)
+
+        for pair in sorted(before.keys() | after.keys()):
+            old, new = before.get(pair, 0.0), after.get(pair, 0.0)
+            if old != new:
+                yield pair[0], pair[1], old, new
+
+    def approximate_pairs(self, threshold, num_perm=0, bands=0, version=None):
+        """Signature row pairs with Jaccard >= threshold via MinHash + LSH (see engines.py),
+        keyed by (row, row). pair_scores is untouched."""
+        if version is None:
+            with self.pinned() as version:
+                return self.approximate_pairs(threshold, num_perm, bands, version)
+
+        num_perm = num_perm or engines.DEFAULT_NUM_PERM
+        pairs, stats = engines.approximate_pair_scores(
+            version.unique_rows(), version.domain_sets, threshold, num_perm, bands
+        )
+        stats['num_perm'] = num_perm
+        return pairs, stats
+
+    def evaluate_approximation(self, threshold, num_perm=0, bands=0):
+        """Compare the approximate mode against the exact sparse engine at the same threshold.
+        Pairs are counted between unique signatures."""
+        with self.pinned() as version:
+            start = time.time()
+            pairs, stats = self.approximate_pairs(threshold, num_perm, bands, version)
+            stats['approximate_seconds'] = time.time() - start
+
+            start = time.time()
+            exact = set()
+            for first, second, scores in engines.sparse_pair_scores(version.unique_rows(), version.domain_sets):
+                kept = engines.meets_threshold(scores, threshold)
+                lo, hi = np.minimum(first, second)[kept], np.maximum(first, second)[kept]
+                exact.update(zip(lo.tolist(), hi.tolist()))
+            stats['exact_seconds'] = time.time() - start
+
+        found = sum(1 for r1, r2 in pairs if (min(r1, r2), max(r1, r2)) in exact)
+        stats['approximate_pairs'] = len(pairs)
+        stats['exact_pairs'] = len(exact)
+        stats['precision'] = found / len(pairs) if pairs else 1.0
+        stats['recall'] = found / len(exact) if exact else 1.0
+        return stats
+
+    def threshold_neighbours(self, min_jaccard, version=None):
+        """Every protein pair with Jaccard >= min_jaccard, computed exactly by the PPJoin
+        engine over unique signatures (see engines.py); pair_scores is untouched.
+
+        Returns row -> [(other_row, score)] over signature rows, each pair listed from both
+        sides. Proteins sharing a signature are neighbours of each other at self_score.
+        """
+        if version is None:
+            with self.pinned() as version:
+                return self.threshold_neighbours(min_jaccard, version)
+
+        slots = version.unique_rows()
+        neighbours = {}
+        for first, second, scores in engines.ppjoin_pair_scores(slots, version.domain_sets, min_jaccard):
+            for r1, r2, score in zip(first.tolist(), second.tolist(), scores.tolist()):
+                neighbours.setdefault(r1, []).append((r2, score))
+                neighbours.setdefault(r2, []).append((r1, score))
+        for row in slots.tolist():
+            same = version.self_score(row)
+            if same > 0.0 and len(version.members[row]) > 1:
+                neighbours.setdefault(row, []).append((row, same))
+        return neighbours
+
+    def get_stats(self):
+        """Dataset and score store sizes, including how much signature dedup saves."""
+        with self.pinned() as version:
+            proteins = len(version.proteins)
+            signatures = len(version.members)
+            return {
+                'proteins': proteins,
+                'unique_signatures': signatures,
+                'dedup_ratio': proteins / signatures if signatures else 1.0,
+                'protein_pairs': proteins * (proteins - 1) // 2,
+                'signature_pairs': signatures * (signatures - 1) // 2,
+                'nonzero_pairs': version.pair_scores.count_nonzero(),
+                'pending_signatures': len(version.pending),
+                'free_slots': len(version.domain_sets.free_rows),
+                'score_bytes': version.pair_scores.data.nbytes,
+            }
 
     def delete_proteins(self, entries_to_delete):
         with self.lock:
-            self.create_history_snapshot()
+            self._log(DELETE, methods_pb2.EntryList(entries=entries_to_delete))
+            self._reclaim()
+            undo = self._journal_entry()
             ids_to_delete = {self.entry_to_id.get(entry) for entry in entries_to_delete if entry in self.entry_to_id}
-            deleted_count = 0
-            
-            for p_id in list(ids_to_delete):
-                if p_id in self.proteins:
-                    del self.proteins[p_id]
-                    del self.domain_sets[p_id]
-                    deleted_count += 1
+            deleted_count = self._remove_proteins(ids_to_delete, undo)
             
             for entry in entries_to_delete:
                 if entry in self.entry_to_id:
+                    if undo is not None:
+                        undo.record_entry(entry, self.entry_to_id[entry])
                     del self.entry_to_id[entry]
             
-            # Clean up cache entries involving deleted proteins
-            keys_to_remove = [
-                key for key in self.pair_cache.keys() 
-                if key[0] in ids_to_delete or key[1] in ids_to_delete
-            ]
-            for key in keys_to_remove:
-                del self.pair_cache[key]
-            
-            self.is_dirty = True 
+            self._publish()
+            self._record(undo)
+            self._maybe_schedule_compaction()
+            self._maybe_schedule_checkpoint()
             return True, f"Deleted {deleted_count} proteins."
 
-    def recalculate_matrix(self):
-        self.pair_cache.clear()
-        self.is_dirty = True
-        self.compute_all()
+    def _remove_proteins(self, ids, undo=None):
+        """Working-state part of delete_proteins, recording the removed proteins in undo.
+        Returns how many of ids were present."""
+        removed, retired_rows, touched = 0, [], set()
+        for p_id in ids:
+            p = self.proteins.get(p_id)
+            if p is None:
+                continue
+            self.changes.record(p_id, p)
+            if undo is not None:
+                undo.record_protein(p_id, p)
+            del self.proteins[p_id]
+            retired_rows.extend(self._release_protein(p_id, touched))
+            removed += 1
+        self._unindex_rows(retired_rows)
+        self._update_members(touched)
+        return removed
+
+    def _log(self, op, request):
+        """Append a mutation to the write-ahead log (called with the lock held)."""
+        if self.wal is not None:
+            self.wal.append(op, request)
+
+    def _log_jump(self, changed):
+        """Log the outcome of a jump to another state (rollback or state load), which
+        replay cannot reproduce, as its delta: which of the changed protein IDs are gone,
+        and what the others hold now. Its size follows the change, not the store."""
+        if self.wal is not None:
+            ids = sorted(changed)
+            self._log(JUMP, methods_pb2.ProteinDelta(
+                removed_ids=[p_id for p_id in ids if p_id not in self.proteins],
+                proteins=[self.proteins[p_id] for p_id in ids if p_id in self.proteins]
+            ))
+            self._maybe_schedule_checkpoint()
+
+    def recover(self, wal):
+        """Load the checkpoint of wal, replay the operations logged after it, then log
+        every further mutation to it."""
+        start = time.time()
+        saved, segment = wal.checkpoint()
+        if saved is not None:
+            proteins, entry_to_id, domain_sets, pair_scores = saved.load()
+            pending = set(saved.header.get("pending", ()))
+            if "score_files" in saved.header:
+                pair_scores = wal.load_scores(saved.header)
+            with self.lock:
+                self.proteins, self.entry_to_id = proteins, entry_to_id
+                self._install(domain_sets, pair_scores, pending)
+                # Replay records the same changes as the original operations, so the
+                # sequence carries on where the logged server's did
+                if "change_epoch" in saved.header:
+                    self.changes.resume(saved.header["change_epoch"], saved.header["change_sequence"])
+                self._publish()
+        replayed = 0
+        self._replaying = True
+        try:
+            replayed = self._replay(wal, segment)
+        finally:
+            self._replaying = False
+        with self.lock:
+            wal.open()
+            self.wal = wal
+            if replayed:
+                self._start_checkpoint()
+        print(f"Server: Recovered {len(self.proteins)} proteins from the checkpoint and "
+              f"{replayed} logged operations in {time.time() - start:.3f}s.")
+
+    def _replay(self, wal, segment):
+        """Apply the operations logged from segment on; returns how many."""
+        replayed = 0
+        for op, request in wal.replay(segment):
+            if op == ADD:
+                self.add_batch(request)
+            elif op == DELETE:
+                self.delete_proteins(request.entries)
+            elif op == JUMP:
+                with self.lock:
+                    self._reclaim()
+                    for p_id in request.removed_ids:
+                        p = self.proteins.get(p_id)
+                        if p is not None and self.entry_to_id.get(p.entry) == p_id:
+                            del self.entry_to_id[p.entry]
+                    self._remove_proteins(request.removed_ids)
+                    self._add_proteins(request.proteins)
+                    self._publish()
+            else:
+                # REPLACE: the whole protein set, as older servers logged jumps
+                with self.lock:
+                    self._reclaim()
+                    self._remove_proteins(list(self.proteins))
+                    self.entry_to_id = CowDict()
+                    self._add_proteins(request.proteins)
+                    self._publish()
+            replayed += 1
+        return replayed
+
+    def _maybe_schedule_checkpoint(self):
+        """Start a background checkpoint once enough has been logged (called with the lock held)."""
+        if self.wal is None:
+            return
+        if self.wal.records < WAL_CHECKPOINT_RECORDS and self.wal.bytes < WAL_CHECKPOINT_BYTES:
+            return
+        self._start_checkpoint()
+
+    def _start_checkpoint(self):
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            return
+        self._checkpoint_thread = threading.Thread(target=self.checkpoint, daemon=True)
+        self._checkpoint_thread.start()
+
+    def checkpoint(self):
+        """Write the current version as the WAL checkpoint and drop the log it covers.
+
+        The log moves to a new segment under the lock, so the checkpoint holds exactly
+        the operations of the older segments; the file is written outside the lock.
+        """
+        with self.lock:
+            version = self._retain(self.current)
+            segment = self.wal.rotate()
+        try:
+            start = time.time()
+            # Positions written from here on go to the next checkpoint's delta. Taken
+            # after the version, so the scores read for it are at least as new.
+            written = version.pair_scores.take_written()
+            slots = version.pair_scores.slots
+            # The change feed position, so cursors stay valid across a restart
+            self.wal.write_checkpoint(
+                version, segment, written, slots,
+                change_epoch=self.changes.epoch, change_sequence=version.changes
+            )
+        finally:
+            self._release(version)
+        print(f"Server: Checkpointed {len(version.proteins)} proteins in {time.time() - start:.3f}s.")
+
+    def _maybe_schedule_compaction(self):
+        """Start a background compaction when enough slots were freed (called with the lock held)."""
+        free = len(self.domain_sets.free_rows) + len(self._retired)
+        if free < COMPACTION_MIN_FREE or free < COMPACTION_FREE_FRACTION * self.domain_sets.next_row:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+
+    def compact(self):
+        """Renumber slots densely, dropping the space of deleted signatures.
+
+        The compacted bitsets, score array and domain index are built outside the lock
+        from a pinned version, then published only if no mutation or computation
+        happened meanwhile (otherwise the next deletion retries). Readers of older
+        versions keep the previous objects.
+        """
+        with self.pinned() as version:
+            start = time.time()
+            new_sets, old_slots = version.domain_sets.compacted(version.rows)
+            new_scores = version.pair_scores.compacted(old_slots)
+        new_index = build_domain_index(new_sets)
+        new_members = build_row_members(new_sets)
+        rank = {old: new for new, old in enumerate(old_slots.tolist())}
+
+        with self.lock:
+            if self.current is not version or self._computing:
+                print("Server: Compaction discarded, state changed meanwhile.")
+                return False
+            freed = version.domain_sets.next_row - new_sets.next_row
+            self.domain_sets, self.pair_scores, self.domain_index = new_sets, new_scores, new_index
+            self.row_members = new_members
+            self.pending_rows = {rank[row] for row in self.pending_rows}
+            self._retired = []
+            self._born = {}
+            self._publish()
+            self._detach_history()
+        print(f"Server: Compacted {freed} free slots in {time.time() - start:.3f}s.")
+        return True
+
+    def recalculate_matrix(self, backend=None):
+        with self.lock:
+            # A fresh array, grown by compute_all: readers of older versions keep
+            # reading the previous one
+            self.pair_scores = PairScores()
+            self.pending_rows = set(self.domain_sets.unique_rows().tolist())
+            self._publish()
+            self._detach_history()
+        self.compute_all(backend)
         return True, "Full matrix recalculation complete."
 
 class PassServicer(methods_pb2_grpc.PassServicer):
     def __init__(self):
         self.analyzer = ProteinAnalyzer()
+        if WAL_DIR:
+            self.analyzer.recover(WriteAheadLog(WAL_DIR, fsync=WAL_FSYNC))
 
     def AddProteinBatch(self, request, context):
-        self.analyzer.create_history_snapshot()
         self.analyzer.add_batch(request)
         return methods_pb2.Ack(success=True, message=f"Added {len(request.proteins)} proteins.")
 
+    def AddProteinStream(self, request_iterator, context):
+        received = self.analyzer.add_stream(request_iterator)
+        if received is None:
+            return stream_cut_short()
+        return stream_ack(*received)
+
     def CalculateBestMatches(self, request, context):
         """Returns all pairwise correlations for each protein (excluding self)."""
         self.analyzer.compute_all()
-        
-        all_ids = list(self.analyzer.proteins.keys())
-        
-        for p_id in all_ids:
-            query_prot = self.analyzer.proteins[p_id]
-            correlations = []
+
+        # The whole stream reads the version it started on
+        with self.analyzer.pinned() as version:
+            all_ids = sorted(version.proteins.keys())
+            slots = version.row_indices(all_ids)
+            entries = [version.proteins[p_id].entry for p_id in all_ids]
             
-            for other_id in all_ids:
-                if p_id == other_id:  # Skip self-comparison
-                    continue
-                    
-                other_prot = self.analyzer.proteins[other_id]
-                score = self.analyzer._calculate_pair(p_id, other_id)
+            for i, p_id in enumerate(all_ids):
+                query_prot = version.proteins[p_id]
+                # Whole score row read by slot index, skipping self-comparison. Proteins
+                # sharing a signature share a slot, so their scores expand from one row.
+                others = np.concatenate((slots[:i], slots[i + 1:]))
+                scores = version.row_scores(slots[i], others, diagonal=version.self_score(slots[i])).tolist()
+                other_entries = entries[:i] + entries[i + 1:]
+                correlations = [
+                    methods_pb2.JaccardTuple(entry=entry, jaccard=score)
+                    for entry, score in zip(other_entries, scores)
+                ]
                 
-                if score is not None:  # Should always be true now
-                    correlations.append(
-                        methods_pb2.JaccardTuple(entry=other_prot.entry, jaccard=score)
-                    )
-            
+                yield methods_pb2.MatchResult(
+                    query_protein=query_prot,
+                    correlations=correlations
+                )
+
+    def CalculateTopMatches(self, request, context):
+        """Top-k correlations per protein with Jaccard >= min_jaccard (k = 0 keeps all),
+        one page of proteins in ID order (see TopMatchesRequest)."""
+        with self.analyzer.pinned() as version:
+            yield from self._top_match_results(request, version)
+
+    def CalculateTopMatchBatches(self, request, context):
+        """CalculateTopMatches with the results grouped into messages, doubling in size
+        from one result up to TOP_MATCH_BATCH: streaming many small messages costs more
+        than computing them."""
+        with self.analyzer.pinned() as version:
+            batch, size = methods_pb2.MatchResultBatch(), 1
+            for result in self._top_match_results(request, version):
+                batch.results.append(result)
+                if len(batch.results) >= size:
+                    yield batch
+                    batch, size = methods_pb2.MatchResultBatch(), min(size * 2, TOP_MATCH_BATCH)
+            if batch.results:
+                yield batch
+
+    def _top_match_results(self, request, version):
+        ids = sorted(version.proteins)
+        start = bisect.bisect_right(ids, request.after) if request.after else 0
+        start += request.offset
+        stop = start + request.limit if request.limit else len(ids)
+        for p_id in ids[start:stop]:
+            matches, total = self.analyzer.top_matches(p_id, request.k, request.min_jaccard, version)
             yield methods_pb2.MatchResult(
-                query_protein=query_prot,
-                correlations=correlations
+                query_protein=stripped_protein(version.proteins[p_id], not request.omit_sequence),
+                correlations=[
+                    methods_pb2.JaccardTuple(entry=version.proteins[other_id].entry, jaccard=score)
+                    for other_id, score in matches
+                ],
+                total_matches=total
             )
 
+    def QueryNeighbours(self, request_iterator, context):
+        """Answers each query as it arrives with the top-k neighbours of a stored entry,
+        or of an ad-hoc InterPro list, read from the current version."""
+        for query in request_iterator:
+            yield self.answer_neighbours(query)
+
+    def answer_neighbours(self, query):
+        """The NeighbourResult of one QueryNeighbours query."""
+        with self.analyzer.pinned() as version:
+            result = methods_pb2.NeighbourResult(query_id=query.query_id)
+            p_id = version.entry_to_id.get(query.entry) if query.entry else None
+            if p_id is not None:
+                result.query_protein.CopyFrom(version.proteins[p_id])
+                matches, total = self.analyzer.top_matches(p_id, query.k, query.min_jaccard, version)
+            elif not query.entry and query.interpro:
+                domains = domain_set(query.interpro)
+                matches, total = self.analyzer.domain_matches(domains, query.k, query.min_jaccard, version)
+            else:
+                result.error = f"Unknown entry '{query.entry}'." if query.entry else "Empty query."
+                return result
+            result.found = True
+            result.total_matches = total
+            result.correlations.extend(
+                methods_pb2.JaccardTuple(entry=version.proteins[other_id].entry, jaccard=score)
+                for other_id, score in matches
+            )
+        return result
+
+    def StreamChanges(self, request, context):
+        """Proteins and pairs changed since sequence request.since of request.epoch (see
+        ProteinAnalyzer.pair_changes). Every message carries the epoch and sequence to
+        ask from next time, and whether this is a full resync."""
+        with self.analyzer.pinned() as version:
+            full, proteins, removed, pairs = self.analyzer.pair_changes(request.since, request.epoch, version)
+
+            def batch():
+                return methods_pb2.ChangeBatch(epoch=self.analyzer.changes.epoch, sequence=version.changes, full=full)
+
+            block = batch()
+            block.removed_entries.extend(removed)
+            sent = False
+            for start in range(0, len(proteins), CHANGEFEED_BATCH):
+                block.proteins.extend(proteins[start:start + CHANGEFEED_BATCH])
+                yield block
+                block, sent = batch(), True
+            for entry, other, before, after in pairs:
+                if before == 0.0:
+                    kind = methods_pb2.PairChange.INSERT
+                elif after == 0.0:
+                    kind = methods_pb2.PairChange.DELETE
+                else:
+                    kind = methods_pb2.PairChange.UPDATE
+                block.pairs.add(entry=entry, other=other, jaccard=after, kind=kind)
+                if len(block.pairs) >= CHANGEFEED_BATCH:
+                    yield block
+                    block, sent = batch(), True
+            if block.pairs or block.removed_entries or not sent:
+                yield block
+
     def CalculateAllPairs(self, request, context):
         """Alternative method: returns each unique pair once."""
         self.analyzer.compute_all()
-        
-        all_ids = sorted(self.analyzer.proteins.keys())
-        
-        # Iterate through unique pairs
-        for i, p1_id in enumerate(all_ids):
-            p1 = self.analyzer.proteins[p1_id]
-            correlations = []
+
+        with self.analyzer.pinned() as version:
+            all_ids = sorted(version.proteins.keys())
+            slots = version.row_indices(all_ids)
+            entries = [version.proteins[p_id].entry for p_id in all_ids]
             
-            for p2_id in all_ids[i+1:]:  # Only pairs after current to avoid duplicates
-                p2 = self.analyzer.proteins[p2_id]
-                score = self.analyzer._calculate_pair(p1_id, p2_id)
+            # Iterate through unique pairs
+            for i, p1_id in enumerate(all_ids):
+                p1 = version.proteins[p1_id]
+                # Only pairs after current to avoid duplicates
+                scores = version.row_scores(slots[i], slots[i + 1:], diagonal=version.self_score(slots[i])).tolist()
+                correlations = [
+                    methods_pb2.JaccardTuple(entry=entry, jaccard=score)
+                    for entry, score in zip(entries[i + 1:], scores)
+                ]
                 
-                if score is not None:
-                    correlations.append(
-                        methods_pb2.JaccardTuple(entry=p2.entry, jaccard=score)
+                if correlations:  # Only yield if there are correlations
+                    yield methods_pb2.MatchResult(
+                        query_protein=p1,
+                        correlations=correlations
                     )
-            
-            if correlations:  # Only yield if there are correlations
+
+    def StreamAllPairs(self, request, context):
+        """Each unique pair with a non-zero Jaccard >= request.min_jaccard, computed tile by
+        tile straight from the bitsets and streamed as each tile completes.
+
+        Nothing is cached, so memory is bounded by the tile budget instead of growing with
+        the dataset. A protein's correlations arrive over several messages, one per tile of
+        later proteins in ID order.
+        """
+        with self.analyzer.pinned() as version:
+            all_ids = sorted(version.proteins.keys())
+            proteins = [version.proteins[p_id] for p_id in all_ids]
+            slots = version.row_indices(all_ids)
+            budget = request.memory_budget or STREAM_MEMORY_BUDGET
+
+            start = time.time()
+            streamed = 0
+            for first, second, scores in engines.stream_pair_scores(slots, version.domain_sets, budget):
+                kept = engines.meets_threshold(scores, request.min_jaccard)
+                first, second, scores = first[kept], second[kept], scores[kept]
+                bounds = np.flatnonzero(np.diff(first)) + 1
+                for lo, hi in zip([0] + bounds.tolist(), bounds.tolist() + [len(first)]):
+                    if lo == hi:
+                        continue
+                    yield methods_pb2.MatchResult(
+                        query_protein=proteins[first[lo]],
+                        correlations=[
+                            methods_pb2.JaccardTuple(entry=proteins[j].entry, jaccard=score)
+                            for j, score in zip(second[lo:hi].tolist(), scores[lo:hi].tolist())
+                        ]
+                    )
+                streamed += len(scores)
+            print(f"Server: Streamed {streamed} pairs in {time.time() - start:.3f}s.")
+
+    def CalculateThresholdPairs(self, request, context):
+        """Each unique pair with Jaccard >= request.min_jaccard once, in the CalculateAllPairs
+        layout (correlations of a protein cover the proteins after it in ID order)."""
+        if not 0.0 < request.min_jaccard <= 1.0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "min_jaccard must be in (0, 1].")
+        with self.analyzer.pinned() as version:
+            neighbours = self.analyzer.threshold_neighbours(request.min_jaccard, version)
+            print(f"Server: Threshold join (Jaccard >= {request.min_jaccard}) matched "
+                  f"{len(neighbours)} of {len(version.members)} signatures.")
+
+            for p1_id in sorted(version.proteins.keys()):
+                matches = sorted(
+                    (p2_id, score)
+                    for other_row, score in neighbours.get(version.rows[p1_id], ())
+                    for p2_id in version.members[other_row] if p2_id > p1_id
+                )
+                if matches:
+                    yield methods_pb2.MatchResult(
+                        query_protein=version.proteins[p1_id],
+                        correlations=[
+                            methods_pb2.JaccardTuple(entry=version.proteins[p2_id].entry, jaccard=score)
+                            for p2_id, score in matches
+                        ]
+                    )
+
+    def CalculateCompactMatches(self, request, context):
+        """Non-zero correlations of every protein in the compact layout (see compact.py):
+        the entry dictionary once, then rows of dictionary positions and packed scores."""
+        format_version = request.format_version or COMPACT_FORMAT_VERSION
+        if format_version != COMPACT_FORMAT_VERSION:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                          f"Unsupported format_version {format_version}; this server speaks {COMPACT_FORMAT_VERSION}.")
+        with self.analyzer.pinned() as version:
+            ids = sorted(version.proteins)
+            position = {p_id: i for i, p_id in enumerate(ids)}
+            for start in range(0, len(ids), COMPACT_DICTIONARY_CHUNK):
+                chunk = [version.proteins[p_id] for p_id in ids[start:start + COMPACT_DICTIONARY_CHUNK]]
+                block = methods_pb2.CompactMatchBlock(format_version=format_version, entries=[p.entry for p in chunk])
+                if request.include_proteins:
+                    block.proteins.extend(stripped_protein(p, request.include_sequence) for p in chunk)
+                yield block
+
+            block, matched = methods_pb2.CompactMatchBlock(format_version=format_version), 0
+            for i, p_id in enumerate(ids):
+                matches, total = self.analyzer.top_matches(p_id, request.k, request.min_jaccard, version)
+                row = block.rows.add(query=i, total_matches=total, indices=[position[other] for other, _ in matches])
+                scores = [score for _, score in matches]
+                if request.quantize:
+                    row.quantized_scores.extend(quantize(scores))
+                else:
+                    row.scores.extend(scores)
+                matched += len(matches) + 1
+                if matched >= COMPACT_BLOCK_MATCHES:
+                    yield block
+                    block, matched = methods_pb2.CompactMatchBlock(format_version=format_version), 0
+            if block.rows:
+                yield block
+
+    def CalculateApproximateMatches(self, request, context):
+        """Per-protein correlations >= request.threshold found by MinHash + LSH, verified exactly."""
+        with self.analyzer.pinned() as version:
+            pairs, stats = self.analyzer.approximate_pairs(request.threshold, request.num_perm, request.bands, version)
+            print(f"Server: Approximate mode found {len(pairs)} pairs from {stats['candidate_pairs']} candidates "
+                  f"({stats['bands']} bands x {stats['rows']} rows).")
+
+            # Neighbours per signature row, expanded to the proteins sharing it below
+            neighbours = {}
+            for (r1, r2), score in pairs.items():
+                neighbours.setdefault(r1, []).append((r2, score))
+                neighbours.setdefault(r2, []).append((r1, score))
+
+            for p_id in sorted(version.proteins):
+                row = version.rows[p_id]
+                row_neighbours = list(neighbours.get(row, ()))
+                same = version.self_score(row)
+                if same > 0.0 and engines.meets_threshold(same, request.threshold):
+                    row_neighbours.append((row, same))
+                correlations = [
+                    methods_pb2.JaccardTuple(entry=version.proteins[other_id].entry, jaccard=score)
+                    for other_row, score in row_neighbours
+                    for other_id in version.members[other_row] if other_id != p_id
+                ]
                 yield methods_pb2.MatchResult(
-                    query_protein=p1,
+                    query_protein=version.proteins[p_id],
                     correlations=correlations
                 )
 
+    def EvaluateApproximateMatches(self, request, context):
+        """Precision/recall of the approximate mode versus the exact engine."""
+        stats = self.analyzer.evaluate_approximation(request.threshold, request.num_perm, request.bands)
+        return methods_pb2.ApproximationReport(threshold=request.threshold, **stats)
+
+    def GetStats(self, request, context):
+        return methods_pb2.AnalyzerStats(**self.analyzer.get_stats())
+
+    def GetHistoryStats(self, request, context):
+        return methods_pb2.HistoryStats(**self.analyzer.get_history_stats())
+
     def SaveState(self, request, context):
         success, message = self.analyzer.save_named_state(request.state_name, request.overwrite)
         return methods_pb2.Ack(success=success, message=message)
@@ -244,15 +1397,37 @@ class PassServicer(methods_pb2_grpc.PassServicer):
         success, message = self.analyzer.recalculate_matrix()
         return methods_pb2.Ack(success=success, message=message)
 
+    def ComputePending(self, request, context):
+        """Store the scores of the signatures added since the last computation, which
+        reads would otherwise score from the bitsets."""
+        self.analyzer.compute_all()
+        with self.analyzer.pinned() as version:
+            pending = len(version.pending)
+        return methods_pb2.Ack(success=True, message=f"Scores computed; {pending} signatures still pending.")
+
     def GetSavedStates(self, request, context):
-        names = self.analyzer.get_state_names()
-        return methods_pb2.StateList(names=names)
+        states = self.analyzer.get_saved_states()
+        return methods_pb2.StateList(
+            names=[name for name, _, _ in states],
+            states=[
+                methods_pb2.SavedStateInfo(name=name, bytes=size, proteins=proteins)
+                for name, size, proteins in states
+            ]
+        )
 
     def RemoveSavedState(self, request, context):
         success, message = self.analyzer.remove_named_state(request.name)
         return methods_pb2.Ack(success=success, message=message)
 
 def serve():
+    if SERVER_MODE not in ("sync", "aio"):
+        raise ValueError(f"Unknown server mode '{SERVER_MODE}'. Expected 'sync' or 'aio'.")
+    if SERVER_MODE == "aio":
+        import asyncio
+        import aio_server
+        asyncio.run(aio_server.serve())
+        return
+
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
     methods_pb2_grpc.add_PassServicer_to_server(PassServicer(), server)
     server.add_insecure_port('[::]:50051')
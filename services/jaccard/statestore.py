@@ -0,0 +1,269 @@
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import numpy as np
+import methods_pb2
+from bitsets import DomainBitsets
+from scores import PairScores
+from versions import CowDict, LazyCowDict
+
+# A state file starts with MAGIC and the offset and length of its JSON header, which
+# is written after the sections it describes. Files of format 1 (no "format" in the
+# header) held the proteins as one ProteinBatch and the signatures as column lists.
+MAGIC = b"JSTATE1\0"
+_PROLOGUE = struct.Struct("<8sQQ")
+STATE_SUFFIX = ".jstate"
+_STATE_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*\Z")
+
+def read_header(f, size, path):
+    """The JSON header of the state file open as f, size bytes long. Raises ValueError
+    if the file is not a complete state file."""
+    if size < _PROLOGUE.size:
+        raise ValueError(f"{path} is truncated.")
+    magic, offset, length = _PROLOGUE.unpack(f.read(_PROLOGUE.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a saved state.")
+    if offset + length > size:
+        raise ValueError(f"{path} is truncated.")
+    f.seek(offset)
+    try:
+        header = json.loads(f.read(length))
+    except ValueError as e:
+        raise ValueError(f"{path} has an invalid header: {e}")
+    if not isinstance(header, dict) or not {"proteins", "signatures", "sections"} <= header.keys():
+        raise ValueError(f"{path} has an invalid header.")
+    return header
+
+def fsync_directory(directory):
+    """Make a rename in directory durable."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class SavedState:
+    """A state file mapped copy-on-write into memory.
+
+    Sections are numpy views on the mapping, so pages are only read when touched. The
+    bitset words, row popcounts and score array are used in place (writes to them stay
+    private to this process), and each protein is only parsed when first read.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.header = read_header(f, os.fstat(f.fileno()).st_size, path)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.protein_count = self.header["proteins"]
+        self.signature_count = self.header["signatures"]
+
+    def section(self, name):
+        offset, dtype, count = self.header["sections"][name]
+        return np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+
+    def strings(self, name):
+        """A section of "\0"-separated strings, as a list."""
+        text = self.section(name).tobytes().decode()
+        return text.split("\0") if text else []
+
+    def load(self):
+        """(proteins, entry_to_id, domain_sets, pair_scores) as the analyzer's working state."""
+        symbols = self.strings("symbols")
+        if self.header.get("format", 1) == 1:
+            proteins, entry_to_id, rows, bits, sizes = self._load_format_1(len(symbols))
+        else:
+            ids = self.strings("protein_ids")
+            offsets = self.section("protein_offsets").tolist()
+            data = self.section("protein_data")
+
+            def protein(i):
+                return methods_pb2.Protein.FromString(data[offsets[i]:offsets[i + 1]].tobytes())
+
+            proteins = LazyCowDict(ids, protein)
+            entry_to_id = CowDict(zip(self.strings("protein_entries"), ids))
+            rows = CowDict(zip(ids, self.section("protein_rows").tolist()))
+            bits = self.section("bits").reshape(self.signature_count, self.header["words"])
+            sizes = self.section("sizes")
+        domain_sets = DomainBitsets.loaded(symbols, bits, sizes, rows, self.header.get("free_rows", ()))
+        # WAL checkpoints keep their scores in separate files (see wal.py)
+        pair_scores = PairScores(capacity=1)
+        if "scores" in self.header["sections"]:
+            scored = self.header.get("scored", self.signature_count)
+            if scored > 1:
+                pair_scores.data = self.section("scores")
+            pair_scores.slots = scored
+        return proteins, entry_to_id, domain_sets, pair_scores
+
+    def _load_format_1(self, symbol_count):
+        """(proteins, entry_to_id, rows, bits, sizes) of a format 1 file, decoded up front."""
+        batch = methods_pb2.ProteinBatch.FromString(self.section("proteins").tobytes())
+        ids = [p.id for p in batch.proteins]
+        proteins = CowDict(zip(ids, batch.proteins))
+        entry_to_id = CowDict((p.entry, p.id) for p in batch.proteins)
+        rows = CowDict(zip(ids, self.section("protein_rows").tolist()))
+        offsets = self.section("signature_offsets").astype(np.int64)
+        columns = self.section("signature_columns").astype(np.int64)
+        n = len(offsets) - 1
+        bits = np.zeros((n, max(1, (symbol_count + 63) // 64)), dtype=np.uint64)
+        sizes = np.diff(offsets)
+        masks = np.left_shift(np.uint64(1), (columns & 63).astype(np.uint64))
+        np.bitwise_or.at(bits, (np.repeat(np.arange(n), sizes), columns >> 6), masks)
+        return proteins, entry_to_id, rows, bits, sizes
+
+def _write_section(f, sections, name, array):
+    array = np.ascontiguousarray(array)
+    offset = f.tell()
+    f.write(array.tobytes())
+    f.write(b"\0" * (-f.tell() % 8))
+    sections[name] = [offset, array.dtype.str, len(array)]
+
+def _write_strings(f, sections, name, strings):
+    _write_section(f, sections, name, np.frombuffer("\0".join(strings).encode(), dtype=np.uint8))
+
+def write_state(path, version, renumber=True, **fields):
+    """Write a pinned version to path: an interned InterPro table, protein columns (IDs,
+    entries, each serialized protein at its offset and its signature row), the bitset
+    words and popcount of every signature and the condensed score array over the
+    signatures, renumbered densely. Pending pairs are scored on the way, so the file is
+    complete. Signatures without room in the score array (see scores.py) are left out
+    of it, after the "scored" ones. fields are added to the header.
+
+    Without renumber, rows keep their slots and the score array is left out: the
+    header lists the unused slots ("free_rows") and the pending ones, as WAL
+    checkpoints store the scores of those slots apart (see wal.py)."""
+    domain_sets = version.domain_sets
+    bits, sizes = domain_sets.bits, domain_sets.sizes
+    if renumber:
+        slots = np.sort(version.unique_rows())
+        rank = {old: new for new, old in enumerate(slots.tolist())}
+        bits, sizes = bits[slots], sizes[slots]
+    else:
+        used = version.unique_rows()
+        n = max(int(used.max()) + 1 if len(used) else 0, version.scored)
+        free = np.ones(n, dtype=bool)
+        free[used] = False
+        # Rows no protein of the version uses may be reused by later ones meanwhile
+        bits, sizes = bits[:n].copy(), sizes[:n].copy()
+        bits[free], sizes[free] = 0, 0
+        slots = np.arange(n)
+        rank = dict(zip(used.tolist(), used.tolist()))
+        fields.update(
+            free_rows=np.flatnonzero(free).tolist(),
+            pending=sorted(int(row) for row in version.pending),
+        )
+    ids = sorted(version.proteins)
+
+    sections = {}
+    with open(path, "wb") as f:
+        f.write(b"\0" * _PROLOGUE.size)
+        _write_strings(f, sections, "symbols", list(domain_sets.symbols))
+        _write_strings(f, sections, "protein_ids", ids)
+        _write_strings(f, sections, "protein_entries", [version.proteins[p_id].entry for p_id in ids])
+        # Proteins back to back, each parsed on its own when loaded
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        start = f.tell()
+        for i, p_id in enumerate(ids):
+            f.write(version.proteins[p_id].SerializeToString())
+            offsets[i + 1] = f.tell() - start
+        sections["protein_data"] = [start, np.dtype(np.uint8).str, int(offsets[-1])]
+        f.write(b"\0" * (-f.tell() % 8))
+        _write_section(f, sections, "protein_offsets", offsets)
+        _write_section(f, sections, "protein_rows", np.array([rank[version.rows[p_id]] for p_id in ids], dtype=np.int32))
+        _write_section(f, sections, "bits", bits.reshape(-1))
+        _write_section(f, sections, "sizes", sizes)
+        scored = int(np.searchsorted(slots, version.scored))
+        if renumber:
+            # Row i of the lower triangle against signatures 0..i-1, as in PairScores
+            offset = f.tell()
+            for i in range(1, scored):
+                f.write(version.row_scores(slots[i], slots[:i]).astype(np.float32).tobytes())
+            sections["scores"] = [offset, np.dtype(np.float32).str, scored * (scored - 1) // 2]
+            f.write(b"\0" * (-f.tell() % 8))
+
+        header = json.dumps({
+            "format": 2,
+            "proteins": len(ids),
+            "signatures": len(slots),
+            "words": bits.shape[1],
+            "scored": scored,
+            "sections": sections,
+            **fields,
+        }).encode()
+        header_offset = f.tell()
+        f.write(header)
+        f.seek(0)
+        f.write(_PROLOGUE.pack(MAGIC, header_offset, len(header)))
+
+class StateStore:
+    """Named states as STATE_SUFFIX files in one directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Left by saves a crash interrupted
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".tmp"):
+                    os.remove(os.path.join(directory, name))
+
+    @staticmethod
+    def valid_name(name):
+        return bool(_STATE_NAME.match(name))
+
+    def path(self, name):
+        return os.path.join(self.directory, name + STATE_SUFFIX)
+
+    def exists(self, name):
+        return self.valid_name(name) and os.path.exists(self.path(name))
+
+    def save(self, name, version):
+        """Write version as name, replacing any previous file only once complete and
+        on disk, so a crash leaves either the old file or the new one."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write_state(tmp, version)
+            with open(tmp, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path(name))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        fsync_directory(self.directory)
+        return os.path.getsize(self.path(name))
+
+    def open(self, name):
+        """The SavedState called name, or None. Raises ValueError if the file is not a
+        complete state file."""
+        if not self.exists(name):
+            return None
+        return SavedState(self.path(name))
+
+    def remove(self, name):
+        if not self.exists(name):
+            return False
+        os.remove(self.path(name))
+        return True
+
+    def list(self):
+        """(name, bytes, proteins) of every readable saved state, by name."""
+        if not os.path.isdir(self.directory):
+            return []
+        states = []
+        for file_name in sorted(os.listdir(self.directory)):
+            name = file_name[:-len(STATE_SUFFIX)]
+            if not file_name.endswith(STATE_SUFFIX) or not self.valid_name(name):
+                continue
+            path = self.path(name)
+            try:
+                with open(path, "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    proteins = read_header(f, size, path)["proteins"]
+            except (OSError, ValueError) as e:
+                print(f"Server: Skipping unreadable state file {file_name}: {e}")
+                continue
+            states.append((name, size, proteins))
+        return states
@@ -0,0 +1,21 @@
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+
+def run():
+    print("--- Analyzer Stats ---")
+    with grpc.insecure_channel('localhost:50051') as channel:
+        stub = methods_pb2_grpc.PassStub(channel)
+        try:
+            stats = stub.GetStats(methods_pb2.Empty())
+            print(f"Proteins: {stats.proteins}, unique signatures: {stats.unique_signatures} "
+                  f"(dedup ratio {stats.dedup_ratio:.2f}x)")
+            print(f"Signature pairs: {stats.signature_pairs} ({stats.nonzero_pairs} non-zero), "
+                  f"standing for {stats.protein_pairs} protein pairs")
+            print(f"Pending signatures: {stats.pending_signatures}, free slots: {stats.free_slots}, "
+                  f"score array: {stats.score_bytes / 1e6:.1f} MB")
+        except grpc.RpcError as e:
+            print(f"RPC Error: {e.details()}")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import methods_pb2
+import server
+
+def protein(n, interpro):
+    return methods_pb2.Protein(id=f"P{n}", entry=f"E{n}", interpro=interpro)
+
+def add(analyzer, *proteins):
+    analyzer.add_batch(methods_pb2.ProteinBatch(proteins=proteins))
+
+@pytest.fixture
+def analyzer(tmp_path):
+    return server.ProteinAnalyzer(backend="python", state_dir=str(tmp_path / "states"))
@@ -0,0 +1,43 @@
+import pytest
+import server
+from conftest import add, protein
+from statestore import SavedState
+from versions import LazyCowDict, _Encoded
+
+def test_saved_state_loads_lazily(analyzer, tmp_path):
+    add(analyzer, protein(1, "A;B;"), protein(2, "B;C;"), protein(3, "C;"), protein(4, "B;C;"))
+    analyzer.compute_all()
+    assert analyzer.save_named_state("s", overwrite=False)[0]
+
+    saved = SavedState(analyzer.named_states.path("s"))
+    proteins, entry_to_id, domain_sets, pair_scores = saved.load()
+    # Proteins are parsed on first read; bitsets and scores are views on the file
+    assert isinstance(proteins, LazyCowDict)
+    assert all(type(v) is _Encoded for segment in proteins._segments for v in segment.values())
+    assert not domain_sets.bits.flags.owndata and not pair_scores.data.flags.owndata
+    assert proteins["P2"].interpro == "B;C;"
+    assert dict(entry_to_id.items()) == {f"E{n}": f"P{n}" for n in range(1, 5)}
+    assert domain_sets.rows["P2"] == domain_sets.rows["P4"]
+
+def test_load_and_rollback_of_a_saved_state(analyzer, tmp_path):
+    add(analyzer, protein(1, "A;B;"), protein(2, "B;C;"))
+    analyzer.compute_all()
+    analyzer.save_named_state("s", overwrite=False)
+    analyzer.delete_proteins(["E1"])
+    add(analyzer, protein(3, "C;D;"))
+
+    other = server.ProteinAnalyzer(backend="python", state_dir=str(tmp_path / "states"))
+    assert other.load_named_state("s")[0]
+    assert sorted(other.current.proteins) == ["P1", "P2"]
+    assert other._calculate_pair("P1", "P2") == pytest.approx(1 / 3)
+    # The loaded signatures are found again, and new ones scored against them
+    add(other, protein(5, "B;C;"), protein(6, "A;"))
+    other.compute_all()
+    assert other.current.rows["P5"] == other.current.rows["P2"]
+    assert other._calculate_pair("P1", "P6") == pytest.approx(1 / 2)
+
+    assert analyzer.load_named_state("s")[0]
+    assert sorted(analyzer.current.proteins) == ["P1", "P2"]
+    assert analyzer.perform_standard_rollback()[0]
+    assert sorted(analyzer.current.proteins) == ["P2", "P3"]
+    assert analyzer._calculate_pair("P2", "P3") == pytest.approx(1 / 3)
@@ -0,0 +1,28 @@
+import methods_pb2
+import pytest
+from conftest import add, protein
+
+def test_stream_cut_short_changes_nothing(analyzer):
+    add(analyzer, protein(1, "A;"))
+
+    def batches():
+        yield methods_pb2.ProteinBatch(proteins=[protein(2, "A;B;")])
+        raise RuntimeError("deadline exceeded")
+
+    with pytest.raises(RuntimeError):
+        analyzer.add_stream(batches())
+    assert sorted(analyzer.current.proteins) == ["P1"]
+    assert len(analyzer.history) == 1
+
+    # Cut short by the deadline: the stream just ends, without its last batch
+    assert analyzer.add_stream(iter([methods_pb2.ProteinBatch(proteins=[protein(2, "A;B;")])])) is None
+    assert sorted(analyzer.current.proteins) == ["P1"]
+
+    received = analyzer.add_stream(iter([
+        methods_pb2.ProteinBatch(proteins=[protein(2, "A;B;")]),
+        methods_pb2.ProteinBatch(proteins=[protein(3, "B;")], last=True),
+    ]))
+    assert received == (2, 2)
+    assert sorted(analyzer.current.proteins) == ["P1", "P2", "P3"]
+    # One history entry for the whole stream
+    assert len(analyzer.history) == 2
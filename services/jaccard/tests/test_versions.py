@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from bitsets import DomainBitsets
+from conftest import add, protein
+
+def test_compute_all_keeps_reclaimed_rows_pending(analyzer, monkeypatch):
+    # A row retired while compute_all runs is reclaimed for a new signature as soon as
+    # the computation's version is unpinned; the new signature must stay pending
+    add(analyzer, protein(1, "A;"), protein(2, "A;B;"), protein(4, "C;"))
+    analyzer.compute_all()
+    add(analyzer, protein(3, "C;D;"))
+
+    release = analyzer._release
+    def release_then_write(version):
+        release(version)
+        monkeypatch.setattr(analyzer, "_release", release)
+        analyzer.delete_proteins(["E3"])
+        add(analyzer, protein(5, "C;E;F;"))
+    monkeypatch.setattr(analyzer, "_release", release_then_write)
+    analyzer.compute_all()
+
+    # Neither 0.0 (unscored) nor 0.5 (the retired C;D; row)
+    assert analyzer._calculate_pair("P4", "P5") == pytest.approx(1 / 3)
+    analyzer.compute_all()
+    assert analyzer._calculate_pair("P4", "P5") == pytest.approx(1 / 3)
+
+def test_pinned_version_reads_survive_writes(analyzer):
+    add(analyzer, protein(1, "A;B;"), protein(2, "B;C;"))
+    analyzer.compute_all()
+    with analyzer.pinned() as version:
+        analyzer.delete_proteins(["E2"])
+        add(analyzer, protein(3, "D;"))
+        analyzer.compute_all()
+        assert version.score(version.rows["P1"], version.rows["P2"]) == pytest.approx(1 / 3)
+    assert "P2" not in analyzer.current.rows
+
+class WideningBitsets(DomainBitsets):
+    """Widens its word matrix (as a concurrent intern() would) right after the first
+    read of bits once armed."""
+    armed = False
+
+    @property
+    def bits(self):
+        bits = self._bits
+        if self.armed:
+            self.armed = False
+            for i in range(bits.shape[1] * 64):
+                self.intern(f"WIDE{i}")
+        return bits
+
+    @bits.setter
+    def bits(self, value):
+        self._bits = value
+
+@pytest.mark.parametrize("read", [
+    lambda ds, a, b: ds.score_row(a, np.array([b])),
+    lambda ds, a, b: np.array([ds.jaccard_rows(a, b)]),
+    lambda ds, a, b: ds.score_columns(ds.row_columns(a), 2, np.array([b])),
+])
+def test_bitset_reads_take_the_array_once(read):
+    ds = WideningBitsets()
+    # Two words per row, so a row of the old array cannot broadcast against the new one
+    for i in range(65):
+        ds.intern(f"IPR{i}")
+    ds.add("P1", {"A", "B"})
+    ds.add("P2", {"B", "C"})
+    a, b = ds.rows["P1"], ds.rows["P2"]
+    ds.armed = True
+    assert read(ds, a, b)[0] == pytest.approx(1 / 3)
+    assert ds.bits.shape[1] > 2
@@ -0,0 +1,66 @@
+import os
+import pytest
+import server
+import wal
+from conftest import add, protein
+from wal import WriteAheadLog
+
+def recovered(tmp_path):
+    analyzer = server.ProteinAnalyzer(backend="python", state_dir=str(tmp_path / "states"))
+    analyzer.recover(WriteAheadLog(str(tmp_path / "wal"), fsync=False))
+    return analyzer
+
+def shut_down(analyzer):
+    if analyzer._checkpoint_thread is not None:
+        analyzer._checkpoint_thread.join()
+    analyzer.wal.close()
+
+def test_recovery_restores_state_and_change_cursor(tmp_path):
+    analyzer = recovered(tmp_path)
+    add(analyzer, protein(1, "A;B;"), protein(2, "B;C;"))
+    analyzer.checkpoint()
+    add(analyzer, protein(3, "C;"))
+    cursor = (analyzer.changes.epoch, analyzer.current.changes)
+    analyzer.delete_proteins(["E1"])
+    expected = (analyzer.changes.epoch, analyzer.current.changes)
+    shut_down(analyzer)
+
+    analyzer = recovered(tmp_path)
+    assert sorted(analyzer.current.proteins) == ["P2", "P3"]
+    assert (analyzer.changes.epoch, analyzer.current.changes) == expected
+    assert analyzer._calculate_pair("P2", "P3") == pytest.approx(1 / 2)
+    # A consumer that read up to before the delete only gets the delete
+    full, proteins, removed, _ = analyzer.pair_changes(cursor[1], cursor[0], analyzer.current)
+    assert not full
+    assert list(removed) == ["E1"]
+    shut_down(analyzer)
+
+def test_checkpoints_write_score_deltas_and_replay_is_not_journaled(tmp_path, monkeypatch):
+    # The arrays are tiny: any delta would otherwise outgrow the base
+    monkeypatch.setattr(wal, "SCORE_DELTA_FRACTION", 10)
+    analyzer = recovered(tmp_path)
+    add(analyzer, protein(1, "A;B;"), protein(2, "B;C;"), protein(3, "C;D;"))
+    # Enough other signatures for the later computation to be incremental
+    add(analyzer, *(protein(n, f"X{n};") for n in range(10, 22)))
+    analyzer.compute_all()
+    analyzer.checkpoint()
+    # Frees P1's slot and scores a new signature against the others
+    analyzer.delete_proteins(["E1"])
+    add(analyzer, protein(4, "C;D;E;"))
+    analyzer.compute_all()
+    analyzer.checkpoint()
+    names = sorted(os.listdir(tmp_path / "wal"))
+    assert [name for name in names if name.startswith("scores-")] == ["scores-00000001.base", "scores-00000002.delta"]
+    add(analyzer, protein(5, "A;"))
+    shut_down(analyzer)
+
+    analyzer = recovered(tmp_path)
+    assert len(analyzer.history) == 0
+    assert analyzer._calculate_pair("P2", "P3") == pytest.approx(1 / 3)
+    assert analyzer._calculate_pair("P3", "P4") == pytest.approx(2 / 3)
+    assert analyzer._calculate_pair("P4", "P5") == 0.0
+    matches, _ = analyzer.top_matches("P3", 5)
+    assert [p_id for p_id, _ in matches] == ["P4", "P2"]
+    analyzer.compute_all()
+    assert analyzer._calculate_pair("P2", "P5") == 0.0
+    shut_down(analyzer)
@@ -0,0 +1,28 @@
+import grpc
+import methods_pb2
+import methods_pb2_grpc
+import sys
+
+def run():
+    min_jaccard = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+
+    print(f"--- Threshold Pairs (Jaccard >= {min_jaccard}) ---")
+    with grpc.insecure_channel('localhost:50051') as channel:
+        stub = methods_pb2_grpc.PassStub(channel)
+        request = methods_pb2.ThresholdRequest(min_jaccard=min_jaccard)
+
+        try:
+            count = 0
+            total_pairs = 0
+            for match in stub.CalculateThresholdPairs(request):
+                count += 1
+                total_pairs += len(match.correlations)
+                for corr in match.correlations:
+                    print(f"{match.query_protein.entry} - {corr.entry}: {corr.jaccard:.4f}")
+            print(f"{total_pairs} pairs over {count} proteins")
+
+        except grpc.RpcError as e:
+            print(f"RPC Error: {e.details()}")
+
+if __name__ == '__main__':
+    run()
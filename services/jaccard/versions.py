@@ -0,0 +1,239 @@
+import numpy as np
+
+# Hash segments of a CowDict: a write after a snapshot copies 1 / COW_SEGMENTS of the dict
+COW_SEGMENTS = 256
+
+class _Encoded:
+    """Value of a LazyCowDict not decoded yet: decode(index) produces it."""
+
+    __slots__ = ("decode", "index")
+
+    def __init__(self, decode, index):
+        self.decode = decode
+        self.index = index
+
+def _decoded(segment, key, value):
+    """value as stored in segment under key, decoded (in place) if it is _Encoded."""
+    if type(value) is _Encoded:
+        value = value.decode(value.index)
+        segment[key] = value
+    return value
+
+class CowDict:
+    """Dict split into hash segments that snapshots share.
+
+    snapshot() and copy() cost O(COW_SEGMENTS) whatever the size. Afterwards neither
+    side owns any segment, so the first write to a segment copies just that segment:
+    memory grows with what changed, not with the number of snapshots taken.
+    Iteration order follows the segments, not insertion.
+    """
+
+    __slots__ = ("_segments", "_owned", "_len")
+
+    def __init__(self, items=(), segments=COW_SEGMENTS):
+        self._segments = [{} for _ in range(segments)]
+        self._owned = [True] * segments
+        self._len = 0
+        for key, value in dict(items).items():
+            self[key] = value
+
+    def _writable(self, key):
+        i = hash(key) % len(self._segments)
+        if not self._owned[i]:
+            self._segments[i] = dict(self._segments[i])
+            self._owned[i] = True
+        return self._segments[i]
+
+    def snapshot(self):
+        """Copy sharing every segment with this dict; neither copies until it writes."""
+        other = type(self).__new__(type(self))
+        other._segments = list(self._segments)
+        other._owned = [False] * len(self._segments)
+        other._len = self._len
+        self._owned = [False] * len(self._segments)
+        return other
+
+    copy = snapshot
+
+    def __getitem__(self, key):
+        return self._segments[hash(key) % len(self._segments)][key]
+
+    def get(self, key, default=None):
+        return self._segments[hash(key) % len(self._segments)].get(key, default)
+
+    def __contains__(self, key):
+        return key in self._segments[hash(key) % len(self._segments)]
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for segment in self._segments:
+            yield from segment
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for segment in self._segments:
+            yield from segment.values()
+
+    def items(self):
+        for segment in self._segments:
+            yield from segment.items()
+
+    def __setitem__(self, key, value):
+        segment = self._writable(key)
+        if key not in segment:
+            self._len += 1
+        segment[key] = value
+
+    def __delitem__(self, key):
+        del self._writable(key)[key]
+        self._len -= 1
+
+    def changed_keys(self, other):
+        """Keys whose value differs between this dict and other (missing in one counts).
+        Segments the two still share are skipped."""
+        changed = set()
+        for mine, theirs in zip(self._segments, other._segments):
+            if mine is theirs:
+                continue
+            for key in mine.keys() | theirs.keys():
+                a, b = mine.get(key), theirs.get(key)
+                if a is b:
+                    continue
+                if a is None or b is None:
+                    changed.add(key)
+                    continue
+                # Values of a LazyCowDict are compared decoded, unless both are the
+                # same value not decoded yet
+                if type(a) is _Encoded and type(b) is _Encoded and (a.decode, a.index) == (b.decode, b.index):
+                    continue
+                if _decoded(mine, key, a) != _decoded(theirs, key, b):
+                    changed.add(key)
+        return changed
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+class LazyCowDict(CowDict):
+    """CowDict of values decoded on first read, e.g. from a memory-mapped state file.
+
+    decode(i) produces the value of the i-th key given to the constructor. A decoded
+    value replaces its placeholder in place, in whichever segment holds it; that
+    segment may be shared with snapshots, which then see the decoded value too.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, keys, decode, segments=COW_SEGMENTS):
+        super().__init__(segments=segments)
+        for i, key in enumerate(keys):
+            self[key] = _Encoded(decode, i)
+
+    def __getitem__(self, key):
+        segment = self._segments[hash(key) % len(self._segments)]
+        return _decoded(segment, key, segment[key])
+
+    def get(self, key, default=None):
+        segment = self._segments[hash(key) % len(self._segments)]
+        value = segment.get(key, default)
+        return value if value is default else _decoded(segment, key, value)
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        for segment in self._segments:
+            for key, value in list(segment.items()):
+                yield key, _decoded(segment, key, value)
+
+class IndexVersion:
+    """One published, read-only state of the analyzer (read-copy-update).
+
+    Writers never modify the mappings of a published version: they change their own
+    working copies under the analyzer lock and publish a new IndexVersion with a
+    single reference swap, so readers holding a version never see a torn state.
+
+    domain_sets and pair_scores are shared between versions. Through a version only
+    its own signature rows are read, and those never change while a reader can see
+    them: rows are immutable signatures, new signatures get slots no published
+    version uses, and retired rows are only cleared once no pinned version holds
+    them (see ProteinAnalyzer.pinned). Pairs of pending rows are not scored yet, and
+    rows from scored on have no room in the score array (it is capped, see scores.py):
+    both are computed from the bitsets on read.
+
+    The mappings are CowDict snapshots, so publishing a version, or keeping one as a
+    history snapshot, copies nothing.
+    """
+
+    def __init__(self, number, proteins, entry_to_id, rows, members, index, pending, domain_sets, pair_scores, changes=0):
+        self.number = number
+        self.changes = changes          # sequence of the last change it includes (see changes.py)
+        self.proteins = proteins        # protein ID -> Protein
+        self.entry_to_id = entry_to_id  # entry -> protein ID
+        self.rows = rows                # protein ID -> signature row
+        self.members = members          # signature row -> tuple of protein IDs
+        self.index = index              # InterPro column -> frozenset of rows
+        self.pending = pending          # frozenset of rows not scored yet
+        self.domain_sets = domain_sets
+        self.pair_scores = pair_scores
+        self.scored = pair_scores.slots  # rows below it have room in pair_scores
+        self._pending_rows = np.fromiter(pending, dtype=np.int64, count=len(pending))
+
+    def unique_rows(self):
+        """Rows in use, one per distinct signature."""
+        return np.fromiter(self.members.keys(), dtype=np.int64, count=len(self.members))
+
+    def row_indices(self, ids):
+        return np.fromiter((self.rows[p_id] for p_id in ids), dtype=np.int64, count=len(ids))
+
+    def candidate_rows(self, row):
+        """Signature rows sharing at least one InterPro domain with row (excluding itself)."""
+        candidates = self.column_candidates(self.domain_sets.row_columns(row).tolist())
+        candidates.discard(row)
+        return candidates
+
+    def column_candidates(self, cols):
+        """Signature rows carrying at least one of the columns cols."""
+        candidates = set()
+        for col in cols:
+            candidates.update(self.index.get(col, ()))
+        return candidates
+
+    def self_score(self, row):
+        """Jaccard of a signature with itself: 1.0, or 0.0 for an empty domain set."""
+        return 1.0 if self.domain_sets.sizes[row] > 0 else 0.0
+
+    def row_scores(self, row, others, diagonal=0.0):
+        """Scores of row against every row in others, as pair_scores.row, with pairs of
+        pending or unstored rows computed from the bitsets instead."""
+        others = np.asarray(others, dtype=np.int64)
+        if row in self.pending or row >= self.scored:
+            scores = self.domain_sets.score_row(row, others).astype(np.float32)
+            scores[others == row] = diagonal
+            return scores
+        stale = others >= self.scored
+        if len(self._pending_rows):
+            stale |= np.isin(others, self._pending_rows)
+        if not stale.any():
+            return self.pair_scores.row(row, others, diagonal)
+        scores = np.empty(len(others), dtype=np.float32)
+        scores[~stale] = self.pair_scores.row(row, others[~stale], diagonal)
+        scores[stale] = self.domain_sets.score_row(row, others[stale])
+        return scores
+
+    def score(self, r1, r2):
+        if r1 == r2:
+            return self.self_score(r1)
+        if r1 in self.pending or r2 in self.pending or max(r1, r2) >= self.scored:
+            return self.domain_sets.jaccard_rows(r1, r2)
+        return self.pair_scores.get(r1, r2)
@@ -0,0 +1,233 @@
+import os
+import re
+import struct
+import tempfile
+import weakref
+import zlib
+import numpy as np
+import methods_pb2
+from scores import PairScores
+from statestore import SavedState, fsync_directory, write_state
+
+# Record: payload length and CRC-32, then one op byte and the serialized request
+_RECORD = struct.Struct("<II")
+ADD = b"A"       # ProteinBatch passed to add_batch
+DELETE = b"D"    # EntryList passed to delete_proteins
+REPLACE = b"S"   # ProteinBatch replacing every protein (logs of older servers)
+JUMP = b"J"      # ProteinDelta of a rollback or state load
+_PAYLOADS = {
+    ADD: methods_pb2.ProteinBatch,
+    DELETE: methods_pb2.EntryList,
+    REPLACE: methods_pb2.ProteinBatch,
+    JUMP: methods_pb2.ProteinDelta
+}
+_SEGMENT = re.compile(r"wal-(\d{8})\.log\Z")
+CHECKPOINT_FILE = "checkpoint.jstate"
+# Score files of checkpoints: a whole score array, or the positions written since the
+# previous file (int64 indices, then their float32 scores)
+_SCORE_FILE = re.compile(r"scores-\d{8}\.(base|delta)\Z")
+_DELTA_ITEM = np.dtype(np.int64).itemsize + np.dtype(np.float32).itemsize
+# A new base is written once the deltas since the last one add up to this part of it
+SCORE_DELTA_FRACTION = 0.25
+
+class WriteAheadLog:
+    """Append-only log of analyzer mutations in numbered segment files, plus the
+    latest checkpoint (a state file, see statestore.py).
+
+    A checkpoint records the first segment written after it was taken; recovery loads
+    it and replays that segment and every later one. Records are CRC-checked, so a
+    record torn by a crash ends the replay and is cut off.
+
+    The checkpoint keeps the analyzer's slot numbers, so its score array is stored as
+    a chain of score files rather than in it: a base copy of the array, then one delta
+    per later checkpoint holding the positions written since the previous one (see
+    PairScores.take_written). A checkpoint only rewrites the whole array when the
+    array was replaced (compaction, recalculation, state loads) or the deltas have
+    grown past SCORE_DELTA_FRACTION of it.
+    """
+
+    def __init__(self, directory, fsync=True):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self.segment = None
+        self.records = 0   # appended since the last rotation
+        self.bytes = 0
+        # Score files of the latest checkpoint, oldest first, and the PairScores they
+        # follow (a weak reference); None until a base is written by this process
+        self._score_files = []
+        self._scores_owner = None
+        self._base_bytes = 0
+        self._delta_bytes = 0
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"wal-{segment:08d}.log")
+
+    def segments(self):
+        found = (_SEGMENT.match(name) for name in os.listdir(self.directory))
+        return sorted(int(m.group(1)) for m in found if m)
+
+    def checkpoint(self):
+        """(SavedState or None, first segment to replay)."""
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None, 0
+        saved = SavedState(path)
+        return saved, saved.header["wal_segment"]
+
+    def load_scores(self, header):
+        """The score array of the checkpoint with this header, from its score files.
+        Pairs involving its free rows are zeroed: those slots may have been reused
+        after the files holding their scores were written."""
+        pair_scores = PairScores(capacity=1)
+        pair_scores.slots = header["scored"]
+        size = pair_scores.size()
+        pair_scores.data = np.zeros(max(1, size), dtype=np.float32)
+        for name in header["score_files"]:
+            path = os.path.join(self.directory, name)
+            if name.endswith(".base"):
+                base = np.fromfile(path, dtype=np.float32)[:size]
+                pair_scores.data[:len(base)] = base
+            else:
+                with open(path, "rb") as f:
+                    data = f.read()
+                count = len(data) // _DELTA_ITEM
+                indices = np.frombuffer(data, dtype=np.int64, count=count)
+                scores = np.frombuffer(data, dtype=np.float32, count=count, offset=count * 8)
+                # Positions written after the checkpoint that wrote them, but beyond
+                # its scored slots, are only applied by the later checkpoints using it
+                keep = indices < size
+                pair_scores.data[indices[keep]] = scores[keep]
+        free = np.zeros(pair_scores.slots, dtype=bool)
+        free[[row for row in header["free_rows"] if row < pair_scores.slots]] = True
+        pair_scores.clear_slots(free)
+        return pair_scores
+
+    def _write_scores(self, pair_scores, written, slots, segment):
+        """Write the score file of the checkpoint replaying from segment and return the
+        chain of score files it uses. written is pair_scores.take_written() and slots
+        its slots, both taken after the version was pinned."""
+        owner = self._scores_owner() if self._scores_owner is not None else None
+        base = (
+            written is True or owner is not pair_scores or
+            self._delta_bytes + len(written) * _DELTA_ITEM > SCORE_DELTA_FRACTION * self._base_bytes
+        )
+        # No further delta may follow this chain unless the new file makes it
+        self._scores_owner = None
+        data = pair_scores.data
+        if base:
+            name = f"scores-{segment:08d}.base"
+            payload = [data[:slots * (slots - 1) // 2]]
+            files = [name]
+        else:
+            name = f"scores-{segment:08d}.delta"
+            payload = [written, data[written]]
+            files = self._score_files + [name]
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for array in payload:
+                    f.write(array)
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp, os.path.join(self.directory, name))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        nbytes = sum(array.nbytes for array in payload)
+        if base:
+            self._base_bytes, self._delta_bytes = nbytes, 0
+        else:
+            self._delta_bytes += nbytes
+        return files
+
+    def _remove_score_files(self, keep):
+        for name in os.listdir(self.directory):
+            if _SCORE_FILE.match(name) and name not in keep:
+                os.remove(os.path.join(self.directory, name))
+
+    def replay(self, first_segment):
+        """Yield (op, request) of every record from first_segment on, truncating a torn
+        record at the end of the log."""
+        for segment in self.segments():
+            if segment < first_segment:
+                continue
+            path = self._path(segment)
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + _RECORD.size <= len(data):
+                length, crc = _RECORD.unpack_from(data, offset)
+                payload = data[offset + _RECORD.size:offset + _RECORD.size + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                op = payload[:1]
+                yield op, _PAYLOADS[op].FromString(payload[1:])
+                offset += _RECORD.size + length
+            if offset < len(data):
+                print(f"Server: Truncating torn WAL record at {os.path.basename(path)}:{offset}.")
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+                return
+
+    def open(self):
+        """Start appending to a new segment after the existing ones, removing checkpoint
+        and score files left unfinished or unused by a crash."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+        saved, _ = self.checkpoint()
+        self._remove_score_files(saved.header.get("score_files", []) if saved is not None else [])
+        self.rotate()
+
+    def rotate(self):
+        """Close the current segment and start the next; returns its number."""
+        segments = self.segments()
+        self.segment = (segments[-1] + 1) if segments else 0
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self._path(self.segment), "ab")
+        self.records = 0
+        self.bytes = 0
+        return self.segment
+
+    def append(self, op, request):
+        payload = op + request.SerializeToString()
+        self._file.write(_RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += 1
+        self.bytes += _RECORD.size + len(payload)
+
+    def write_checkpoint(self, version, segment, written, slots, **fields):
+        """Write version as the checkpoint to replay segment on from, then drop the
+        segments and score files it covers. written and slots are the positions
+        written to its score array (see PairScores.take_written) and its slots, taken
+        after the version was pinned. fields are added to its header."""
+        score_files = self._write_scores(version.pair_scores, written, slots, segment)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write_state(tmp, version, renumber=False, wal_segment=segment, score_files=score_files, **fields)
+            if self.fsync:
+                with open(tmp, "rb") as f:
+                    os.fsync(f.fileno())
+            os.replace(tmp, os.path.join(self.directory, CHECKPOINT_FILE))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        if self.fsync:
+            fsync_directory(self.directory)
+        self._score_files = score_files
+        self._scores_owner = weakref.ref(version.pair_scores)
+        self._remove_score_files(score_files)
+        for old in self.segments():
+            if old < segment:
+                os.remove(self._path(old))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None